@@ -72,12 +72,11 @@ def add_sample_data():
     # Add all sample data
     contents = [homework1, homework2, todays_homework, announcement1, announcement2, notes1]
     
-    for content in contents:
-        try:
-            school_service.create_content(content)
+    try:
+        for content in school_service.create_contents(contents):
             print(f"Added: {content.title}")
-        except Exception as e:
-            print(f"Error adding {content.title}: {e}")
+    except Exception as e:
+        print(f"Error adding sample data: {e}")
 
 if __name__ == "__main__":
     add_sample_data()
\ No newline at end of file
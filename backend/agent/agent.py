@@ -1,6 +1,7 @@
-from google_adk.agents import LlmAgent
+from google.adk.agents import LlmAgent
 from agent.tools import *
 from agent.prompt import *
+from agent.intents import IntentRouter
 
 def generate_response(self, query: str, context: dict | None = None):
     # Add system prompt tuning for the new persona
@@ -18,18 +19,9 @@ root_agent=LlmAgent(
     model = Model,
     description="Digi School Agent which helps school teachers to upload & share daily class notes, homework and important comms with parents.", 
     instruction=ROOT_AGENT_PROMPT,
-    tools= [
-        get_contents,
-        get_homework_by_date,
-        get_homework_by_natural_date,
-        get_announcements_by_week,
-        update_homework_title,
-        update_todays_homework_by_subject,
-        remove_announcement,
-        find_announcement_by_keyword,
-        upload_notes,
-        search_content_by_type,
-        get_todays_homework,
-        get_content_summary
-    ]
-)
\ No newline at end of file
+    # Async variants keep tool DB work off the event loop serving /schools/chat
+    tools=ASYNC_TOOLS
+)
+
+# What the chat endpoints talk to: common queries are answered by a direct tool call
+chat_agent = IntentRouter(root_agent)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from services import school_service
+from core.tenancy import current_tenant
+
+# Tag for results that depend on every content row (full lists, summaries)
+ALL_CONTENT = "*"
+
+
+class ToolCache:
+    """Bounded LRU cache with TTL for read-only agent tool results.
+
+    Each entry carries the content types it was computed from, so a write
+    only evicts the entries that could have changed.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+        self._invalidations = 0
+
+    def get(self, tool: str, key: str):
+        """Return (True, value) on a fresh hit, (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits[tool] = self._hits.get(tool, 0) + 1
+                return True, entry[2]
+            if entry:
+                del self._entries[key]
+            self._misses[tool] = self._misses.get(tool, 0) + 1
+            return False, None
+
+    def put(self, key: str, value, tags):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tag.strip().lower() for tag in tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, content_types) -> int:
+        """Drop entries computed from any of the given content types. Returns how many."""
+        content_types = {content_type.strip().lower() for content_type in content_types}
+        with self._lock:
+            stale = [
+                key for key, (_, tags, _) in self._entries.items()
+                if ALL_CONTENT in tags or tags & content_types
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def on_content_change(self, changes):
+        """school_service change listener: evict results for the old and new content types, once per batch."""
+        self.invalidate({
+            content.content_type
+            for _, _, before, after in changes
+            for content in (before, after) if content is not None
+        })
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = sorted(set(self._hits) | set(self._misses))
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "invalidated": self._invalidations,
+                "tools": {
+                    tool: {"hits": self._hits.get(tool, 0), "misses": self._misses.get(tool, 0)}
+                    for tool in tools
+                },
+            }
+
+
+tool_cache = ToolCache()
+school_service.add_change_listener(tool_cache.on_content_change)
+
+
+def cached_tool(tags):
+    """Memoize a read-only tool on its name and arguments.
+
+    tags is an iterable of the content types the result is built from, or a
+    callable taking the tool's arguments and returning them; use ALL_CONTENT
+    for results that any write can change. Today's date is part of the key,
+    since several tools resolve "today" or "this week", and so is the
+    tenant, since each school has its own data.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps([func.__name__, current_tenant.get(), date.today().isoformat(), bound.arguments],
+                             sort_keys=True, default=str)
+            hit, value = tool_cache.get(func.__name__, key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            tool_cache.put(key, value, tags(*args, **kwargs) if callable(tags) else tags)
+            return value
+        return wrapper
+    return decorator
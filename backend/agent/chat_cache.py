@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Tuple
+from agent.intents import normalize
+from core.metrics import registry
+from core.tenancy import current_tenant
+
+# Answers to /schools/chat keyed on the normalized message, the agent's
+# configuration, the tenant and today's date, and tagged with the data
+# version they were computed at. Any content write bumps the version, so an
+# older answer is never served; there is nothing to invalidate by hand.
+CHAT_CACHE = os.environ.get("CHAT_CACHE", "1").lower() in ("1", "true", "yes")
+CHAT_CACHE_ENTRIES = int(os.environ.get("CHAT_CACHE_ENTRIES", 512))
+CHAT_CACHE_BYTES = int(float(os.environ.get("CHAT_CACHE_MB", 16)) * 1024 * 1024)
+# Optional SQLite file that keeps answers across restarts and worker processes
+CHAT_CACHE_DB = os.environ.get("CHAT_CACHE_DB", "")
+CHAT_CACHE_DISK_ENTRIES = int(os.environ.get("CHAT_CACHE_DISK_ENTRIES", 10000))
+
+# Trim the disk tier back to its bound once every this many stores
+_PRUNE_EVERY = 64
+
+chat_cache_total = registry.counter(
+    "digischool_chat_cache_total",
+    "Chat messages by response cache result: hit, miss or bypass.",
+    ("result",),
+)
+
+
+def _describe(value) -> str:
+    if callable(value) and not isinstance(value, type):
+        return getattr(value, "__qualname__", type(value).__qualname__)
+    return getattr(value, "name", None) or str(value)
+
+
+def agent_fingerprint(agent) -> str:
+    """Digest of what shapes an agent's answers.
+
+    Covers the type, name, model, instruction, tools and intents of the agent
+    and of every agent it wraps, so a prompt or tool change starts afresh.
+    """
+    parts = []
+    while agent is not None:
+        parts.append(type(agent).__qualname__)
+        for attr in ("name", "model", "instruction"):
+            value = getattr(agent, attr, None)
+            if value is not None:
+                parts.append(f"{attr}={_describe(value)}")
+        for attr in ("tools", "intents"):
+            items = getattr(agent, attr, None)
+            if items:
+                names = items.keys() if isinstance(items, dict) else map(_describe, items)
+                parts.append(f"{attr}={','.join(sorted(names))}")
+        agent = getattr(agent, "agent", None)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+class ChatCache:
+    """Bounded LRU of chat answers, with an optional SQLite tier behind it.
+
+    Memory holds at most max_entries answers and max_bytes of text. With a
+    path, answers are also written to that file and a memory miss falls
+    back to it; the file is opened on first use and trimmed to
+    max_disk_entries, least recently used first. A hit in either tier counts
+    as a use of the disk copy.
+    """
+
+    def __init__(self, max_entries: int = CHAT_CACHE_ENTRIES, max_bytes: int = CHAT_CACHE_BYTES,
+                 path: str = CHAT_CACHE_DB, max_disk_entries: int = CHAT_CACHE_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (version, text, created_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._stores = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._bypassed = 0
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.path)
+
+    def key(self, message: str, agent) -> str:
+        return hashlib.sha256(json.dumps(
+            [current_tenant.get(), agent_fingerprint(agent), date.today().isoformat(), normalize(message)]
+        ).encode()).hexdigest()
+
+    def get(self, key: str, version: int) -> Optional[Tuple[str, float]]:
+        """The cached answer for key at this data version and its age in seconds, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = bool(entry) and entry[0] != version
+            if stale:
+                self._drop(key)
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                self._hits += 1
+        if entry and self.persistent:
+            # Keep the disk copy of a hot answer from being pruned as unused
+            self._disk_touch(key)
+        if entry is None and self.persistent:
+            entry, disk_stale = self._disk_get(key, version)
+            stale = stale or disk_stale
+            if entry:
+                with self._lock:
+                    self._disk_hits += 1
+                    self._remember(key, entry)
+        if entry is None:
+            with self._lock:
+                self._misses += 1
+                self._stale += stale
+            chat_cache_total.inc("miss")
+            return None
+        chat_cache_total.inc("hit")
+        return entry[1], max(0.0, time.time() - entry[2])
+
+    def put(self, key: str, version: int, text: str):
+        entry = (version, text, time.time())
+        with self._lock:
+            self._remember(key, entry)
+        if self.persistent:
+            self._disk_put(key, entry)
+
+    def bypass(self):
+        """Count a request that asked not to be served from the cache."""
+        with self._lock:
+            self._bypassed += 1
+        chat_cache_total.inc("bypass")
+
+    def _remember(self, key: str, entry: tuple):
+        # Called with the lock held
+        if key in self._entries:
+            self._drop(key)
+        size = len(entry[1].encode())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        _, text, _ = self._entries.pop(key)
+        self._bytes -= len(text.encode())
+
+    # ----------------- Disk tier -----------------
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with the disk lock held
+        if self._disk is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_cache (
+                    key TEXT PRIMARY KEY,
+                    data_version INTEGER NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_cache_used ON chat_cache(used_at)")
+            self._disk = conn
+        return self._disk
+
+    def _disk_get(self, key: str, version: int) -> Tuple[Optional[tuple], bool]:
+        """(entry, stale): the row at this version, and whether an older one was dropped."""
+        with self._disk_lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT data_version, response, created_at FROM chat_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            if row[0] != version:
+                conn.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+                return None, True
+            conn.execute("UPDATE chat_cache SET used_at = ? WHERE key = ?", (time.time(), key))
+            return tuple(row), False
+
+    def _disk_touch(self, key: str):
+        with self._disk_lock:
+            self._connection().execute("UPDATE chat_cache SET used_at = ? WHERE key = ?", (time.time(), key))
+
+    def _disk_put(self, key: str, entry: tuple):
+        with self._disk_lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, data_version, response, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)", (key, *entry, entry[2])
+            )
+            self._stores += 1
+            if self._stores % _PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM chat_cache WHERE key IN "
+                    "(SELECT key FROM chat_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+
+    def _disk_count(self) -> Optional[int]:
+        with self._disk_lock:
+            if self._disk is None:
+                return None
+            return self._disk.execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.persistent:
+            with self._disk_lock:
+                self._connection().execute("DELETE FROM chat_cache")
+
+    def close(self):
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def stats(self) -> dict:
+        disk_entries = self._disk_count() if self.persistent else None
+        with self._lock:
+            hits = self._hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": {"path": self.path, "entries": disk_entries, "max_entries": self.max_disk_entries}
+                if self.persistent else None,
+                "hits": hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "bypassed": self._bypassed,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+chat_cache = ChatCache()
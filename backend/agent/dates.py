@@ -0,0 +1,201 @@
+import calendar
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Natural-language dates as inclusive (start, end) windows, for
+# date_uploaded range queries. Every grammar is compiled once at import and
+# parses are cached per (phrase, today), so relative phrases stay correct
+# across midnight.
+#
+# Uploads are in the past, so a date without a year ("Nov 5", "Monday",
+# "November") is its most recent occurrence on or before today.
+
+DateRange = Tuple[date, date]
+
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+_WEEKDAYS = {
+    "mon": 0, "monday": 0, "tue": 1, "tues": 1, "tuesday": 1, "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5, "sun": 6, "sunday": 6,
+}
+_NUMBERS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+            "eight": 8, "nine": 9, "ten": 10, "fourteen": 14, "thirty": 30}
+
+MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?" \
+        r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+WEEKDAY = r"(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?" \
+          r"|sat(?:urday)?|sun(?:day)?)"
+_ORDINAL = r"(?:st|nd|rd|th)?"
+_COUNT = rf"(?:\d{{1,3}}|{'|'.join(_NUMBERS)})"
+
+# One day
+_ISO = re.compile(r"^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$")
+_MONTH_DAY = re.compile(rf"^(?P<month>{MONTH}) (?P<day>\d{{1,2}}){_ORDINAL}(?: (?P<year>\d{{4}}))?$")
+_DAY_MONTH = re.compile(rf"^(?:the )?(?P<day>\d{{1,2}}){_ORDINAL} (?:of )?(?P<month>{MONTH})(?: (?P<year>\d{{4}}))?$")
+_ON_WEEKDAY = re.compile(rf"^(?:(?P<which>last|this) )?(?P<weekday>{WEEKDAY})$")
+_RELATIVE_DAYS = {"today": 0, "yesterday": -1, "day before yesterday": -2, "the day before yesterday": -2}
+
+# Whole periods
+_PERIOD = re.compile(r"^(?P<which>this|last|previous) (?P<unit>week|month|year)$")
+_MONTH_NAME = re.compile(rf"^(?P<month>{MONTH})(?: (?P<year>\d{{4}}))?$")
+# "past week" is the trailing seven days, "last week" the calendar one
+_LAST_N = re.compile(rf"^(?:the )?(?:(?:last|past|previous) (?P<count>{_COUNT})|past) (?P<unit>days?|weeks?|months?)$")
+_AGO = re.compile(rf"^(?P<count>{_COUNT}) (?P<unit>days?|weeks?) ago$")
+
+# Spans between two phrases
+_BETWEEN = re.compile(r"^(?:between|from) (?P<start>.+?) (?:and|to|until|till|through|thru) (?P<end>.+)$")
+_SINCE = re.compile(r"^(?:since|after) (?P<start>.+)$")
+_BEFORE = re.compile(r"^(?:before|until|till) (?P<end>.+)$")
+
+_LEADING = re.compile(r"^(?:on|for|from|in|during|of) ")
+_PUNCTUATION = re.compile(r"[?!.,;:]+")
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace("’", "'").replace("‘", "'")
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+
+
+def _month_start(day: date, months_back: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_range(year: int, month: int) -> DateRange:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _calendar_day(year: Optional[str], month: int, day: int, today: date) -> Optional[date]:
+    if year:
+        try:
+            return date(int(year), month, day)
+        except ValueError:
+            return None
+    # Looking back a few years finds the last Feb 29 too
+    for candidate_year in range(today.year, today.year - 8, -1):
+        try:
+            candidate = date(candidate_year, month, day)
+        except ValueError:
+            continue
+        if candidate <= today:
+            return candidate
+    return None
+
+
+def _day(text: str, today: date) -> Optional[date]:
+    if text in _RELATIVE_DAYS:
+        return today + timedelta(days=_RELATIVE_DAYS[text])
+    match = _ISO.match(text)
+    if match:
+        try:
+            return date(int(match["year"]), int(match["month"]), int(match["day"]))
+        except ValueError:
+            return None
+    match = _MONTH_DAY.match(text) or _DAY_MONTH.match(text)
+    if match:
+        return _calendar_day(match["year"], _MONTHS[match["month"]], int(match["day"]), today)
+    match = _ON_WEEKDAY.match(text)
+    if match:
+        weekday = _WEEKDAYS[match["weekday"]]
+        monday = today - timedelta(days=today.weekday())
+        if match["which"] == "last":
+            return monday - timedelta(days=7 - weekday)
+        if match["which"] == "this":
+            return monday + timedelta(days=weekday)
+        return today - timedelta(days=(today.weekday() - weekday) % 7)
+    return None
+
+
+def _count(text: str) -> int:
+    return int(text) if text.isdigit() else _NUMBERS[text]
+
+
+def _period(text: str, today: date) -> Optional[DateRange]:
+    match = _PERIOD.match(text)
+    if match:
+        back = 0 if match["which"] == "this" else 1
+        if match["unit"] == "week":
+            start = today - timedelta(days=today.weekday() + 7 * back)
+            return start, start + timedelta(days=6)
+        if match["unit"] == "month":
+            start = _month_start(today, back)
+            return _month_range(start.year, start.month)
+        return date(today.year - back, 1, 1), date(today.year - back, 12, 31)
+    match = _MONTH_NAME.match(text)
+    if match:
+        month = _MONTHS[match["month"]]
+        year = int(match["year"]) if match["year"] else today.year - (month > today.month)
+        return _month_range(year, month)
+    match = _LAST_N.match(text)
+    if match:
+        count, unit = _count(match["count"] or "1"), match["unit"].rstrip("s")
+        if count < 1:
+            return None
+        if unit == "month":
+            start = _month_start(today, count)
+            start = start.replace(day=min(today.day, calendar.monthrange(start.year, start.month)[1]))
+            return start + timedelta(days=1), today
+        return today - timedelta(days=count * (7 if unit == "week" else 1) - 1), today
+    match = _AGO.match(text)
+    if match:
+        days = _count(match["count"]) * (7 if match["unit"].startswith("week") else 1)
+        day = today - timedelta(days=days)
+        return day, day
+    return None
+
+
+def _window(text: str, today: date) -> Optional[DateRange]:
+    """A single day or a whole period."""
+    text = _LEADING.sub("", text)
+    day = _day(text, today)
+    if day:
+        return day, day
+    return _period(text, today)
+
+
+@lru_cache(maxsize=1024)
+def _parse(text: str, today: date) -> Optional[DateRange]:
+    match = _BETWEEN.match(text)
+    if match:
+        start, end = _window(match["start"], today), _window(match["end"], today)
+        if not start or not end:
+            return None
+        end_day = end[1]
+        if end_day < start[0]:
+            # "Nov 1 to Nov 10" read on Nov 5: the end is the coming one, not last year's
+            end_day = _calendar_day(str(end_day.year + 1), end_day.month, end_day.day, today) or end_day
+        return (start[0], end_day) if end_day >= start[0] else None
+    match = _SINCE.match(text)
+    if match:
+        start = _window(match["start"], today)
+        return (start[0], max(today, start[0])) if start else None
+    match = _BEFORE.match(text)
+    if match:
+        end = _window(match["end"], today)
+        return (date.min, end[0] - timedelta(days=1)) if end and end[0] > date.min else None
+    return _window(text, today)
+
+
+def parse_date_range(text: str, today: Optional[date] = None) -> Optional[DateRange]:
+    """The inclusive (start, end) dates a natural-language phrase names, or None.
+
+    Reads single days ("today", "yesterday", "Nov 5th", "5 November 2024",
+    "2024-11-05", "Monday", "last Friday"), periods ("this week",
+    "last month", "November", "past 7 days", "3 days ago") and spans
+    ("between Nov 1 and Nov 10", "from Monday to Wednesday",
+    "since Monday", "before Nov 1").
+    """
+    return _parse(_normalize(text), today or date.today())
+
+
+def parse_stats() -> dict:
+    info = _parse.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "entries": info.currsize, "max_entries": info.maxsize}
@@ -0,0 +1,222 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+from agent.dates import parse_date_range
+from agent.tools import ASYNC_TOOLS
+from core.metrics import registry
+
+# Common chat queries answered by calling one tool directly, without an LLM round trip.
+# Every pattern must match the whole normalized message, so a request with
+# anything extra (a class, a subject, a second question) falls through to the agent.
+
+_LEAD = (
+    r"(?:(?:hi|hey|hello|ok|okay|please|pls)\s+)*"
+    r"(?:(?:can|could|would|will) you\s+)?(?:please\s+)?"
+    r"(?:(?:show|list|get|give|display|fetch|find|tell|pull up|bring up|check)(?: me| us)?\s+"
+    r"|what(?:'s| is| are| was| were)?\s+(?:the\s+)?"
+    r"|(?:is|are) there (?:any\s+)?|any\s+|i (?:want|need|would like) to see\s+)?"
+    r"(?:(?:all|all of|all the|the|any|our|my)\s+)?"
+)
+_TAIL = r"(?:\s+(?:please|pls|thanks|thank you))?"
+
+
+_TYPES = {"homework": "homework", "homeworks": "homework", "note": "notes", "notes": "notes",
+          "announcement": "announcement", "announcements": "announcement"}
+
+
+@dataclass
+class Intent:
+    name: str
+    tool: str
+    patterns: List[Pattern]
+    # Tool parameter names, and how to read their values from a match;
+    # arguments returning None rejects the match
+    parameters: Tuple[str, ...] = ()
+    arguments: Callable[[re.Match], Optional[tuple]] = lambda match: ()
+
+
+def _date_argument(match: re.Match) -> Optional[tuple]:
+    # Only phrases the date parser reads; "today" has its own intent
+    phrase = match.group("date")
+    return (phrase,) if phrase != "today" and parse_date_range(phrase) else None
+
+
+def _compile(*cores: str) -> List[Pattern]:
+    return [re.compile(rf"^{_LEAD}(?:{core}){_TAIL}$") for core in cores]
+
+
+INTENTS = [
+    Intent("todays_homework", "get_todays_homework", _compile(
+        r"today'?s homework",
+        r"homework (?:(?:is |was )?(?:given |set |assigned |due )?(?:for |from )?today|for today)",
+        r"homework (?:is there |do (?:we|they|i) have )(?:for )?today",
+    )),
+    Intent("homework_by_date", "get_homework_by_natural_date", _compile(
+        r"homework (?:(?:was |that was )?(?:given|set|assigned|due|uploaded) )?(?:(?:on|for) )?(?P<date>.+?)",
+        r"(?P<date>.+?)(?:'s)? homework",
+    ), ("date_input",), _date_argument),
+    Intent("announcements_this_week", "get_announcements_by_week", _compile(
+        r"announcements? (?:(?:were |was |have been )?(?:made|posted|sent|published|shared) )?"
+        r"(?:for |from |during |in )?this week",
+        r"this week'?s announcements?",
+        r"(?:latest|recent) announcements? this week",
+    )),
+    Intent("content_by_type", "search_content_by_type", _compile(
+        r"(?P<type>homeworks?|notes?|announcements?)(?: (?:content|items|posts|entries))?",
+    ), ("content_type",), lambda match: (_TYPES[match.group("type")],)),
+    Intent("content_summary", "get_content_summary", _compile(
+        r"(?:a |the )?(?:content )?(?:summary|overview|stats|statistics)(?: of (?:all )?(?:the )?content)?",
+        r"(?:a |the )?summary of (?:everything|all content|all the content)",
+        r"how many (?:items|posts|contents?|pieces of content|uploads)"
+        r"(?: (?:are there|do (?:we|i) have|have (?:we|i) (?:uploaded|posted)))?",
+    )),
+]
+
+_PUNCTUATION = re.compile(r"[?!.,;:]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(message: str) -> str:
+    """Lowercase, straighten quotes and drop punctuation and extra spaces."""
+    message = message.lower().replace("’", "'").replace("‘", "'")
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", message)).strip()
+
+
+def match_intent(message: str, intents: List[Intent] = INTENTS) -> Optional[Tuple[Intent, tuple]]:
+    """The single intent the message matches and its tool arguments, or None if none or several match."""
+    text = normalize(message)
+    found = []
+    for intent in intents:
+        for pattern in intent.patterns:
+            match = pattern.match(text)
+            args = intent.arguments(match) if match else None
+            if args is not None:
+                found.append((intent, args))
+                break
+    return found[0] if len(found) == 1 else None
+
+
+# ----------------- Replies -----------------
+
+MAX_LISTED = 10
+
+_LIST_HEADINGS = {
+    "todays_homework": ("Here is today's homework", "There is no homework for today."),
+    "homework_by_date": ("Here is the homework {0}", "No homework was found {0}."),
+    "announcements_this_week": ("Here are this week's announcements", "No announcements have been made this week."),
+    "content_by_type": ("Here is all the {0} content", "There is no {0} content yet."),
+}
+
+
+_PREPOSITION = re.compile(r"^(?:on|for|from|in|during|since|after|before|until|between) ")
+
+
+def _when(phrase: str) -> str:
+    return phrase if _PREPOSITION.match(phrase) else f"for {phrase}"
+
+
+def _items(count: int) -> str:
+    return f"{count} item{'s' if count != 1 else ''}"
+
+
+def _item_line(item: dict) -> str:
+    where = ", ".join(part for part in (item.get("class_name"), item.get("subject")) if part)
+    line = f"- {item.get('title')}"
+    if where:
+        line += f" ({where})"
+    return line + f" — {item.get('date_uploaded')}"
+
+
+def render_reply(intent: Intent, args: tuple, result) -> str:
+    """Templated reply for an intent's tool result."""
+    if intent.name == "content_summary":
+        announcements = result["announcement_count"]
+        return (f"You have {_items(result['total_content'])} in total: {result['homework_count']} homework, "
+                f"{announcements} announcement{'s' if announcements != 1 else ''} "
+                f"and {result['notes_count']} notes.")
+    heading, empty = _LIST_HEADINGS[intent.name]
+    if intent.name == "homework_by_date":
+        args = (_when(args[0]),)
+    # A shaped page of summaries: the first items and the total
+    items, total = result["items"][:MAX_LISTED], result["total"]
+    if not total:
+        return empty.format(*args)
+    lines = [f"{heading.format(*args)} ({_items(total)}):"]
+    lines += [_item_line(item) for item in items]
+    if total > len(items):
+        lines.append(f"...and {total - len(items)} more.")
+    return "\n".join(lines)
+
+
+# ----------------- Pre-router -----------------
+
+@dataclass
+class IntentReply:
+    """A fast-path answer, shaped for the chat endpoints like one agent event."""
+    intent: str
+    tool: str
+    args: dict
+    text: str
+    result: object = field(repr=False, default=None)
+
+
+chat_intents_total = registry.counter(
+    "digischool_chat_intents_total",
+    'Chat messages by fast-path intent; "llm" is a message passed to the agent.',
+    ("intent",),
+)
+
+
+class IntentStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._fallthrough = 0
+
+    def record(self, intent: Optional[str]):
+        chat_intents_total.inc(intent or "llm")
+        with self._lock:
+            if intent is None:
+                self._fallthrough += 1
+            else:
+                self._hits[intent] = self._hits.get(intent, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = sum(self._hits.values())
+            total = hits + self._fallthrough
+            return {
+                "hits": hits,
+                "fallthrough": self._fallthrough,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "intents": dict(sorted(self._hits.items())),
+            }
+
+
+intent_stats = IntentStats()
+
+
+class IntentRouter:
+    """Sits in front of the LLM agent: recognised intents call their tool directly.
+
+    Has the agent's run_live interface. A message that matches exactly one
+    intent yields a single IntentReply; anything else is passed to the agent.
+    """
+
+    def __init__(self, agent, tools: Optional[Dict[str, Callable]] = None, intents: List[Intent] = INTENTS):
+        self.agent = agent
+        self.tools = tools if tools is not None else {tool.__name__: tool for tool in ASYNC_TOOLS}
+        self.intents = intents
+
+    async def run_live(self, message):
+        matched = match_intent(message, self.intents) if isinstance(message, str) else None
+        intent_stats.record(matched[0].name if matched else None)
+        if not matched:
+            async for chunk in self.agent.run_live(message):
+                yield chunk
+            return
+        intent, args = matched
+        result = await self.tools[intent.tool](*args)
+        yield IntentReply(intent.name, intent.tool, dict(zip(intent.parameters, args)),
+                          render_reply(intent, args, result), result)
@@ -0,0 +1,134 @@
+import base64
+import functools
+import inspect
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+from core.metrics import registry
+
+# What the model sees of a list tool's rows: a capped page of one-line
+# summaries and the total, plus a handle for the next page. Descriptions and
+# attachment URLs stay out of the context until get_content_details asks.
+MAX_TOOL_ROWS = int(os.environ.get("MAX_TOOL_ROWS", 20))
+MAX_DETAIL_ROWS = int(os.environ.get("MAX_DETAIL_ROWS", 10))
+SUMMARY_FIELDS = ("content_id", "content_type", "title", "class_name", "subject", "date_uploaded")
+
+# Rough size of a token in JSON text; good enough to compare outputs
+BYTES_PER_TOKEN = 4
+
+tool_output_bytes = registry.counter(
+    "digischool_tool_output_bytes_total",
+    'Bytes of JSON returned by list tools, "full" as the rows were and "shaped" as the model got them.',
+    ("tool", "output"),
+)
+
+# Tool name -> the unshaped function, so a handle can fetch the next page
+_SHAPED: Dict[str, Callable] = {}
+
+
+def summarize(row: dict) -> dict:
+    summary = {field: row.get(field) for field in SUMMARY_FIELDS}
+    if row.get("attachment_urls"):
+        summary["attachments"] = len(row["attachment_urls"])
+    return summary
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, default=str, separators=(",", ":")).encode())
+
+
+def estimate_tokens(size: int) -> int:
+    return -(-size // BYTES_PER_TOKEN)
+
+
+class ToolOutputStats:
+    """Full and shaped output sizes per tool, to show what shaping saves."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools = {}
+
+    def record(self, tool: str, full: int, shaped: int):
+        tool_output_bytes.inc(tool, "full", amount=full)
+        tool_output_bytes.inc(tool, "shaped", amount=shaped)
+        with self._lock:
+            entry = self._tools.setdefault(tool, {"calls": 0, "full_bytes": 0, "shaped_bytes": 0})
+            entry["calls"] += 1
+            entry["full_bytes"] += full
+            entry["shaped_bytes"] += shaped
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {tool: dict(entry) for tool, entry in sorted(self._tools.items())}
+        for entry in tools.values():
+            entry["full_tokens"] = estimate_tokens(entry["full_bytes"])
+            entry["shaped_tokens"] = estimate_tokens(entry["shaped_bytes"])
+            entry["saved_pct"] = round(100 * (1 - entry["shaped_bytes"] / entry["full_bytes"]), 1) \
+                if entry["full_bytes"] else 0.0
+        return {"max_rows": MAX_TOOL_ROWS, "bytes_per_token": BYTES_PER_TOKEN, "tools": tools}
+
+
+tool_output_stats = ToolOutputStats()
+
+
+def _encode_handle(tool: str, args: dict, offset: int) -> str:
+    raw = json.dumps([tool, args, offset], default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_handle(handle: str):
+    try:
+        tool, args, offset = json.loads(base64.urlsafe_b64decode(handle + "=" * (-len(handle) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid continuation handle")
+    if tool not in _SHAPED or not isinstance(args, dict) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid continuation handle")
+    return tool, args, offset
+
+
+def shape_rows(tool: str, rows: List[dict], args: Optional[dict] = None, offset: int = 0,
+               limit: int = MAX_TOOL_ROWS) -> dict:
+    """One page of summaries of rows: total, the items from offset, and a handle if there are more."""
+    page = rows[offset:offset + limit]
+    shaped = {"total": len(rows), "offset": offset, "items": [summarize(row) for row in page]}
+    if offset + limit < len(rows):
+        shaped["next"] = _encode_handle(tool, args or {}, offset + limit)
+    return shaped
+
+
+def _shape(tool: str, rows: List[dict], args: dict, offset: int) -> dict:
+    shaped = shape_rows(tool, rows, args, offset)
+    # The unshaped tool returned everything in its first call, so later pages only add to the shaped side
+    tool_output_stats.record(tool, _json_size(rows) if offset == 0 else 0, _json_size(shaped))
+    return shaped
+
+
+def shaped_tool(func):
+    """Wrap a tool returning content rows so the model gets a summary page instead.
+
+    The wrapper keeps the tool's name, docstring and parameters; only the
+    result changes, to {"total", "offset", "items", "next"}. The function
+    itself is left as it is for code that wants the rows.
+    """
+    signature = inspect.signature(func)
+    _SHAPED[func.__name__] = func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return _shape(func.__name__, func(*args, **kwargs), dict(bound.arguments), 0)
+    wrapper.__signature__ = signature.replace(return_annotation=dict)
+    wrapper.__annotations__ = {**func.__annotations__, "return": dict}
+    return wrapper
+
+
+def get_more_results(handle: str) -> dict:
+    """Get the next page of a list result, using the 'next' handle that result returned"""
+    try:
+        tool, args, offset = _decode_handle(handle)
+        inspect.signature(_SHAPED[tool]).bind(**args)
+    except (ValueError, TypeError):
+        return {'success': False, 'message': 'Invalid continuation handle'}
+    return _shape(tool, _SHAPED[tool](**args), args, offset)
@@ -1,46 +1,29 @@
-import json
-import ast
-from datetime import date, datetime, timedelta
+import functools
+import time
+from datetime import date
 from services import school_service
+from core.sqlite_db import async_db
 from models.data_model import SchoolContent
-from typing import List, Optional
-from agent.utils import parse_natural_date, find_content_by_keyword
+from typing import List
+from agent.dates import parse_date_range
+from agent.cache import cached_tool, ALL_CONTENT
+from agent.shaping import shaped_tool, get_more_results, MAX_DETAIL_ROWS
+from core.metrics import tool_call_seconds
 
+@cached_tool({ALL_CONTENT})
 def get_contents() -> dict:
     """Get all school contents"""
     return school_service.get_all_contents()
 
+@cached_tool({"homework"})
 def get_homework_by_date(target_date: str) -> List[dict]:
     """Get homework for a specific date (YYYY-MM-DD format)"""
-    all_contents = school_service.get_all_contents()
-    homework_list = []
-    
-    for content in all_contents:
-        if content.get('content_type', '').lower() == 'homework':
-            content_date = content.get('date_uploaded')
-            if content_date == target_date:
-                homework_list.append(content)
-    
-    return homework_list
+    return school_service.find_contents(content_type='homework', date_from=target_date, date_to=target_date)
 
+@cached_tool({"announcement"})
 def get_announcements_by_week() -> List[dict]:
     """Get announcements from this week"""
-    all_contents = school_service.get_all_contents()
-    announcements = []
-    
-    # Calculate start of current week (Monday)
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    
-    for content in all_contents:
-        if content.get('content_type', '').lower() == 'announcement':
-            content_date_str = content.get('date_uploaded')
-            if content_date_str:
-                content_date = date.fromisoformat(content_date_str)
-                if content_date >= start_of_week:
-                    announcements.append(content)
-    
-    return announcements
+    return get_content_by_natural_date("this week", "announcement")
 
 def update_homework_title(homework_id: int, new_title: str) -> dict:
     """Update the title of a homework assignment"""
@@ -80,51 +63,107 @@ def upload_notes(teacher_id: str, class_name: str, subject: str, title: str, des
     else:
         return {'success': False, 'message': 'Failed to upload notes'}
 
+@cached_tool(lambda content_type: {content_type})
 def search_content_by_type(content_type: str) -> List[dict]:
     """Search content by type (homework, announcement, notes)"""
-    all_contents = school_service.get_all_contents()
-    filtered_contents = []
-    
-    for content in all_contents:
-        if content.get('content_type', '').lower() == content_type.lower():
-            filtered_contents.append(content)
-    
-    return filtered_contents
+    return school_service.find_contents(content_type=content_type)
 
+@cached_tool({"homework"})
 def get_todays_homework() -> List[dict]:
     """Get today's homework"""
     today_str = date.today().isoformat()
     return get_homework_by_date(today_str)
 
+@cached_tool(lambda date_input, content_type=None: {content_type} if content_type else {ALL_CONTENT})
+def get_content_by_natural_date(date_input: str, content_type: str = None) -> List[dict]:
+    """Get content uploaded on a day or in a period given in natural language, optionally of one type
+    (e.g., 'yesterday', 'November 5th', 'last week', 'this month', 'since Monday', 'between Nov 1 and Nov 10').
+    Returns an empty list if the date can't be understood."""
+    window = parse_date_range(date_input)
+    if window is None:
+        return []
+    return school_service.find_contents(content_type=content_type, date_from=window[0], date_to=window[1])
+
+@cached_tool({"homework"})
 def get_homework_by_natural_date(date_input: str) -> List[dict]:
-    """Get homework by natural language date (e.g., 'November 5th', 'today')"""
-    parsed_date = parse_natural_date(date_input)
-    return get_homework_by_date(parsed_date)
+    """Get homework by natural language date or period
+    (e.g., 'November 5th', 'today', 'yesterday', 'last week', 'since Monday', 'between Nov 1 and Nov 10')"""
+    return get_content_by_natural_date(date_input, 'homework')
 
+@cached_tool({"announcement"})
 def find_announcement_by_keyword(keyword: str) -> List[dict]:
     """Find announcements containing a specific keyword"""
-    all_contents = school_service.get_all_contents()
-    return find_content_by_keyword(all_contents, keyword, 'announcement')
+    # Prefix terms, so "home" still finds "homework" as the old substring scan did
+    return school_service.search_contents(keyword, content_type='announcement', prefix=True)
 
 def update_todays_homework_by_subject(subject: str, new_title: str) -> dict:
     """Update today's homework title for a specific subject"""
-    todays_homework = get_todays_homework()
+    today_str = date.today().isoformat()
+    todays_homework = school_service.find_contents(
+        content_type='homework', date_from=today_str, date_to=today_str, subject=subject, limit=1
+    )
     
-    for homework in todays_homework:
-        if homework.get('subject', '').lower() == subject.lower():
-            return update_homework_title(homework['content_id'], new_title)
+    if todays_homework:
+        return update_homework_title(todays_homework[0]['content_id'], new_title)
     
     return {'success': False, 'message': f'No homework found for {subject} today'}
 
+@cached_tool({ALL_CONTENT})
+def get_content_details(content_ids: List[int]) -> List[dict]:
+    """Get the full content items, with descriptions and attachment URLs, for up to 10 content IDs
+    from a list result"""
+    return school_service.get_contents_by_ids(content_ids[:MAX_DETAIL_ROWS])
+
+@cached_tool({ALL_CONTENT})
 def get_content_summary() -> dict:
     """Get a summary of all content types"""
-    all_contents = school_service.get_all_contents()
+    counts = school_service.count_contents_by_type()
     
     summary = {
-        'total_content': len(all_contents),
-        'homework_count': len([c for c in all_contents if c.get('content_type') == 'homework']),
-        'announcement_count': len([c for c in all_contents if c.get('content_type') == 'announcement']),
-        'notes_count': len([c for c in all_contents if c.get('content_type') == 'notes'])
+        'total_content': sum(counts.values()),
+        'homework_count': counts.get('homework', 0),
+        'announcement_count': counts.get('announcement', 0),
+        'notes_count': counts.get('notes', 0)
     }
     
-    return summary
\ No newline at end of file
+    return summary
+
+def async_tool(func):
+    """Async variant of a tool that runs it on the bounded DB executor.
+
+    Name, docstring and signature are kept, so the model sees the same tool.
+    Each call's latency, including any wait for the executor, is recorded
+    in the tool duration histogram.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await async_db.run(func, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            tool_call_seconds.observe(time.perf_counter() - start, func.__name__, outcome)
+    return wrapper
+
+# List tools reach the model as capped summary pages; the functions above keep returning rows
+TOOLS = [
+    shaped_tool(get_contents),
+    shaped_tool(get_homework_by_date),
+    shaped_tool(get_homework_by_natural_date),
+    shaped_tool(get_content_by_natural_date),
+    shaped_tool(get_announcements_by_week),
+    update_homework_title,
+    update_todays_homework_by_subject,
+    remove_announcement,
+    shaped_tool(find_announcement_by_keyword),
+    upload_notes,
+    shaped_tool(search_content_by_type),
+    shaped_tool(get_todays_homework),
+    get_content_summary,
+    get_content_details,
+    get_more_results,
+]
+
+ASYNC_TOOLS = [async_tool(tool) for tool in TOOLS]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Time the full content list read path: the old per-row SchoolContent +
+jsonable_encoder route, the trusted dict decoding and SQLite-built JSON,
+and check that all three produce the same response body.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from fastapi.encoders import jsonable_encoder
+from core.sqlite_db import SQLiteDB
+
+SEED_ROWS = 20000
+ROUNDS = 5
+
+
+def seed(db: SQLiteDB):
+    types = ["homework", "announcement", "notes"]
+    rows = [
+        ("t101", f"Class {i % 12 + 1}", "Maths", f"2024-11-{i % 28 + 1:02d}", types[i % 3],
+         types[i % 3], f"Item {i}", f"Description of item {i}",
+         json.dumps([f"https://example.com/{i}.pdf"]) if i % 2 else None)
+        for i in range(SEED_ROWS)
+    ]
+    with db.connect() as conn:
+        conn.executemany(db.INSERT_CONTENT_SQL, rows)
+        conn.commit()
+
+
+def models_path(db: SQLiteDB) -> bytes:
+    # What GET /schools/ did before: models, jsonable_encoder, then the response encoder
+    return json.dumps(jsonable_encoder(db.get_all_contents())).encode()
+
+
+def dicts_path(db: SQLiteDB) -> bytes:
+    return json.dumps(db.get_all_contents(raw=True)).encode()
+
+
+def sqlite_json_path(db: SQLiteDB) -> bytes:
+    return db.get_all_contents_json()
+
+
+def best_of(func, db: SQLiteDB) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(db)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDB(os.path.join(tmp, "bench.db"))
+        seed(db)
+        paths = [("models + jsonable_encoder", models_path),
+                 ("trusted dicts", dicts_path),
+                 ("SQLite json_group_array", sqlite_json_path)]
+
+        bodies = {name: json.loads(func(db)) for name, func in paths}
+        baseline = bodies[paths[0][0]]
+        mismatched = [name for name, body in bodies.items() if body != baseline]
+
+        print(f"Full list of {SEED_ROWS} rows, best of {ROUNDS}")
+        before = None
+        for name, func in paths:
+            seconds = best_of(func, db)
+            before = before or seconds
+            print(f"  {name:<28} {seconds * 1000:8.1f} ms  {SEED_ROWS / seconds:10.0f} rows/s  "
+                  f"{before / seconds:5.1f}x")
+        db.close()
+
+    if mismatched:
+        print(f"\n❌ Response body differs: {', '.join(mismatched)}")
+        return 1
+    print("\n✅ All read paths return the same body")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import itertools
+from datetime import date, timedelta
+from typing import Callable, List, NamedTuple, Optional
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core.sqlite_db import db
+from models.data_model import SchoolContent, TeacherProfile
+from services import school_service
+from agent import tools
+from agent.cache import tool_cache
+from routers import school
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], object]
+    # Runs before every timed call, outside the timing (e.g. to clear a cache or create a row to delete)
+    setup: Optional[Callable[[], object]] = None
+
+
+def _new_content(content_type: str = "benchmark") -> SchoolContent:
+    # Its own content type by default, so rows written by the benchmark don't grow the read cases' results
+    return SchoolContent(teacher_id="bench000001", class_name="Class 5", subject="Maths",
+                         content_type=content_type, title="Benchmark row", description="Created by the benchmark")
+
+
+def _sample_id() -> int:
+    row = db.fetch_one("SELECT content_id FROM school_content ORDER BY content_id LIMIT 1 "
+                       "OFFSET (SELECT COUNT(*) / 2 FROM school_content)")
+    return row["content_id"]
+
+
+def db_cases() -> List[Case]:
+    """SQLiteDB CRUD and the analytics queries."""
+    content_id = _sample_id()
+    titles = (f"Renamed {i}" for i in itertools.count())
+    scratch = []
+
+    def create_scratch():
+        scratch.append(db.insert_content_logged(_new_content())[0])
+
+    month_ago = date.today() - timedelta(days=30)
+    return [
+        Case("db.get_content_by_id", lambda: db.get_content_by_id(content_id)),
+        Case("db.find_contents(type, 30 days)",
+             lambda: db.find_contents(content_type="homework", date_from=month_ago, raw=True)),
+        Case("db.page_contents(50)", lambda: db.page_contents(50)),
+        Case("db.search_contents", lambda: db.search_contents("revision quiz", limit=20, raw=True)),
+        Case("db.get_all_contents", lambda: db.get_all_contents(raw=True)),
+        Case("db.get_department_analytics", db.get_department_analytics),
+        # The logged writes, with their rollup and change log rows: what a content write costs
+        Case("db.insert_content_logged", lambda: db.insert_content_logged(_new_content())),
+        Case("db.update_content_logged", lambda: db.update_content_logged(content_id, {"title": next(titles)})),
+        Case("db.delete_content_logged", lambda: db.delete_content_logged(scratch.pop()), setup=create_scratch),
+    ]
+
+
+def service_cases() -> List[Case]:
+    scratch = []
+
+    def create_scratch():
+        scratch.append(school_service.create_content(_new_content()).content_id)
+
+    teacher_ids = (f"benchnew{i:07d}" for i in itertools.count())
+    return [
+        Case("service.get_contents_page(50)", lambda: school_service.get_contents_page(50)),
+        Case("service.get_rollups", school_service.get_rollups),
+        Case("service.get_department_analytics", school_service.get_department_analytics),
+        Case("service.create_content", lambda: school_service.create_content(_new_content())),
+        Case("service.delete_content", lambda: school_service.delete_content(scratch.pop()),
+             setup=create_scratch),
+        Case("service.create_teacher", lambda: school_service.create_teacher(TeacherProfile(
+            teacher_id=next(teacher_ids), name="New Teacher", subject_specialization="Maths", department="Science"))),
+    ]
+
+
+def tool_cases() -> List[Case]:
+    """Every agent tool, with the tool-result cache cleared before each call."""
+    homework_id = _sample_id()
+    titles = (f"Tool rename {i}" for i in itertools.count())
+    scratch = []
+
+    def create_announcement():
+        tool_cache.clear()
+        scratch.append(school_service.create_content(_new_content("announcement")).content_id)
+
+    today = date.today().isoformat()
+    # A continuation handle from the shaped tool, as the model would pass it back
+    shaped = {tool.__name__: tool for tool in tools.TOOLS}
+    more = {"handle": shaped["search_content_by_type"]("notes").get("next", "")}
+    # Read tools first, so rows added by the write tools don't change their results
+    cases = {
+        "get_contents": lambda: tools.get_contents(),
+        "get_homework_by_date": lambda: tools.get_homework_by_date(today),
+        "get_homework_by_natural_date": lambda: tools.get_homework_by_natural_date("November 5th"),
+        "get_content_by_natural_date": lambda: tools.get_content_by_natural_date("last week"),
+        "get_announcements_by_week": lambda: tools.get_announcements_by_week(),
+        "find_announcement_by_keyword": lambda: tools.find_announcement_by_keyword("holiday"),
+        "search_content_by_type": lambda: tools.search_content_by_type("notes"),
+        "get_todays_homework": lambda: tools.get_todays_homework(),
+        "get_content_summary": lambda: tools.get_content_summary(),
+        "get_content_details": lambda: tools.get_content_details([homework_id]),
+        "get_more_results": lambda: tools.get_more_results(more["handle"]),
+        "update_homework_title": lambda: tools.update_homework_title(homework_id, next(titles)),
+        "update_todays_homework_by_subject": lambda: tools.update_todays_homework_by_subject("Maths", next(titles)),
+        "upload_notes": lambda: tools.upload_notes("bench000001", "Class 5", "Maths", "Benchmark notes"),
+        "remove_announcement": lambda: tools.remove_announcement(scratch.pop()),
+    }
+    missing = {tool.__name__ for tool in tools.TOOLS} - set(cases)
+    if missing:
+        raise RuntimeError(f"No benchmark for tools: {', '.join(sorted(missing))}")
+    return [
+        Case(f"tool.{name}", func,
+             setup=create_announcement if name == "remove_announcement" else tool_cache.clear)
+        for name, func in cases.items()
+    ]
+
+
+def http_cases() -> List[Case]:
+    """School routes through an in-process client; the ETag response cache is cleared unless noted."""
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    client = TestClient(app)
+    content_id = _sample_id()
+    current = {}
+
+    def fetch_etag():
+        current["etag"] = client.get("/schools/?limit=50").headers["etag"]
+
+    def not_modified():
+        response = client.get("/schools/?limit=50", headers={"If-None-Match": current["etag"]})
+        if response.status_code != 304:
+            raise RuntimeError(f"Expected 304, got {response.status_code}")
+
+    def get(path, **kwargs):
+        def call():
+            response = client.get(path, **kwargs)
+            if response.status_code >= 400:
+                raise RuntimeError(f"GET {path} returned {response.status_code}")
+            return response
+        return call
+
+    def post(path, payload):
+        return lambda: client.post(path, json=payload).raise_for_status()
+
+    clear = school.response_cache.clear
+    return [
+        Case("http.GET /schools/", get("/schools/"), setup=clear),
+        Case("http.GET /schools/?limit=50", get("/schools/?limit=50"), setup=clear),
+        Case("http.GET /schools/?limit=50 (cached)", get("/schools/?limit=50")),
+        Case("http.GET /schools/?limit=50 (304)",
+             not_modified, setup=fetch_etag),
+        Case("http.GET /schools/{id}", get(f"/schools/{content_id}")),
+        Case("http.GET /schools/search", get("/schools/search?q=project")),
+        Case("http.GET /schools/teachers", get("/schools/teachers"), setup=clear),
+        Case("http.GET /schools/analytics/departments", get("/schools/analytics/departments"), setup=clear),
+        Case("http.GET /schools/analytics/bundle", get("/schools/analytics/bundle"), setup=clear),
+        Case("http.POST /schools/", post("/schools/", _new_content().model_dump(mode="json"))),
+    ]
+
+
+LAYERS = {
+    "db": db_cases,
+    "service": service_cases,
+    "tools": tool_cases,
+    "http": http_cases,
+}
@@ -0,0 +1,74 @@
+import json
+import random
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+DEPARTMENTS = ["Science", "Mathematics", "Languages", "Humanities", "Arts", "Commerce", "Sports", "Computing"]
+SUBJECTS = ["Maths", "Physics", "Chemistry", "Biology", "English", "History", "Geography", "Art", "Computer Science"]
+CONTENT_TYPES = ["homework", "announcement", "notes"]
+WORDS = ["algebra", "revision", "worksheet", "chapter", "quiz", "project", "lab", "reading",
+         "essay", "exam", "practice", "field", "trip", "holiday", "schedule", "review"]
+
+# One synthetic teacher per this many content rows (at least MIN_TEACHERS)
+ROWS_PER_TEACHER = 50
+MIN_TEACHERS = 20
+# Content from teachers outside teacher_profile, as in the real data
+ORPHAN_RATE = 0.05
+INSERT_BATCH = 50000
+
+
+def parse_size(label: str) -> int:
+    """'1k' -> 1000, '100k' -> 100000, '1m' -> 1000000, '250' -> 250."""
+    label = label.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(label[-1:], 1)
+    return int(float(label.rstrip("km")) * scale)
+
+
+def teacher_rows(count: int, rng: random.Random) -> List[Tuple[str, str, str, str]]:
+    return [
+        (f"bench{i:06d}", f"Teacher {i}", rng.choice(SUBJECTS), DEPARTMENTS[i % len(DEPARTMENTS)])
+        for i in range(count)
+    ]
+
+
+def content_rows(count: int, teacher_ids: List[str], rng: random.Random) -> Iterator[tuple]:
+    """Rows for SQLiteDB.INSERT_CONTENT_SQL, dated over the past year so "today" and "this week" match."""
+    today = date.today()
+    for i in range(count):
+        content_type = CONTENT_TYPES[i % len(CONTENT_TYPES)]
+        teacher_id = f"orphan{i % 7}" if rng.random() < ORPHAN_RATE else rng.choice(teacher_ids)
+        title = " ".join(rng.choice(WORDS) for _ in range(3)).capitalize()
+        attachments = [f"https://example.com/files/{i}.pdf"] if i % 4 == 0 else None
+        yield (
+            teacher_id,
+            f"Class {rng.randint(1, 12)}",
+            rng.choice(SUBJECTS),
+            (today - timedelta(days=rng.randrange(365))).isoformat(),
+            content_type,
+            content_type,
+            f"{title} {i}",
+            " ".join(rng.choice(WORDS) for _ in range(12)),
+            json.dumps(attachments) if attachments else None,
+        )
+
+
+def populate(db, rows: int, seed: int = 42):
+    """Fill db with rows synthetic content rows and a proportional teacher roster, then refresh rollups and stats."""
+    rng = random.Random(seed)
+    teachers = teacher_rows(max(MIN_TEACHERS, rows // ROWS_PER_TEACHER), rng)
+    with db.connect() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO teacher_profile (teacher_id, name, subject_specialization, department) "
+            "VALUES (?, ?, ?, ?)", teachers
+        )
+        conn.commit()
+        teacher_ids = [teacher[0] for teacher in teachers]
+        source = content_rows(rows, teacher_ids, rng)
+        while True:
+            batch = [row for _, row in zip(range(INSERT_BATCH), source)]
+            if not batch:
+                break
+            conn.executemany(db.INSERT_CONTENT_SQL, batch)
+            conn.commit()
+    db.rebuild_rollups()
+    db.analyze()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark the repository, service, agent tool and HTTP layers on synthetic data.
+
+    python -m benchmarks.run                          # 1k and 100k rows
+    python -m benchmarks.run --sizes 1k,100k,1m
+    python -m benchmarks.run --save-baseline          # store results as the new baseline
+    python -m benchmarks.run --layers db,http --threshold 0.5
+
+Run from backend/. Each dataset size is generated and measured in its own
+subprocess and working directory, so the app's module-level database points
+at the synthetic data and peak RSS is per size. Results are written as JSON
+and compared case by case against the baseline; a p50 slower than the
+baseline by more than --threshold (and by at least --min-delta-ms, to ignore
+jitter on sub-millisecond cases) counts as a regression (exit status 1).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "1k,100k"
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BACKEND_DIR, "benchmarks", "results.json")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def measure(case, min_runs: int, max_runs: int, budget: float) -> dict:
+    """Time one case: a warm-up call, then at least min_runs calls until budget seconds are spent.
+
+    Peak memory is taken from a separate traced call, as tracemalloc slows
+    down the calls it watches.
+    """
+    if case.setup:
+        case.setup()
+    case.func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_runs and (len(timings) < min_runs or time.perf_counter() - started < budget):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        timings.append(time.perf_counter() - start)
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    case.func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "ops_per_sec": round(len(timings) / sum(timings), 1),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run_worker(rows: int, layers: list, min_runs: int, max_runs: int, budget: float, output: str):
+    """Populate the database in the current directory and measure every case (runs in the subprocess)."""
+    import resource
+    from benchmarks import datasets
+    from benchmarks.cases import LAYERS
+    from core.sqlite_db import db
+
+    started = time.perf_counter()
+    datasets.populate(db, rows)
+    result = {"rows": rows, "populate_seconds": round(time.perf_counter() - started, 2), "cases": {}}
+    for layer in layers:
+        # Cases are built per layer, after earlier layers' writes, so their fixtures are current
+        for case in LAYERS[layer]():
+            result["cases"][case.name] = measure(case, min_runs, max_runs, budget)
+            print(f"  {case.name:<48} p50 {result['cases'][case.name]['p50_ms']:10.3f} ms", flush=True)
+    result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    db.close()
+    with open(output, "w") as f:
+        json.dump(result, f)
+
+
+def run_size(label: str, args) -> dict:
+    from benchmarks.datasets import parse_size
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, "result.json")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")]))}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", str(parse_size(label)),
+             "--layers", args.layers, "--min-runs", str(args.min_runs), "--max-runs", str(args.max_runs),
+             "--budget", str(args.budget), "--output", output],
+            cwd=workdir, env=env, check=True,
+        )
+        with open(output) as f:
+            return json.load(f)
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """Print p50 changes against the baseline and return the regressed (size, case) pairs."""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline.get('created', 'unknown')}:")
+    for size, measured in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {}).get("cases", {})
+        for name, stats in measured["cases"].items():
+            if name not in before or not before[name]["p50_ms"]:
+                continue
+            change = stats["p50_ms"] / before[name]["p50_ms"] - 1
+            regressed = change > threshold and stats["p50_ms"] - before[name]["p50_ms"] >= min_delta_ms
+            if regressed:
+                regressions.append((size, name))
+            print(f"  {'❌' if regressed else '  '} {size:>5} {name:<48} "
+                  f"{before[name]['p50_ms']:10.3f} -> {stats['p50_ms']:10.3f} ms  {change:+7.1%}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"dataset sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--layers", default="db,service,tools,http", help="layers to run")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=500)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds per case beyond min-runs")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="ignore p50 slowdowns smaller than this (default 0.1 ms)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.worker, args.layers.split(","), args.min_runs, args.max_runs, args.budget, args.output)
+        return 0
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.platform(),
+        "sizes": {},
+    }
+    for label in args.sizes.split(","):
+        print(f"\n{label} rows")
+        results["sizes"][label] = run_size(label, args)
+        print(f"  populated in {results['sizes'][label]['populate_seconds']} s, "
+              f"max RSS {results['sizes'][label]['max_rss_mb']} MiB")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Bulk load school content from NDJSON or CSV, or export it as NDJSON.
+
+    python bulk_import.py homework.ndjson
+    python bulk_import.py term1.csv --batch-size 2000
+    python bulk_import.py --export backup.ndjson
+"""
+
+import argparse
+import sys
+from services import school_service, bulk_io
+
+
+def import_file(path: str, fmt: str, batch_size: int) -> int:
+    with open(path, "rb") as f:
+        result = school_service.import_contents(bulk_io.parse_records(f, fmt), batch_size)
+    print(f"✅ Imported {result['inserted']} rows from {path}")
+    for error in result["errors"]:
+        print(f"❌ Line {error['row']}: {error['error']}")
+    return 1 if result["failed"] else 0
+
+
+def export_file(path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for line in school_service.export_contents():
+            f.write(line)
+            count += 1
+    print(f"✅ Exported {count} rows to {path}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="NDJSON or CSV file to import")
+    parser.add_argument("--format", choices=bulk_io.FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per transaction (default 500)")
+    parser.add_argument("--export", metavar="PATH", help="write all content to PATH as NDJSON instead")
+    args = parser.parse_args()
+
+    if args.export:
+        return export_file(args.export)
+    if not args.path:
+        parser.error("a file to import or --export is required")
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    return import_file(args.path, fmt, args.batch_size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
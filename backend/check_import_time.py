@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Profile `import main` in a clean interpreter and fail if it takes longer than
+the budget, opens the database or builds the chat agent as a side effect.
+
+    python check_import_time.py            # budget from IMPORT_BUDGET_SECONDS, default 3.0
+    python check_import_time.py 2.5
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", 3.0))
+SHOW_SLOWEST = 15
+# Modules that must only load on first use, never while importing the app
+LAZY_MODULES = ("agent.agent",)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PROBE = (
+    "import sys, main; "
+    f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+)
+
+
+def parse_importtime(stderr: str) -> list:
+    """(depth, cumulative seconds, module) for every line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((depth, int(cumulative_us) / 1e6, name.strip()))
+    return modules
+
+
+def main() -> int:
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_SECONDS
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        created = sorted(os.listdir(workdir))
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        print("❌ import main failed")
+        return 1
+
+    modules = parse_importtime(result.stderr)
+    # main's own line comes after everything it imported, which are the depth-1 lines just before it
+    total = next((cumulative for depth, cumulative, name in modules if depth == 0 and name == "main"), 0.0)
+    direct = [(cumulative, name) for depth, cumulative, name in modules if depth == 1]
+    print("Slowest direct imports of main:")
+    for cumulative, name in sorted(direct, reverse=True)[:SHOW_SLOWEST]:
+        print(f"  {cumulative * 1000:9.1f} ms  {name}")
+    print(f"\nimport main: {total * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+
+    failures = []
+    if total > budget:
+        failures.append("over the import-time budget")
+    if created:
+        failures.append(f"created files on import: {', '.join(created)}")
+    loaded = result.stdout.strip()
+    if loaded:
+        failures.append(f"imported lazily-loaded modules: {loaded}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        return 1
+    print("\n✅ Import is within budget and has no database or agent side effects")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Show the query plans of the hot school_content lookups before and after the
+schema migrations, and fail if any of them still scans the whole table.
+"""
+
+import os
+import sys
+import tempfile
+from core.sqlite_db import SQLiteDB
+
+SEED_ROWS = 2000
+
+# (label, query, params) for the lookups the migrations are meant to serve
+CHECKS = [
+    ("type + date range",
+     "SELECT * FROM school_content WHERE content_type_norm = ? AND date_uploaded >= ? AND date_uploaded <= ?",
+     ("homework", "2024-11-01", "2024-11-30")),
+    ("teacher join (department analytics)",
+     "SELECT tp.department, COUNT(sc.content_id) FROM teacher_profile tp "
+     "LEFT JOIN school_content sc ON tp.teacher_id = sc.teacher_id GROUP BY tp.department",
+     ()),
+    ("class + subject",
+     "SELECT * FROM school_content WHERE class_name = ? COLLATE NOCASE AND subject = ? COLLATE NOCASE",
+     ("Class 10", "maths")),
+]
+
+
+def seed(db: SQLiteDB):
+    types = ["homework", "announcement", "notes"]
+    rows = [
+        ("t101", f"Class {i % 12 + 1}", "Maths", f"2024-11-{i % 28 + 1:02d}",
+         types[i % 3], f"Item {i}")
+        for i in range(SEED_ROWS)
+    ]
+    with db.connect() as conn:
+        conn.executemany(
+            "INSERT INTO school_content (teacher_id, class_name, subject, date_uploaded, content_type, title) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+    db.analyze()
+
+
+def show_plans(db: SQLiteDB, label: str, checks) -> list:
+    print(f"\n{label}")
+    print("-" * len(label))
+    scans = []
+    for name, query, params in checks:
+        plan = db.explain(query, params)
+        print(f"{name}:")
+        for detail in plan:
+            print(f"    {detail}")
+        if any(detail.startswith("SCAN sc") or detail == "SCAN school_content" for detail in plan):
+            scans.append(name)
+    return scans
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDB(os.path.join(tmp, "plans.db"), migrate=False)
+        seed(db)
+        # content_type_norm only exists after migration 2; compare on the raw column before it
+        before = [(name, query.replace("content_type_norm", "content_type"), params)
+                  for name, query, params in CHECKS]
+        show_plans(db, "Before migrations (schema version 0)", before)
+
+        db.migrate()
+        db.analyze()
+        scans = show_plans(db, f"After migrations (schema version {db.schema_version()})", CHECKS)
+        db.close()
+
+    if scans:
+        print(f"\n❌ Full table scan remaining: {', '.join(scans)}")
+        return 1
+    print("\n✅ All lookups use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+# Content-addressed attachment blobs under ATTACHMENT_DIR, one file per SHA-256:
+# attachments/ab/cd/abcd...  Identical uploads share a file, whoever sent them.
+ATTACHMENT_DIR = os.environ.get("ATTACHMENT_DIR", "attachments")
+MAX_ATTACHMENT_BYTES = int(float(os.environ.get("MAX_ATTACHMENT_MB", 50)) * 1024 * 1024)
+
+# How content rows reference a stored blob in attachment_urls.
+REF_PREFIX = "sha256:"
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AttachmentTooLarge(ValueError):
+    pass
+
+
+def is_sha256(value: str) -> bool:
+    return bool(_SHA256.match(value))
+
+
+def attachment_ref(sha256: str) -> str:
+    return REF_PREFIX + sha256
+
+
+def ref_hash(url: str) -> Optional[str]:
+    """The blob hash of a "sha256:<hex>" reference, None for a plain URL.
+
+    Raises ValueError for a reference whose hash is malformed.
+    """
+    if url[:len(REF_PREFIX)].lower() != REF_PREFIX:
+        return None
+    sha256 = url[len(REF_PREFIX):].lower()
+    if not is_sha256(sha256):
+        raise ValueError(f"Invalid attachment reference: {url}")
+    return sha256
+
+
+class BlobWriter:
+    """Streams one upload into a temporary file in the store while hashing it.
+
+    Only the current chunk is ever in memory. commit() moves the file to its
+    content address, or drops it if that blob is already stored.
+    """
+
+    def __init__(self, store: "AttachmentStore"):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.tmp_dir(), prefix="upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.store.max_bytes:
+            raise AttachmentTooLarge(f"Attachment is larger than {self.store.max_bytes} bytes")
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self) -> Tuple[str, int, bool]:
+        """Store the blob. Returns (sha256, size, deduplicated)."""
+        self._file.close()
+        sha256 = self._hash.hexdigest()
+        path = self.store.path(sha256)
+        if os.path.exists(path):
+            os.unlink(self._tmp_path)
+            self.store._count(self.size, deduplicated=True)
+            return sha256, self.size, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic, and harmless if a concurrent upload of the same bytes got there first
+        os.replace(self._tmp_path, path)
+        self.store._count(self.size, deduplicated=False)
+        return sha256, self.size, False
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class AttachmentStore:
+    """Local directory of attachment blobs addressed by their SHA-256."""
+
+    def __init__(self, root: str = ATTACHMENT_DIR, max_bytes: int = MAX_ATTACHMENT_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stored = 0
+        self._deduplicated = 0
+        self._bytes_written = 0
+        self._bytes_saved = 0
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def tmp_dir(self) -> str:
+        # Created on first upload, on the same filesystem as the blobs so the final rename is atomic
+        path = os.path.join(self.root, "tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def exists(self, sha256: str) -> bool:
+        return is_sha256(sha256) and os.path.exists(self.path(sha256))
+
+    def open_writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def _count(self, size: int, deduplicated: bool):
+        with self._lock:
+            if deduplicated:
+                self._deduplicated += 1
+                self._bytes_saved += size
+            else:
+                self._stored += 1
+                self._bytes_written += size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "max_bytes": self.max_bytes,
+                "stored": self._stored,
+                "deduplicated": self._deduplicated,
+                "bytes_written": self._bytes_written,
+                "bytes_saved": self._bytes_saved,
+            }
+
+
+attachment_store = AttachmentStore()
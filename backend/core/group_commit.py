@@ -0,0 +1,161 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, ContextManager, List, Tuple
+
+# A unit of write work: takes an open connection, runs its statements (without committing)
+# and returns its result.
+WriteWork = Callable[[sqlite3.Connection], object]
+
+_STOP = object()
+
+
+class WriterClosed(RuntimeError):
+    """Raised for work submitted to, or still queued in, a closed writer; the work never ran."""
+
+
+class GroupCommitWriter:
+    """Single writer thread that commits queued writes together.
+
+    Callers submit a unit of work and wait on its future. The writer takes
+    the first queued unit, keeps collecting until flush_interval has passed
+    or max_batch units are waiting, then runs them all in one transaction.
+    With flush_interval 0 there is no extra wait: a batch is whatever queued
+    up while the previous one was committing.
+    Each unit gets its own savepoint, so a failing unit is rolled back and
+    reports its error without taking the rest of the batch with it. Futures
+    resolve only after the COMMIT, so a caller never sees an uncommitted write.
+    Once close() has been called, submit raises WriterClosed, and anything
+    the writer thread did not get to fails with it rather than hanging.
+    """
+
+    def __init__(self, connect: Callable[[], ContextManager[sqlite3.Connection]],
+                 flush_interval: float = 0.0, max_batch: int = 256):
+        self.connect = connect
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Orders submit against close, so nothing is queued behind the stop marker
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._writes = 0
+        self._failed = 0
+        self._max_batch_seen = 0
+        self._thread = threading.Thread(target=self._run, name="sqlite-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, work: WriteWork) -> Future:
+        """Queue a unit of work; the future resolves to its return value once committed."""
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise WriterClosed("Group-commit writer is closed")
+            self._queue.put((work, future))
+        return future
+
+    def write(self, work: WriteWork):
+        """Submit a unit of work and block until it is committed. Returns its result."""
+        return self.submit(work).result()
+
+    def _collect(self, first) -> Tuple[List[tuple], bool]:
+        """Gather a batch starting with first. Returns (batch, stop requested)."""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch, stopping = self._collect(first)
+                self._flush(batch)
+        finally:
+            # However the thread ends, nothing queued from here on would ever run
+            with self._submit_lock:
+                self._closed = True
+            self._fail_queued()
+
+    def _fail_queued(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(WriterClosed("Group-commit writer is closed"))
+
+    def _flush(self, batch: List[tuple]):
+        results = []
+        try:
+            with self.connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for work, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT group_commit_unit")
+                    try:
+                        results.append((future, True, work(conn)))
+                        conn.execute("RELEASE group_commit_unit")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO group_commit_unit")
+                        conn.execute("RELEASE group_commit_unit")
+                        results.append((future, False, e))
+                conn.commit()
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in the batch was written
+            for _, future in batch:
+                if future.running() or (not future.done() and future.set_running_or_notify_cancel()):
+                    future.set_exception(e)
+            with self._lock:
+                self._batches += 1
+                self._failed += len(batch)
+            return
+        failed = 0
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(value)
+        with self._lock:
+            self._batches += 1
+            self._writes += len(results) - failed
+            self._failed += failed
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flush_interval_ms": round(self.flush_interval * 1000, 3),
+                "max_batch": self.max_batch,
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "writes": self._writes,
+                "failed": self._failed,
+                "avg_batch": round(self._writes / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._max_batch_seen,
+            }
+
+    def close(self, timeout: float = 5.0):
+        """Commit whatever is queued, then stop the writer thread."""
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join(timeout)
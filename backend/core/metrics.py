@@ -0,0 +1,176 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STATEMENT = re.compile(r"^\s*(?:EXPLAIN\s+QUERY\s+PLAN\s+)?(\w+)", re.IGNORECASE)
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([\w\"]+)", re.IGNORECASE)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set, as Prometheus expects."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name, self.help, self.read = name, help, read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        # Re-registering a name returns the existing metric, so module reloads don't duplicate it
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help, read))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    "digischool_http_request_duration_seconds",
+    "HTTP request latency until the response starts, by route template.",
+    ("method", "route", "status"),
+)
+tool_call_seconds = registry.histogram(
+    "digischool_tool_duration_seconds", "Agent tool call latency.", ("tool", "outcome"),
+)
+db_query_seconds = registry.histogram(
+    "digischool_db_query_duration_seconds", "SQLite statement latency, by statement kind and table.", ("statement",),
+)
+db_query_rows = registry.counter(
+    "digischool_db_query_rows_total", "Rows returned by SQLite queries.", ("statement",),
+)
+db_slow_queries = registry.counter(
+    "digischool_db_slow_queries_total", "SQLite statements slower than the slow-query threshold.", ("statement",),
+)
+db_pool_wait_seconds = registry.histogram(
+    "digischool_db_pool_wait_seconds", "Time spent waiting to check out a pooled SQLite connection.", ("pool",),
+)
+db_pool_waits = registry.counter(
+    "digischool_db_pool_waits_total", "Connection checkouts that found no idle connection and had to wait.", ("pool",),
+)
+
+
+@lru_cache(maxsize=1024)
+def statement_label(query: str) -> str:
+    """Low-cardinality label for a SQL statement, e.g. "SELECT school_content"."""
+    statement = _STATEMENT.match(query)
+    table = _TABLE.search(query)
+    label = statement.group(1).upper() if statement else "UNKNOWN"
+    return label + " " + table.group(1).strip('"') if table else label
+
+
+def route_template(scope: dict) -> str:
+    """The matched route as a template, e.g. "/schools/{content_id}", to keep label cardinality bounded.
+
+    Built from the request path by putting the path parameters back, since
+    routes inside an included router only know their path below the prefix.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    for name, value in scope.get("path_params", {}).items():
+        for index in range(len(segments) - 1, -1, -1):
+            if segments[index] == str(value):
+                segments[index] = "{" + name + "}"
+                break
+    return "/".join(segments)
+
+
+async def metrics_middleware(request, call_next):
+    """Record request latency under the matched route template (not the raw path)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_request_seconds.observe(
+            time.perf_counter() - start, request.method, route_template(request.scope), status
+        )
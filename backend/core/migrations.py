@@ -0,0 +1,147 @@
+import sqlite3
+from datetime import datetime
+from typing import List, Optional
+from core.rollups import rebuild_statements
+
+# Numbered schema steps, applied in order and recorded in schema_version.
+# Never edit a released step; append a new one instead.
+MIGRATIONS = [
+    (1, "Index school_content type/date, teacher and class/subject lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_content_type_date ON school_content (content_type, date_uploaded)",
+        "CREATE INDEX IF NOT EXISTS idx_content_teacher ON school_content (teacher_id)",
+        "CREATE INDEX IF NOT EXISTS idx_content_class_subject "
+        "ON school_content (class_name COLLATE NOCASE, subject COLLATE NOCASE)",
+    ]),
+    (2, "Add normalized lowercase content_type column", [
+        "ALTER TABLE school_content ADD COLUMN content_type_norm TEXT",
+        "UPDATE school_content SET content_type_norm = LOWER(TRIM(content_type))",
+        "DROP INDEX IF EXISTS idx_content_type_date",
+        "CREATE INDEX IF NOT EXISTS idx_content_type_date ON school_content (content_type_norm, date_uploaded)",
+    ]),
+    (3, "Index date_uploaded for keyset pagination", [
+        "CREATE INDEX IF NOT EXISTS idx_content_date ON school_content (date_uploaded)",
+    ]),
+    (4, "Add content_changes change log", [
+        """
+        CREATE TABLE IF NOT EXISTS content_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            content_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL,
+            payload TEXT
+        )
+        """,
+    ]),
+    (5, "Add content_rollups aggregate store", [
+        """
+        CREATE TABLE IF NOT EXISTS content_rollups (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, bucket)
+        ) WITHOUT ROWID
+        """,
+        *rebuild_statements(),
+    ]),
+    (6, "Add school_content_fts full-text index over title and description", [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS school_content_fts USING fts5(
+            title, description,
+            content='school_content', content_rowid='content_id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS school_content_fts_ai AFTER INSERT ON school_content BEGIN
+            INSERT INTO school_content_fts (rowid, title, description)
+            VALUES (new.content_id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS school_content_fts_ad AFTER DELETE ON school_content BEGIN
+            INSERT INTO school_content_fts (school_content_fts, rowid, title, description)
+            VALUES ('delete', old.content_id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS school_content_fts_au AFTER UPDATE OF title, description ON school_content BEGIN
+            INSERT INTO school_content_fts (school_content_fts, rowid, title, description)
+            VALUES ('delete', old.content_id, old.title, old.description);
+            INSERT INTO school_content_fts (rowid, title, description)
+            VALUES (new.content_id, new.title, new.description);
+        END
+        """,
+        "INSERT INTO school_content_fts (school_content_fts) VALUES ('rebuild')",
+    ]),
+    (7, "Add app_meta data_version, bumped by every content and teacher write", [
+        """
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_version', 1)",
+        *[
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+                UPDATE app_meta SET value = value + 1 WHERE key = 'data_version';
+            END
+            """
+            for table in ("school_content", "teacher_profile")
+            for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+        ],
+    ]),
+    (8, "Add attachments table of stored blobs, keyed by SHA-256", [
+        """
+        CREATE TABLE IF NOT EXISTS attachments (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            media_type TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            uploaded_at TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ]),
+]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration number (0 for a fresh database)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        );
+    """)
+    row = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()
+    return row[0]
+
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to target (default: latest). Returns the versions applied.
+
+    Each step runs in its own IMMEDIATE transaction, so concurrent starters
+    serialize on the write lock and a failed step leaves no partial schema.
+    """
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat(timespec="seconds"))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ResponseCache:
+    """Bounded LRU of serialized response bodies, each tagged with the data version it was built at.
+
+    An entry built at an older version is never served; it is dropped on the
+    next lookup, so writes need no explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, body, headers)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str, version: int) -> Optional[Tuple[bytes, dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1], entry[2]
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: str, version: int, body: bytes, headers: dict) -> Tuple[bytes, dict]:
+        with self._lock:
+            self._entries[key] = (version, body, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body, headers
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(body) for _, body, _ in self._entries.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,52 @@
+from typing import List, Optional, Tuple
+from models.data_model import SchoolContent
+
+# Precomputed content counts, one row per (dimension, bucket) in content_rollups.
+# Each dimension maps to the grouped query that recomputes it from scratch;
+# content_buckets() must put a single row in the same buckets.
+ROLLUP_SOURCES = {
+    "department": """
+        SELECT tp.department, COUNT(*) FROM school_content sc
+        JOIN teacher_profile tp ON tp.teacher_id = sc.teacher_id
+        GROUP BY tp.department
+    """,
+    "department_notes": """
+        SELECT tp.department, COUNT(*) FROM school_content sc
+        JOIN teacher_profile tp ON tp.teacher_id = sc.teacher_id
+        WHERE sc.content_type_norm LIKE '%note%'
+        GROUP BY tp.department
+    """,
+    "teacher": "SELECT teacher_id, COUNT(*) FROM school_content GROUP BY teacher_id",
+    "subject": "SELECT COALESCE(subject, ''), COUNT(*) FROM school_content GROUP BY 1",
+    "content_type": "SELECT content_type_norm, COUNT(*) FROM school_content GROUP BY content_type_norm",
+    "day": "SELECT date_uploaded, COUNT(*) FROM school_content GROUP BY date_uploaded",
+}
+
+ROLLUP_DIMENSIONS = tuple(ROLLUP_SOURCES)
+
+
+def rebuild_statements() -> List[str]:
+    """SQL that empties content_rollups and recomputes every dimension."""
+    statements = ["DELETE FROM content_rollups"]
+    for dimension, source in ROLLUP_SOURCES.items():
+        statements.append(
+            f"INSERT INTO content_rollups (dimension, bucket, count) SELECT '{dimension}', * FROM ({source})"
+        )
+    return statements
+
+
+def content_buckets(content: SchoolContent, department: Optional[str]) -> List[Tuple[str, str]]:
+    """The (dimension, bucket) pairs a single content row counts towards."""
+    content_type = content.content_type.strip().lower()
+    buckets = [
+        ("teacher", content.teacher_id),
+        ("subject", content.subject or ""),
+        ("content_type", content_type),
+        ("day", content.date_uploaded.isoformat()),
+    ]
+    # Content from teachers without a profile has no department, as in the JOIN above
+    if department is not None:
+        buckets.append(("department", department))
+        if "note" in content_type:
+            buckets.append(("department_notes", department))
+    return buckets
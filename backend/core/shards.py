@@ -0,0 +1,159 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from core.sqlite_db import SQLiteDB
+from core.tenancy import tenant_scope
+
+# One SQLite file per school (or per school and academic year) under SHARD_DIR.
+SHARD_DIR = os.environ.get("SHARD_DIR", "shards")
+MAX_OPEN_SHARDS = int(os.environ.get("MAX_OPEN_SHARDS", 32))
+SHARD_POOL_SIZE = int(os.environ.get("SHARD_POOL_SIZE", 3))
+FAN_OUT_WORKERS = 8
+
+def shard_file(key: str) -> str:
+    """File for a tenant key, relative to the shard directory.
+
+    "school" -> "school.db" and "school/2024-25" -> "school/2024-25.db": the
+    year files live in a directory named after the school. Neither a school
+    id nor a year can contain "/" or ".", so two keys never share a file.
+    """
+    return os.path.join(*key.split("/")) + ".db"
+
+
+def shard_key(file_name: str) -> str:
+    return file_name[:-len(".db")].replace(os.sep, "/")
+
+
+class UnknownTenant(LookupError):
+    """A tenant key with no shard on disk; shards are created with ShardManager.create."""
+
+
+class ShardManager:
+    """Opens tenant databases on demand and keeps at most max_open of them open (LRU).
+
+    An evicted shard's idle connections are closed at once; connections
+    still checked out by a running request are closed when it releases them
+    rather than going back to the evicted pool.
+
+    get() only opens shards that exist on disk, so a made-up X-School-Id
+    can't create a file; new schools are added with create(). Opening a
+    shard (migrations included) happens outside the manager's lock, so it
+    only holds up other requests for the same shard.
+    """
+
+    def __init__(self, directory: str = SHARD_DIR, max_open: int = MAX_OPEN_SHARDS,
+                 pool_size: int = SHARD_POOL_SIZE):
+        self.directory = directory
+        self.max_open = max_open
+        self.pool_size = pool_size
+        self._open = OrderedDict()  # key -> SQLiteDB
+        self._opening = {}  # key -> Future of the SQLiteDB another thread is opening
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._evicted = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, shard_file(key))
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            if key in self._open:
+                return True
+        return os.path.isfile(self.path(key))
+
+    def get(self, key: str) -> SQLiteDB:
+        """The open database for a tenant key; raises UnknownTenant if it has no shard."""
+        return self._get(key, create=False)
+
+    def create(self, key: str) -> SQLiteDB:
+        """The database for a tenant key, created with the current schema if it does not exist yet."""
+        return self._get(key, create=True)
+
+    def _get(self, key: str, create: bool) -> SQLiteDB:
+        with self._lock:
+            shard = self._open.get(key)
+            if shard is not None:
+                self._open.move_to_end(key)
+                return shard
+            opening = self._opening.get(key)
+            if opening is None:
+                path = self.path(key)
+                if not create and not os.path.isfile(path):
+                    raise UnknownTenant(f"Unknown school: {key!r}")
+                opening = self._opening[key] = Future()
+                opener = True
+            else:
+                opener = False
+        if not opener:
+            # Raises whatever opening the shard raised in the other thread
+            return opening.result()
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shard = SQLiteDB(path, pool_size=self.pool_size, seed_sample_data=False)
+        except BaseException as e:
+            with self._lock:
+                del self._opening[key]
+            opening.set_exception(e)
+            raise
+        evicted = []
+        with self._lock:
+            del self._opening[key]
+            self._open[key] = shard
+            self._opened += 1
+            while len(self._open) > self.max_open:
+                evicted.append(self._open.popitem(last=False)[1])
+                self._evicted += 1
+        opening.set_result(shard)
+        for old in evicted:
+            old.close()
+        return shard
+
+    def keys(self) -> List[str]:
+        """Tenant keys of every shard file on disk, open or not."""
+        if not os.path.isdir(self.directory):
+            return []
+        keys = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".db"):
+                keys.append(shard_key(entry.name))
+            elif entry.is_dir():
+                keys.extend(shard_key(os.path.join(entry.name, name))
+                            for name in os.listdir(entry.path) if name.endswith(".db"))
+        return sorted(keys)
+
+    def fan_out(self, func: Callable, *args, keys: Optional[List[str]] = None, **kwargs) -> Dict[str, object]:
+        """Call func(*args, **kwargs) once per shard, each inside that shard's tenant scope.
+
+        Runs on a small thread pool; returns {tenant key: result}.
+        """
+        keys = self.keys() if keys is None else keys
+
+        def run(key):
+            with tenant_scope(key):
+                return func(*args, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=min(FAN_OUT_WORKERS, len(keys) or 1),
+                                thread_name_prefix="shard-fan-out") as executor:
+            return dict(zip(keys, executor.map(run, keys)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "max_open": self.max_open,
+                "open": list(self._open),
+                "opened": self._opened,
+                "evicted": self._evicted,
+            }
+
+    def close(self):
+        with self._lock:
+            while self._open:
+                _, shard = self._open.popitem(last=False)
+                shard.close()
+
+
+shard_manager = ShardManager()
@@ -1,25 +1,299 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import re
 import sqlite3
+import urllib.parse
 import json
-from datetime import date
-from typing import List, Optional
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import Counter
+from datetime import date, datetime
+from typing import List, Optional, Tuple
 from models.data_model import SchoolContent, TeacherProfile
+from core.migrations import apply_migrations, current_version
+from core.rollups import ROLLUP_DIMENSIONS, content_buckets, rebuild_statements
+from core import metrics
+from core.group_commit import GroupCommitWriter, WriterClosed
+from core.tenancy import current_tenant
 
-class SQLiteDB:
-    """Simple synchronous SQLite helper for DigiSchoolAgent with auto-increment ID."""
+# Applied once to every pooled connection when it is opened.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA mmap_size = 268435456;",  # 256 MiB
+    "PRAGMA cache_size = -16000;",  # ~16 MiB page cache
+)
+
+# Reader connections open the file with mode=ro and cannot change the journal mode.
+READER_PRAGMAS = tuple(pragma for pragma in CONNECTION_PRAGMAS if "journal_mode" not in pragma) + (
+    "PRAGMA query_only = ON;",
+)
+
+# Columns a client may project from school_content, in table order.
+CONTENT_FIELDS = (
+    "content_id", "teacher_id", "class_name", "subject", "date_uploaded",
+    "content_type", "title", "description", "attachment_urls",
+)
+
+# Keyset columns for each supported sort order.
+PAGE_KEYS = {
+    "content_id": ("content_id",),
+    "date_uploaded": ("date_uploaded", "content_id"),
+}
+
+# Statements slower than this are logged with their SQL and counted in /metrics.
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_MS", 250)) / 1000
+
+slow_query_logger = logging.getLogger("digischool.slow_query")
+
+# Optional group commit: single-row writes are queued and committed together by one
+# writer thread. Each batch waits up to GROUP_COMMIT_MS for more writes (0: just take what
+# queued during the previous commit) and holds at most GROUP_COMMIT_BATCH of them.
+GROUP_COMMIT = os.environ.get("GROUP_COMMIT", "0").lower() in ("1", "true", "yes")
+GROUP_COMMIT_INTERVAL = float(os.environ.get("GROUP_COMMIT_MS", 0)) / 1000
+GROUP_COMMIT_BATCH = int(os.environ.get("GROUP_COMMIT_BATCH", 256))
+
+# How many of the newest change log entries to keep; older ones are pruned as
+# writes log new ones, and at startup. 0 keeps the whole log.
+CHANGE_LOG_RETAIN = int(os.environ.get("CHANGE_LOG_RETAIN", 100000))
+
+# Route reads to a pool of mode=ro connections and writes to a single writer connection.
+SPLIT_READS = os.environ.get("DB_SPLIT_READS", "1").lower() in ("1", "true", "yes")
+
+# Relative weights of the title and description columns in BM25 ranking.
+FTS_WEIGHTS = (10.0, 1.0)
+
+_FTS_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
 
-    def __init__(self, db_path: str = "digischool.db"):
+
+def build_fts_query(text: str, prefix: bool = False) -> str:
+    """Turn user search text into a safe FTS5 MATCH expression.
+
+    "quoted text" becomes a phrase, a trailing * keeps prefix matching (with
+    prefix=True every bare word is a prefix), and all other FTS5 syntax is
+    neutralised by quoting every term. Terms are ANDed.
+    """
+    terms = []
+    for phrase, word in _FTS_TOKEN.findall(text):
+        if phrase.strip():
+            terms.append('"' + phrase.strip().replace('"', '""') + '"')
+        elif word:
+            star = prefix or word.endswith("*")
+            word = word.rstrip("*")
+            if word:
+                terms.append('"' + word.replace('"', '""') + '"' + ("*" if star else ""))
+    return " ".join(terms)
+
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections shared across threads.
+
+    A read_only pool opens its connections with mode=ro; name labels the
+    pool's checkout waits in /metrics. Once closed, connections still checked
+    out are closed as they are released instead of going back to the pool.
+    """
+
+    def __init__(self, db_path: str, size: int = 5, timeout: float = 30.0,
+                 read_only: bool = False, name: str = "writer"):
         self.db_path = db_path
-        self._init_tables()
+        # Every in-memory connection is its own database, so never hand out more than one.
+        self.size = 1 if db_path == ":memory:" else size
+        self.timeout = timeout
+        self.read_only = read_only
+        self.name = name
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_held = 0.0
+        self._max_held = 0.0
+        self._closed = False
 
-    def connect(self):
-        """Create a SQLite connection with row access by column names."""
-        conn = sqlite3.connect(self.db_path)
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection and apply the per-connection pragmas."""
+        if self.read_only:
+            uri = "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
         conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON;")
+        for pragma in READER_PRAGMAS if self.read_only else CONNECTION_PRAGMAS:
+            conn.execute(pragma)
         return conn
 
-    def _init_tables(self):
-        """Initialize the school_content and teacher_profile tables."""
+    def acquire(self) -> sqlite3.Connection:
+        """Check out an idle connection, opening one if the pool is not yet full."""
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._created < self.size
+                if can_open:
+                    self._created += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+                with self._lock:
+                    self._waits += 1
+                metrics.db_pool_waits.inc(self.name)
+        waited = time.perf_counter() - start
+        metrics.db_pool_wait_seconds.observe(waited, self.name)
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def release(self, conn: sqlite3.Connection, held: float = 0.0):
+        """Return a connection to the pool."""
+        with self._lock:
+            self._in_use -= 1
+            self._total_held += held
+            self._max_held = max(self._max_held, held)
+            # Under the lock, so close() either drains it or sees it closed here
+            closed = self._closed
+            if closed:
+                self._created -= 1
+            else:
+                self._idle.put_nowait(conn)
+        if closed:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for one unit of work; commits on success, rolls back on error."""
+        conn = self.acquire()
+        checked_out = time.perf_counter()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn, time.perf_counter() - checked_out)
+
+    def stats(self) -> dict:
+        """Pool usage counters; times are reported in milliseconds."""
+        with self._lock:
+            checkouts = self._checkouts or 1
+            return {
+                "size": self.size,
+                "open_connections": self._created,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "waited_checkouts": self._waits,
+                "avg_wait_ms": round(self._total_wait / checkouts * 1000, 3),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_checkout_ms": round(self._total_held / checkouts * 1000, 3),
+                "max_checkout_ms": round(self._max_held * 1000, 3),
+            }
+
+    def reset(self):
+        """Close the idle connections but keep the pool open; new ones are opened on demand."""
+        self._close_idle()
+
+    def close(self):
+        """Close all idle connections; checked-out ones close when released."""
+        with self._lock:
+            self._closed = True
+        self._close_idle()
+
+    def _close_idle(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class SQLiteDB:
+    """Simple synchronous SQLite helper for DigiSchoolAgent with auto-increment ID.
+
+    With split_reads (the default), fetch_all/fetch_one run on pool_size
+    read-only connections and every write goes through one writer
+    connection, so long reads never queue behind writers for a connection
+    and writers never contend with each other for SQLite's write lock.
+    In WAL mode each read starts a fresh snapshot, and a write returns only
+    after it is committed, so a read issued after a write in the same
+    request always sees it.
+    """
+
+    def __init__(self, db_path: str = "digischool.db", pool_size: int = 5, migrate: bool = True,
+                 seed_sample_data: bool = True, group_commit: bool = GROUP_COMMIT,
+                 flush_interval: float = GROUP_COMMIT_INTERVAL, max_batch: int = GROUP_COMMIT_BATCH,
+                 split_reads: bool = SPLIT_READS, change_log_retain: int = CHANGE_LOG_RETAIN):
+        self.db_path = db_path
+        self.change_log_retain = change_log_retain
+        split_reads = split_reads and db_path != ":memory:"
+        self.pool = ConnectionPool(db_path, size=1 if split_reads else pool_size)
+        # The writer creates the file and switches it to WAL before any reader opens it
+        self.readers = ConnectionPool(db_path, size=pool_size, read_only=True, name="reader") \
+            if split_reads else self.pool
+        # Schema setup and seeding write directly; the writer thread starts once they are done
+        self.writer = None
+        self._init_tables(migrate, seed_sample_data)
+        if group_commit:
+            self.writer = GroupCommitWriter(self.connect, flush_interval, max_batch)
+
+    def connect(self):
+        """Borrow the writer connection (or a pooled one without split reads), with row access by column names."""
+        return self.pool.connection()
+
+    def read_connection(self):
+        """Borrow a read-only connection for queries."""
+        return self.readers.connection()
+
+    @property
+    def split_reads(self) -> bool:
+        return self.readers is not self.pool
+
+    @property
+    def connection_count(self) -> int:
+        """How many callers can hold a connection at once, readers and writer together."""
+        return self.readers.size + self.pool.size if self.split_reads else self.pool.size
+
+    def pool_stats(self) -> dict:
+        """Connection pool wait and checkout statistics, plus group-commit batching when enabled."""
+        stats = {"writer": self.pool.stats()}
+        if self.split_reads:
+            stats["readers"] = self.readers.stats()
+        if self.writer:
+            stats["group_commit"] = self.writer.stats()
+        return stats
+
+    def close(self):
+        """Commit any queued group-commit writes and close the idle connections."""
+        if self.writer:
+            self.writer.close()
+        if self.split_reads:
+            self.readers.close()
+        self.pool.close()
+
+    def _init_tables(self, migrate: bool = True, seed_sample_data: bool = True):
+        """Initialize the school_content and teacher_profile tables, then apply migrations."""
         with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -44,123 +318,477 @@ class SQLiteDB:
                 );
             """)
             conn.commit()
+        if migrate:
+            self.migrate()
+            self.prune_changes()
+        if seed_sample_data:
             self._insert_sample_teachers()
 
-    def execute(self, query: str, params: tuple = ()):
-        """Run insert, update, or delete SQL commands."""
+    def migrate(self, target: Optional[int] = None) -> List[int]:
+        """Apply pending schema migrations. Returns the versions applied."""
         with self.connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
+            return apply_migrations(conn, target)
+
+    def schema_version(self) -> int:
+        with self.connect() as conn:
+            return current_version(conn)
+
+    def analyze(self):
+        """Refresh the query planner statistics.
+
+        A connection only loads statistics when it reads the schema, so idle
+        readers are closed and reopen on demand with the new ones.
+        """
+        with self.connect() as conn:
+            conn.execute("ANALYZE")
+        if self.split_reads:
+            self.readers.reset()
+
+    def explain(self, query: str, params: tuple = ()) -> List[str]:
+        """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+        rows = self.fetch_all("EXPLAIN QUERY PLAN " + query, params)
+        return [row["detail"] for row in rows]
+
+    def _observe_query(self, query: str, params: tuple, rows: int, seconds: float):
+        """Record a statement's latency and row count, and log it if it was slow."""
+        label = metrics.statement_label(query)
+        metrics.db_query_seconds.observe(seconds, label)
+        metrics.db_query_rows.inc(label, amount=rows)
+        if seconds >= SLOW_QUERY_SECONDS:
+            metrics.db_slow_queries.inc(label)
+            slow_query_logger.warning(
+                "Slow query (%.1f ms, %d rows, %d params): %s",
+                seconds * 1000, rows, len(params), " ".join(query.split())[:500]
+            )
+
+    def _write(self, work):
+        """Run work(conn) and commit it: through the group-commit writer when enabled,
+        otherwise in its own transaction. Returns work's result.
+
+        A request still running when its shard is evicted finds the writer
+        closed; its work never ran there, so it commits in its own
+        transaction instead.
+        """
+        if self.writer:
+            try:
+                return self.writer.write(work)
+            except WriterClosed:
+                pass
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            result = work(conn)
             conn.commit()
-            return cursor.lastrowid
+            return result
+
+    def _execute_on(self, conn, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        cursor = conn.execute(query, params)
+        self._observe_query(query, params, 0, time.perf_counter() - start)
+        return cursor
+
+    def execute(self, query: str, params: tuple = ()):
+        """Run insert, update, or delete SQL commands. Returns the last inserted row id."""
+        return self._write(lambda conn: self._execute_on(conn, query, params).lastrowid)
+
+    def execute_rowcount(self, query: str, params: tuple = ()) -> int:
+        """Like execute(), but returns how many rows the statement changed."""
+        return self._write(lambda conn: self._execute_on(conn, query, params).rowcount)
 
     def fetch_all(self, query: str, params: tuple = ()) -> List[dict]:
         """Fetch multiple rows as list of dicts."""
-        with self.connect() as conn:
+        with self.read_connection() as conn:
+            start = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
             rows = cursor.fetchall()
+            self._observe_query(query, params, len(rows), time.perf_counter() - start)
             return [dict(row) for row in rows]
 
     def fetch_one(self, query: str, params: tuple = ()) -> Optional[dict]:
         """Fetch single row as dict."""
-        with self.connect() as conn:
+        with self.read_connection() as conn:
+            start = time.perf_counter()
             cursor = conn.cursor()
             cursor.execute(query, params)
             row = cursor.fetchone()
+            self._observe_query(query, params, 1 if row else 0, time.perf_counter() - start)
             return dict(row) if row else None
 
     # ----------------- Convenience methods for SchoolContent -----------------
 
-    def insert_content(self, content: SchoolContent) -> int:
-        """Insert a new content record. Returns the auto-generated ID."""
-        return self.execute("""
-            INSERT INTO school_content (
-                teacher_id, class_name, subject,
-                date_uploaded, content_type, title, description, attachment_urls
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    INSERT_CONTENT_SQL = """
+        INSERT INTO school_content (
+            teacher_id, class_name, subject,
+            date_uploaded, content_type, content_type_norm, title, description, attachment_urls
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _content_params(self, content: SchoolContent) -> tuple:
+        """Column values for INSERT_CONTENT_SQL, in order."""
+        return (
             content.teacher_id,
             content.class_name,
             content.subject,
             content.date_uploaded.isoformat(),
             content.content_type,
+            content.content_type.strip().lower(),
             content.title,
             content.description,
             json.dumps(content.attachment_urls) if content.attachment_urls else None
-        ))
+        )
+
+    def _insert_contents_on(self, conn, contents: List[SchoolContent]) -> List[int]:
+        """Insert many content records with executemany; returns their IDs in input order.
+
+        Runs inside a write transaction, which holds the write lock, so every
+        ID above the previous maximum belongs to this batch.
+        """
+        start = conn.execute("SELECT COALESCE(MAX(content_id), 0) FROM school_content").fetchone()[0]
+        started = time.perf_counter()
+        conn.executemany(self.INSERT_CONTENT_SQL, [self._content_params(content) for content in contents])
+        self._observe_query(self.INSERT_CONTENT_SQL, (), 0, time.perf_counter() - started)
+        return [row[0] for row in conn.execute(
+            "SELECT content_id FROM school_content WHERE content_id > ? ORDER BY content_id", (start,)
+        )]
+
+    # One school_content row as a JSON object, keys in SchoolContent field order
+    CONTENT_JSON_SQL = (
+        "json_object('content_id', content_id, 'teacher_id', teacher_id, 'class_name', class_name, "
+        "'subject', subject, 'date_uploaded', date_uploaded, 'content_type', content_type, "
+        "'title', title, 'description', description, "
+        "'attachment_urls', json(COALESCE(attachment_urls, '[]')))"
+    )
 
-    def get_all_contents(self) -> List[SchoolContent]:
+    def _row_to_dict(self, row: dict) -> dict:
+        """Decode a trusted school_content row straight into its JSON-ready dict.
+
+        Rows were validated on the way in, so this skips the SchoolContent
+        round-trip: the date stays an ISO string and only attachment_urls
+        needs decoding. Same shape as jsonable_encoder(_row_to_content(row)).
+        """
+        return {
+            "content_id": row["content_id"],
+            "teacher_id": row["teacher_id"],
+            "class_name": row["class_name"],
+            "subject": row["subject"],
+            "date_uploaded": row["date_uploaded"],
+            "content_type": row["content_type"],
+            "title": row["title"],
+            "description": row["description"],
+            "attachment_urls": json.loads(row["attachment_urls"]) if row["attachment_urls"] else [],
+        }
+
+    def _row_to_content(self, row: dict) -> SchoolContent:
+        """Convert a school_content row into a SchoolContent model."""
+        # Convert date string from DB to date object
+        row_date = row["date_uploaded"]
+        if isinstance(row_date, str):
+            row_date = date.fromisoformat(row_date)
+        return SchoolContent(
+            content_id=row["content_id"],
+            teacher_id=row["teacher_id"],
+            class_name=row["class_name"],
+            subject=row["subject"],
+            date_uploaded=row_date,
+            content_type=row["content_type"],
+            title=row["title"],
+            description=row["description"],
+            attachment_urls=json.loads(row["attachment_urls"]) if row["attachment_urls"] else []
+        )
+
+    def get_all_contents(self, raw: bool = False) -> List[SchoolContent]:
+        """All content rows, as models or (raw=True) as plain dicts."""
         rows = self.fetch_all("SELECT * FROM school_content")
-        contents = []
-        for row in rows:
-            # Convert date string from DB to date object
-            row_date = row["date_uploaded"]
-            if isinstance(row_date, str):
-                row_date = date.fromisoformat(row_date)
-            contents.append(SchoolContent(
-                content_id=row["content_id"],
-                teacher_id=row["teacher_id"],
-                class_name=row["class_name"],
-                subject=row["subject"],
-                date_uploaded=row_date,
-                content_type=row["content_type"],
-                title=row["title"],
-                description=row["description"],
-                attachment_urls=json.loads(row["attachment_urls"]) if row["attachment_urls"] else []
-            ))
-        return contents
+        decode = self._row_to_dict if raw else self._row_to_content
+        return [decode(row) for row in rows]
+
+    def get_all_contents_json(self) -> bytes:
+        """The full content list as a serialized JSON array, built by SQLite itself."""
+        row = self.fetch_one(
+            f"SELECT json_group_array(json(item)) AS body FROM "
+            f"(SELECT {self.CONTENT_JSON_SQL} AS item FROM school_content ORDER BY content_id)"
+        )
+        return row["body"].encode()
 
     def get_content_by_id(self, content_id: int) -> Optional[SchoolContent]:
         row = self.fetch_one("SELECT * FROM school_content WHERE content_id=?", (content_id,))
-        if row:
-            row_date = row["date_uploaded"]
-            if isinstance(row_date, str):
-                row_date = date.fromisoformat(row_date)
-            return SchoolContent(
-                content_id=row["content_id"],
-                teacher_id=row["teacher_id"],
-                class_name=row["class_name"],
-                subject=row["subject"],
-                date_uploaded=row_date,
-                content_type=row["content_type"],
-                title=row["title"],
-                description=row["description"],
-                attachment_urls=json.loads(row["attachment_urls"]) if row["attachment_urls"] else []
-            )
-        return None
+        return self._row_to_content(row) if row else None
+
+    def get_contents_by_ids(self, content_ids: List[int], raw: bool = False) -> List[SchoolContent]:
+        """The rows with these ids, in the order given; unknown ids are skipped."""
+        unique = list(dict.fromkeys(content_ids))
+        rows = {}
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            for row in self.fetch_all(
+                f"SELECT * FROM school_content WHERE content_id IN ({', '.join('?' * len(chunk))})", tuple(chunk)
+            ):
+                rows[row["content_id"]] = row
+        decode = self._row_to_dict if raw else self._row_to_content
+        return [decode(rows[content_id]) for content_id in unique if content_id in rows]
+
+    def _content_filters(self, content_type: Optional[str] = None, date_from=None, date_to=None,
+                         class_name: Optional[str] = None, subject: Optional[str] = None,
+                         teacher_id: Optional[str] = None, keyword: Optional[str] = None):
+        """Build a parameterized WHERE clause for school_content filters."""
+        clauses, params = [], []
+        if content_type:
+            clauses.append("content_type_norm = ?")
+            params.append(content_type.strip().lower())
+        date_from, date_to = (value.isoformat() if isinstance(value, date) else value for value in (date_from, date_to))
+        if date_from and date_to:
+            clauses.append("date_uploaded BETWEEN ? AND ?")
+            params.extend([date_from, date_to])
+        elif date_from:
+            clauses.append("date_uploaded >= ?")
+            params.append(date_from)
+        elif date_to:
+            clauses.append("date_uploaded <= ?")
+            params.append(date_to)
+        if class_name:
+            clauses.append("class_name = ? COLLATE NOCASE")
+            params.append(class_name)
+        if subject:
+            clauses.append("subject = ? COLLATE NOCASE")
+            params.append(subject)
+        if teacher_id:
+            clauses.append("teacher_id = ?")
+            params.append(teacher_id)
+        if keyword:
+            pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
 
-    def update_content(self, content_id: int, update_data: dict) -> Optional[SchoolContent]:
-        existing = self.get_content_by_id(content_id)
-        if not existing:
+    def find_contents(self, content_type: Optional[str] = None, date_from=None, date_to=None,
+                      class_name: Optional[str] = None, subject: Optional[str] = None,
+                      teacher_id: Optional[str] = None, keyword: Optional[str] = None,
+                      limit: Optional[int] = None, raw: bool = False) -> List[SchoolContent]:
+        """Fetch only the content rows matching the given filters.
+
+        Dates are inclusive and may be date objects or YYYY-MM-DD strings;
+        content_type, class_name and subject match case-insensitively.
+        raw=True returns plain dicts instead of models.
+        """
+        where, params = self._content_filters(content_type, date_from, date_to,
+                                              class_name, subject, teacher_id, keyword)
+        query = f"SELECT * FROM school_content{where} ORDER BY date_uploaded, content_id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self.fetch_all(query, tuple(params))
+        decode = self._row_to_dict if raw else self._row_to_content
+        return [decode(row) for row in rows]
+
+    def page_contents(self, limit: int, after: Optional[tuple] = None, sort: str = "content_id",
+                      descending: bool = False, fields: Optional[List[str]] = None) -> List[dict]:
+        """Fetch one keyset page of content rows as plain dicts.
+
+        after is the sort key of the last row on the previous page, i.e.
+        (content_id,) or (date_uploaded, content_id). The sort key columns are
+        always selected, whatever fields asks for.
+        """
+        keys = PAGE_KEYS[sort]
+        columns = list(dict.fromkeys([*keys, *(fields or CONTENT_FIELDS)]))
+        direction, op = ("DESC", "<") if descending else ("ASC", ">")
+        query = f"SELECT {', '.join(columns)} FROM school_content"
+        params = []
+        if after:
+            query += f" WHERE ({', '.join(keys)}) {op} ({', '.join('?' * len(keys))})"
+            params.extend(after)
+        query += " ORDER BY " + ", ".join(f"{key} {direction}" for key in keys) + " LIMIT ?"
+        params.append(limit)
+        rows = self.fetch_all(query, tuple(params))
+        if "attachment_urls" in columns:
+            for row in rows:
+                row["attachment_urls"] = json.loads(row["attachment_urls"]) if row["attachment_urls"] else []
+        return rows
+
+    def search_contents(self, text: str, content_type: Optional[str] = None,
+                        class_name: Optional[str] = None, limit: int = 20,
+                        raw: bool = False, prefix: bool = False) -> List[SchoolContent]:
+        """Full-text search over title and description, best BM25 match first."""
+        match = build_fts_query(text, prefix)
+        if not match:
+            return []
+        query = """
+            SELECT sc.* FROM school_content_fts
+            JOIN school_content sc ON sc.content_id = school_content_fts.rowid
+            WHERE school_content_fts MATCH ?
+        """
+        params = [match]
+        if content_type:
+            query += " AND sc.content_type_norm = ?"
+            params.append(content_type.strip().lower())
+        if class_name:
+            query += " AND sc.class_name = ? COLLATE NOCASE"
+            params.append(class_name)
+        query += " ORDER BY bm25(school_content_fts, ?, ?) LIMIT ?"
+        params.extend([*FTS_WEIGHTS, limit])
+        rows = self.fetch_all(query, tuple(params))
+        decode = self._row_to_dict if raw else self._row_to_content
+        return [decode(row) for row in rows]
+
+    UPDATE_CONTENT_SQL = """
+        UPDATE school_content SET
+            teacher_id=?, class_name=?, subject=?,
+            date_uploaded=?, content_type=?, content_type_norm=?, title=?, description=?, attachment_urls=?
+        WHERE content_id=?
+    """
+
+    def _update_content_on(self, conn, content_id: int, update_data: dict):
+        """Read a row and write its update on one connection. Returns (before, updated), or None if missing."""
+        row = self._execute_on(conn, "SELECT * FROM school_content WHERE content_id=?", (content_id,)).fetchone()
+        if not row:
             return None
-        updated = existing.copy(update=update_data)
+        existing = self._row_to_content(row)
+        updated = existing.model_copy(update=update_data)
         if isinstance(updated.date_uploaded, str):
             updated.date_uploaded = date.fromisoformat(updated.date_uploaded)
-        self.execute("""
-            UPDATE school_content SET
-                teacher_id=?, class_name=?, subject=?,
-                date_uploaded=?, content_type=?, title=?, description=?, attachment_urls=?
-            WHERE content_id=?
-        """, (
-            updated.teacher_id,
-            updated.class_name,
-            updated.subject,
-            updated.date_uploaded.isoformat(),
-            updated.content_type,
-            updated.title,
-            updated.description,
-            json.dumps(updated.attachment_urls) if updated.attachment_urls else None,
-            content_id
-        ))
-        return updated
-
-    def delete_content(self, content_id: int) -> bool:
-        with self.connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM school_content WHERE content_id=?", (content_id,))
-            conn.commit()
-            return cursor.rowcount > 0  # True if a row was actually deleted
+        self._execute_on(conn, self.UPDATE_CONTENT_SQL, (*self._content_params(updated), content_id))
+        return existing, updated
+
+    def _delete_content_on(self, conn, content_id: int) -> Optional[SchoolContent]:
+        """Delete a row on an open connection. Returns the row as it was, or None if missing."""
+        row = self._execute_on(conn, "SELECT * FROM school_content WHERE content_id=?", (content_id,)).fetchone()
+        if not row:
+            return None
+        self._execute_on(conn, "DELETE FROM school_content WHERE content_id=?", (content_id,))
+        return self._row_to_content(row)
+
+    # ----------------- Logged content writes -----------------
+    # The app's content writes. Each runs the row write, its rollup deltas and
+    # its change log entry as one unit of work, so they commit together and
+    # no reader sees a row without its rollups or change, or the reverse.
+
+    def insert_content_logged(self, content: SchoolContent) -> Tuple[int, int]:
+        """Insert a content record. Returns (content_id, change seq)."""
+        def work(conn):
+            content_id = self._execute_on(conn, self.INSERT_CONTENT_SQL, self._content_params(content)).lastrowid
+            created = content.model_copy(update={"content_id": content_id})
+            self._bump_rollups(conn, self._rollup_deltas(conn, [created], 1))
+            return content_id, self._log_change(conn, "insert", content_id, created.model_dump(mode="json"))
+        return self._write(work)
+
+    def insert_contents_logged(self, contents: List[SchoolContent]) -> Tuple[List[int], int]:
+        """Insert many content records in one transaction. Returns (IDs in input order, last change seq)."""
+        def work(conn):
+            ids = self._insert_contents_on(conn, contents)
+            created = [content.model_copy(update={"content_id": content_id}) for content, content_id in zip(contents, ids)]
+            self._bump_rollups(conn, self._rollup_deltas(conn, created, 1))
+            changed_at = datetime.now().isoformat(timespec="seconds")
+            conn.executemany(self.INSERT_CHANGE_SQL, [
+                (content.content_id, "insert", changed_at, json.dumps(content.model_dump(mode="json")))
+                for content in created
+            ])
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM content_changes").fetchone()[0]
+            self._prune_changes_on(conn, seq)
+            return ids, seq
+        return self._write(work)
+
+    def update_content_logged(self, content_id: int, update_data: dict):
+        """Update a content record. Returns (before, updated, change seq), or None if it does not exist."""
+        def work(conn):
+            result = self._update_content_on(conn, content_id, update_data)
+            if result is None:
+                return None
+            before, updated = result
+            self._bump_rollups(conn, self._rollup_deltas(conn, [before], -1) + self._rollup_deltas(conn, [updated], 1))
+            return before, updated, self._log_change(conn, "update", content_id, updated.model_dump(mode="json"))
+        return self._write(work)
+
+    def delete_content_logged(self, content_id: int):
+        """Delete a content record. Returns (the row as it was, change seq), or None if it does not exist."""
+        def work(conn):
+            before = self._delete_content_on(conn, content_id)
+            if before is None:
+                return None
+            self._bump_rollups(conn, self._rollup_deltas(conn, [before], -1))
+            return before, self._log_change(conn, "delete", content_id)
+        return self._write(work)
+
+    # ----------------- Change log -----------------
+
+    INSERT_CHANGE_SQL = "INSERT INTO content_changes (content_id, op, changed_at, payload) VALUES (?, ?, ?, ?)"
+
+    def _log_change(self, conn, op: str, content_id: int, payload: Optional[dict] = None) -> int:
+        """Append an insert/update/delete entry on an open connection. Returns its sequence number."""
+        seq = self._execute_on(conn, self.INSERT_CHANGE_SQL, (
+            content_id, op, datetime.now().isoformat(timespec="seconds"),
+            json.dumps(payload) if payload is not None else None
+        )).lastrowid
+        self._prune_changes_on(conn, seq)
+        return seq
+
+    def _prune_changes_on(self, conn, latest_seq: int):
+        """Drop change log entries older than the newest change_log_retain, on an open connection.
+
+        Run on every logged write, so each prune removes at most a batch's worth of rows.
+        """
+        if self.change_log_retain:
+            self._execute_on(conn, "DELETE FROM content_changes WHERE seq <= ?",
+                             (latest_seq - self.change_log_retain,))
+
+    def prune_changes(self):
+        """Apply the change log retention limit now, e.g. after lowering it."""
+        def work(conn):
+            latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM content_changes").fetchone()[0]
+            self._prune_changes_on(conn, latest)
+        self._write(work)
+
+    def get_changes(self, since: int = 0, limit: int = 500) -> List[dict]:
+        """Fetch change log entries with seq greater than since, oldest first.
+
+        Seqs come from AUTOINCREMENT and entries are only removed by pruning,
+        so a first entry after since + 1 means the ones in between were pruned.
+        """
+        rows = self.fetch_all(
+            "SELECT * FROM content_changes WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit)
+        )
+        for row in rows:
+            row["payload"] = json.loads(row["payload"]) if row["payload"] else None
+        return rows
+
+    def latest_change_seq(self) -> int:
+        row = self.fetch_one("SELECT COALESCE(MAX(seq), 0) as seq FROM content_changes")
+        return row["seq"]
+
+    BUMP_DATA_VERSION_SQL = "UPDATE app_meta SET value = value + 1 WHERE key = 'data_version'"
+
+    def get_data_version(self) -> int:
+        """Counter bumped by triggers on every school_content and teacher_profile write.
+
+        Content writes change their rollups in the same transaction, and a
+        rollup rebuild bumps it too, so a reader that sees a version also
+        sees the rollups that go with it.
+        """
+        row = self.fetch_one("SELECT value FROM app_meta WHERE key = 'data_version'")
+        return row["value"] if row else 0
+
+    # ----------------- Attachments -----------------
+
+    def insert_attachment(self, sha256: str, size: int, media_type: str, filename: str) -> bool:
+        """Record a stored blob for this database. Returns False if it was already recorded."""
+        return self.execute_rowcount(
+            "INSERT OR IGNORE INTO attachments (sha256, size, media_type, filename, uploaded_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (sha256, size, media_type, filename, datetime.now().isoformat(timespec="seconds"))
+        ) > 0
+
+    def get_attachment(self, sha256: str) -> Optional[dict]:
+        return self.fetch_one("SELECT * FROM attachments WHERE sha256 = ?", (sha256,))
+
+    def missing_attachments(self, hashes: List[str]) -> List[str]:
+        """The hashes, in order, that have no attachments row."""
+        found = set()
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            found.update(row["sha256"] for row in self.fetch_all(
+                f"SELECT sha256 FROM attachments WHERE sha256 IN ({', '.join('?' * len(chunk))})", tuple(chunk)
+            ))
+        return [sha256 for sha256 in unique if sha256 not in found]
 
     def _insert_sample_teachers(self):
         """Insert sample teacher data if table is empty."""
@@ -188,6 +816,24 @@ class SQLiteDB:
                     teacher
                 )
 
+    def insert_teacher(self, teacher: TeacherProfile):
+        """Insert a teacher and credit any content they already uploaded to their department."""
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT INTO teacher_profile (teacher_id, name, subject_specialization, department) VALUES (?, ?, ?, ?)",
+                (teacher.teacher_id, teacher.name, teacher.subject_specialization, teacher.department)
+            )
+            row = conn.execute("""
+                SELECT COUNT(*) as total,
+                       SUM(CASE WHEN content_type_norm LIKE '%note%' THEN 1 ELSE 0 END) as notes
+                FROM school_content WHERE teacher_id=?
+            """, (teacher.teacher_id,)).fetchone()
+            self._bump_rollups(conn, [
+                ("department", teacher.department, row["total"]),
+                ("department_notes", teacher.department, row["notes"] or 0),
+            ])
+            conn.commit()
+
     def get_all_teachers(self) -> List[TeacherProfile]:
         rows = self.fetch_all("SELECT * FROM teacher_profile")
         return [TeacherProfile(**row) for row in rows]
@@ -197,17 +843,235 @@ class SQLiteDB:
         return TeacherProfile(**row) if row else None
 
     def get_department_analytics(self) -> dict:
-        """Get analytics data by department."""
-        # Get content counts by department
+        """Get analytics data by department, read from the precomputed rollups."""
         query = """
-            SELECT tp.department, COUNT(sc.content_id) as total_uploads,
-                   SUM(CASE WHEN LOWER(sc.content_type) LIKE '%note%' THEN 1 ELSE 0 END) as notes_count
-            FROM teacher_profile tp
-            LEFT JOIN school_content sc ON tp.teacher_id = sc.teacher_id
-            GROUP BY tp.department
+            SELECT d.department, COALESCE(total.count, 0) as total_uploads,
+                   COALESCE(notes.count, 0) as notes_count
+            FROM (SELECT DISTINCT department FROM teacher_profile) d
+            LEFT JOIN content_rollups total ON total.dimension = 'department' AND total.bucket = d.department
+            LEFT JOIN content_rollups notes ON notes.dimension = 'department_notes' AND notes.bucket = d.department
             ORDER BY total_uploads DESC
         """
         return self.fetch_all(query)
 
-# ----------------- Initialize database -----------------
-db = SQLiteDB("digischool.db")
+    # ----------------- Rollups -----------------
+
+    def _bump_rollups(self, conn, deltas):
+        """Add (dimension, bucket, delta) triples to content_rollups on an open connection."""
+        # An update that keeps a bucket adds -1 and +1 to it; net them out first
+        net = Counter()
+        for dimension, bucket, delta in deltas:
+            net[dimension, bucket] += delta
+        deltas = [(dimension, bucket, delta) for (dimension, bucket), delta in net.items() if delta]
+        conn.executemany("""
+            INSERT INTO content_rollups (dimension, bucket, count) VALUES (?, ?, ?)
+            ON CONFLICT (dimension, bucket) DO UPDATE SET count = count + excluded.count
+        """, deltas)
+        conn.executemany(
+            "DELETE FROM content_rollups WHERE dimension=? AND bucket=? AND count <= 0",
+            [delta[:2] for delta in deltas]
+        )
+
+    def _rollup_deltas(self, conn, contents: List[SchoolContent], delta: int) -> List[tuple]:
+        """(dimension, bucket, delta) triples that count contents in (delta=1) or out of (delta=-1) the rollups."""
+        teacher_ids = list({content.teacher_id for content in contents})
+        departments = {}
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(teacher_ids), 500):
+            chunk = teacher_ids[i:i + 500]
+            departments.update(conn.execute(
+                f"SELECT teacher_id, department FROM teacher_profile WHERE teacher_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        counts = Counter()
+        for content in contents:
+            counts.update(content_buckets(content, departments.get(content.teacher_id)))
+        return [(dimension, bucket, count * delta) for (dimension, bucket), count in counts.items()]
+
+    def get_rollup(self, dimension: str) -> dict:
+        """Counts per bucket for one rollup dimension."""
+        rows = self.fetch_all(
+            "SELECT bucket, count FROM content_rollups WHERE dimension=? ORDER BY bucket", (dimension,)
+        )
+        return {row["bucket"]: row["count"] for row in rows}
+
+    def get_rollups(self) -> dict:
+        """Counts per bucket for every rollup dimension."""
+        rollups = {dimension: {} for dimension in ROLLUP_DIMENSIONS}
+        for row in self.fetch_all("SELECT dimension, bucket, count FROM content_rollups ORDER BY dimension, bucket"):
+            rollups.setdefault(row["dimension"], {})[row["bucket"]] = row["count"]
+        return rollups
+
+    def get_analytics_bundle(self, top_subjects: int = 6, top_teachers: int = 5,
+                             since: Optional[str] = None) -> dict:
+        """Chart series for the analytics page, read from the rollups in one read transaction.
+
+        Returns {series: [(label, count), ...]} for content types and the top
+        subjects (largest first), the top teachers as (teacher_id, name, count),
+        and uploads per day (oldest first, from since if given).
+        """
+        queries = {
+            "content_types": (
+                "SELECT bucket, count FROM content_rollups WHERE dimension = 'content_type' "
+                "ORDER BY count DESC, bucket", ()),
+            "subjects": (
+                "SELECT bucket, count FROM content_rollups WHERE dimension = 'subject' "
+                "ORDER BY count DESC, bucket LIMIT ?", (top_subjects,)),
+            "teachers": (
+                "SELECT r.bucket, COALESCE(tp.name, r.bucket), r.count FROM content_rollups r "
+                "LEFT JOIN teacher_profile tp ON tp.teacher_id = r.bucket "
+                "WHERE r.dimension = 'teacher' ORDER BY r.count DESC, r.bucket LIMIT ?", (top_teachers,)),
+            "upload_trend": (
+                "SELECT bucket, count FROM content_rollups WHERE dimension = 'day' AND bucket >= ? "
+                "ORDER BY bucket", (since or "",)),
+        }
+        bundle = {}
+        with self.read_connection() as conn:
+            # One snapshot, so the series agree with each other under concurrent writes
+            conn.execute("BEGIN")
+            for series, (query, params) in queries.items():
+                started = time.perf_counter()
+                bundle[series] = [tuple(row) for row in conn.execute(query, params)]
+                self._observe_query(query, params, len(bundle[series]), time.perf_counter() - started)
+            conn.commit()
+        return bundle
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from school_content in one transaction, under a new data version."""
+        def work(conn):
+            for statement in rebuild_statements():
+                conn.execute(statement)
+            conn.execute(self.BUMP_DATA_VERSION_SQL)
+        self._write(work)
+
+class AsyncSQLiteDB:
+    """Async facade over SQLiteDB that runs blocking calls on a bounded executor.
+
+    The executor has one worker per connection, readers and writer, so
+    awaiting callers never queue on a pool and never block the event loop
+    thread. With
+    group commit on it gets extra workers: a thread waiting for its batch to
+    commit holds no connection, and more waiting writers mean fuller batches.
+    """
+
+    def __init__(self, db: SQLiteDB, max_workers: Optional[int] = None):
+        self.db = db
+        self.max_workers = max_workers
+        # Created on first use, so wrapping a not-yet-opened database doesn't open it
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                workers = self.max_workers
+                if not workers:
+                    workers = self.db.connection_count
+                    if self.db.writer:
+                        workers += min(self.db.writer.max_batch, 32)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sqlite")
+            return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run any blocking callable on the DB executor and await its result.
+
+        The caller's context (e.g. the request's tenant) goes with it to the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name):
+        """Expose every SQLiteDB method as a coroutine, e.g. await async_db.get_all_contents()."""
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    def shutdown(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+class LazySQLiteDB:
+    """Stand-in for the current SQLiteDB that opens it on first attribute access.
+
+    Modules keep importing `db` as before, but importing them no longer
+    creates the file, runs migrations or seeds sample teachers. Inside a
+    tenant scope it resolves to that tenant's shard.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+
+# ----------------- Shared database (opened lazily) -----------------
+DB_PATH = os.environ.get("DB_PATH", "digischool.db")
+
+_shared_db_lock = threading.Lock()
+_shared_db = {"instance": None}
+
+
+def get_db() -> SQLiteDB:
+    """The current tenant's shard, or the shared database when no tenant is set.
+
+    The shared database is created with its tables, migrations and sample
+    teachers on first call. Also usable as a FastAPI dependency.
+    """
+    tenant = current_tenant.get()
+    if tenant is not None:
+        from core.shards import shard_manager
+        return shard_manager.get(tenant)
+    with _shared_db_lock:
+        if _shared_db["instance"] is None:
+            _shared_db["instance"] = SQLiteDB(DB_PATH, pool_size=int(os.environ.get("DB_POOL_SIZE", 5)))
+        return _shared_db["instance"]
+
+
+def close_db():
+    """Stop the DB executor and close the idle connections of the shared database and open shards."""
+    from core.shards import shard_manager
+    async_db.shutdown()
+    shard_manager.close()
+    with _shared_db_lock:
+        instance, _shared_db["instance"] = _shared_db["instance"], None
+    if instance:
+        instance.close()
+
+
+def _pool_stat(key: str) -> int:
+    # Scraping metrics must not open the database
+    instance = _shared_db["instance"]
+    return instance.pool.stats()[key] if instance else 0
+
+
+def _reader_stat(key: str) -> int:
+    instance = _shared_db["instance"]
+    return instance.readers.stats()[key] if instance and instance.split_reads else 0
+
+
+def _group_commit_queued() -> int:
+    instance = _shared_db["instance"]
+    return instance.writer.stats()["queued"] if instance and instance.writer else 0
+
+
+db = LazySQLiteDB()
+async_db = AsyncSQLiteDB(db)
+
+metrics.registry.gauge("digischool_db_pool_in_use", "Writer SQLite connections checked out.",
+                       lambda: _pool_stat("in_use"))
+metrics.registry.gauge("digischool_db_pool_open_connections", "Open writer SQLite connections.",
+                       lambda: _pool_stat("open_connections"))
+metrics.registry.gauge("digischool_db_group_commit_queued", "Writes waiting for the next group commit.",
+                       _group_commit_queued)
+metrics.registry.gauge("digischool_db_reader_pool_in_use", "Read-only SQLite connections checked out.",
+                       lambda: _reader_stat("in_use"))
+metrics.registry.gauge("digischool_db_reader_pool_open_connections", "Open read-only SQLite connections.",
+                       lambda: _reader_stat("open_connections"))
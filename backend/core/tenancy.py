@@ -0,0 +1,87 @@
+import json
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+# Tenant of the current request or task: "school" or "school/2024-25", None for the default database.
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+SCHOOL_HEADER = "x-school-id"
+YEAR_HEADER = "x-academic-year"
+# Query fallbacks, for clients that cannot set headers (EventSource)
+SCHOOL_PARAM = "school_id"
+YEAR_PARAM = "academic_year"
+
+_SCHOOL_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+_ACADEMIC_YEAR = re.compile(r"^\d{4}(-\d{2})?$")
+
+
+def tenant_key(school_id: Optional[str], academic_year: Optional[str] = None) -> Optional[str]:
+    """Validate and combine a school id and optional academic year into a tenant key.
+
+    Raises ValueError for ids that are not safe to use in a file name.
+    """
+    if not school_id:
+        if academic_year:
+            raise ValueError("An academic year needs a school id")
+        return None
+    if not _SCHOOL_ID.match(school_id):
+        raise ValueError(f"Invalid school id: {school_id!r}")
+    if academic_year is None:
+        return school_id
+    if not _ACADEMIC_YEAR.match(academic_year):
+        raise ValueError(f"Invalid academic year: {academic_year!r} (expected YYYY or YYYY-YY)")
+    return f"{school_id}/{academic_year}"
+
+
+@contextmanager
+def tenant_scope(key: Optional[str]):
+    """Run a block against one tenant's database, e.g. in scripts and fan-out workers."""
+    token = current_tenant.set(key)
+    try:
+        yield key
+    finally:
+        current_tenant.reset(token)
+
+
+class TenantMiddleware:
+    """ASGI middleware that picks the tenant from X-School-Id / X-Academic-Year.
+
+    Runs as plain ASGI (not BaseHTTPMiddleware) so the tenant is set in the
+    context every downstream task, thread and streamed body copies. With
+    known, a key it rejects gets a 404 before any route runs.
+    """
+
+    def __init__(self, app, known: Optional[Callable[[str], bool]] = None):
+        self.app = app
+        self.known = known
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        try:
+            key = tenant_key(
+                headers.get(SCHOOL_HEADER) or query.get(SCHOOL_PARAM, [None])[0],
+                headers.get(YEAR_HEADER) or query.get(YEAR_PARAM, [None])[0],
+            )
+        except ValueError as e:
+            await _error(send, 400, str(e))
+            return
+        if key is not None and self.known and not self.known(key):
+            await _error(send, 404, f"Unknown school: {key!r}")
+            return
+        with tenant_scope(key):
+            await self.app(scope, receive, send)
+
+
+async def _error(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
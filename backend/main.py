@@ -1,13 +1,16 @@
 import os
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from core.sqlite_db import SQLiteDB
+from fastapi.responses import PlainTextResponse
+from core.sqlite_db import get_db, close_db
 from google.adk.cli.fast_api import get_fast_api_app
 from fastapi.middleware.cors import CORSMiddleware
 from services import school_service
 from routers import school, dashboard
-
-app = FastAPI()
+from core import metrics
+from core.tenancy import TenantMiddleware
+from core.shards import shard_manager
 
 AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -16,13 +19,26 @@ ALLOWED_ORIGINS = ["http://127.0.0.1:5500"]  # Only for dev; restrict later
 
 SERVE_WEB_INTERFACE = True
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the database (tables, migrations, sample teachers) at startup rather than on import,
+    # so the first request doesn't pay for it; the agent is still built on the first chat.
+    get_db()
+    yield
+    close_db()
+
 # Create app via ADK wrapper
 app = get_fast_api_app(
     agents_dir=AGENT_DIR,
     allow_origins=ALLOWED_ORIGINS,
     web=SERVE_WEB_INTERFACE,
+    lifespan=lifespan,
 )
 
+# Route each request to its school's database (X-School-Id / X-Academic-Year);
+# schools without a shard get a 404 until POST /schools/admin/shards/{tenant} adds one
+app.add_middleware(TenantMiddleware, known=shard_manager.exists)
+
 # ✅ Add CORS middleware manually
 app.add_middleware(
     CORSMiddleware,
@@ -30,11 +46,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache", "Age"],
 )
 
+# Per-route latency histograms, scraped from /metrics
+app.middleware("http")(metrics.metrics_middleware)
+
 # Include routers
 app.include_router(school.router, prefix="/schools", tags=["School Content"])
 app.include_router(dashboard.router)
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Request, tool and SQLite query metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8001)))
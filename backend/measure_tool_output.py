@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure how much the shaped list tools save: bytes and estimated tokens of
+each tool's full rows against the summary page the model gets, on
+synthetic data.
+
+    python measure_tool_output.py --rows 10000
+
+The database is a temporary file, so nothing in the working directory is
+touched. Tokens are estimated at 4 bytes of JSON per token.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="content rows to seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's module-level database reads DB_PATH on import
+        os.environ["DB_PATH"] = os.path.join(tmp, "tool_output.db")
+        from benchmarks.datasets import populate
+        from core.sqlite_db import get_db, close_db
+        from agent import tools
+        from agent.shaping import MAX_TOOL_ROWS, tool_output_stats, estimate_tokens, _json_size
+
+        populate(get_db(), args.rows)
+        shaped = {tool.__name__: tool for tool in tools.TOOLS}
+        calls = {
+            "get_contents": (),
+            "get_homework_by_date": (date.today().isoformat(),),
+            "get_homework_by_natural_date": ("this month",),
+            "get_content_by_natural_date": ("last week",),
+            "get_announcements_by_week": (),
+            "find_announcement_by_keyword": ("holiday",),
+            "search_content_by_type": ("notes",),
+            "get_todays_homework": (),
+        }
+        pages = {name: shaped[name](*call_args) for name, call_args in calls.items()}
+        page = pages["search_content_by_type"]
+        if page.get("next"):
+            shaped["get_more_results"](page["next"])
+        ids = [item["content_id"] for item in page["items"][:5]]
+        details = shaped["get_content_details"](ids)
+        close_db()
+
+    stats = tool_output_stats.stats()["tools"]
+    print(f"{args.rows} rows, at most {MAX_TOOL_ROWS} summaries per page\n")
+    print(f"{'tool':<30} {'rows':>7} {'full bytes':>11} {'shaped':>8} {'full tok':>9} {'shaped tok':>10} {'saved':>7}")
+    full_total = shaped_total = 0
+    for name, result in pages.items():
+        entry = stats[name]
+        full_total += entry["full_bytes"]
+        shaped_total += entry["shaped_bytes"]
+        print(f"{name:<30} {result['total']:>7} {entry['full_bytes']:>11} {entry['shaped_bytes']:>8} "
+              f"{entry['full_tokens']:>9} {entry['shaped_tokens']:>10} {entry['saved_pct']:>6.1f}%")
+    saved = 100 * (1 - shaped_total / full_total) if full_total else 0.0
+    print(f"{'all list tools':<30} {'':>7} {full_total:>11} {shaped_total:>8} "
+          f"{estimate_tokens(full_total):>9} {estimate_tokens(shaped_total):>10} {saved:>6.1f}%")
+    print(f"\nget_content_details for {len(details)} items: {_json_size(details)} bytes "
+          f"(~{estimate_tokens(_json_size(details))} tokens), fetched only when asked for")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
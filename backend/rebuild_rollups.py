@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Recompute the content_rollups aggregates from school_content from scratch.
+Run after loading data outside the API or if the counts ever drift.
+"""
+
+from services import school_service
+
+
+def rebuild_rollups():
+    rollups = school_service.rebuild_rollups()
+    print("✅ Rollups rebuilt:")
+    for dimension, buckets in rollups.items():
+        print(f"   {dimension}: {len(buckets)} buckets, {sum(buckets.values())} items")
+
+
+if __name__ == "__main__":
+    rebuild_rollups()
@@ -1,26 +1,141 @@
-from typing import List, Optional
-from models.data_model import SchoolContent
-from core.sqlite_db import db
+from typing import List, Optional, Tuple
+from models.data_model import SchoolContent, TeacherProfile
+from core.sqlite_db import db, async_db
 
 class SchoolContentRepo:
 
-    def create(content: SchoolContent) -> SchoolContent:
-        content_id = db.insert_content(content)
-        content.content_id = content_id
-        return content
+    # Writes return the change log seq with the rows; the row, its rollups and
+    # its change log entry are committed in one transaction.
 
+    def create(content: SchoolContent) -> Tuple[SchoolContent, int]:
+        content.content_id, seq = db.insert_content_logged(content)
+        return content, seq
 
-    def get_all() -> List[SchoolContent]:
-        return db.get_all_contents()
+
+    def create_many(contents: List[SchoolContent]) -> Tuple[List[SchoolContent], int]:
+        ids, seq = db.insert_contents_logged(contents)
+        for content, content_id in zip(contents, ids):
+            content.content_id = content_id
+        return contents, seq
+
+
+    def get_all(raw: bool = False) -> List[SchoolContent]:
+        return db.get_all_contents(raw)
+
+
+    def get_all_json() -> bytes:
+        return db.get_all_contents_json()
+
+
+    def get_page(limit: int, after: Optional[tuple] = None, sort: str = "content_id",
+                 descending: bool = False, fields: Optional[List[str]] = None) -> List[dict]:
+        return db.page_contents(limit, after, sort, descending, fields)
+
+
+    def find(**filters) -> List[SchoolContent]:
+        return db.find_contents(**filters)
+
+
+    def search(text: str, content_type: Optional[str] = None,
+               class_name: Optional[str] = None, limit: int = 20, raw: bool = False,
+               prefix: bool = False) -> List[SchoolContent]:
+        return db.search_contents(text, content_type, class_name, limit, raw, prefix)
+
+
+    def count_by_type() -> dict:
+        return db.get_rollup("content_type")
+
+
+    def get_rollup(dimension: str) -> dict:
+        return db.get_rollup(dimension)
+
+
+    def get_rollups() -> dict:
+        return db.get_rollups()
+
+
+    def rebuild_rollups():
+        db.rebuild_rollups()
+
+
+    def get_analytics_bundle(top_subjects: int, top_teachers: int, since: Optional[str] = None) -> dict:
+        return db.get_analytics_bundle(top_subjects, top_teachers, since)
 
 
     def get_by_id(content_id: int) -> Optional[SchoolContent]:
         return db.get_content_by_id(content_id)
 
 
-    def update(content_id: int, update_data: dict) -> Optional[SchoolContent]:
-        return db.update_content(content_id, update_data)
+    def get_by_ids(content_ids: List[int], raw: bool = False) -> List[SchoolContent]:
+        return db.get_contents_by_ids(content_ids, raw)
+
+
+    def update(content_id: int, update_data: dict) -> Optional[Tuple[SchoolContent, SchoolContent, int]]:
+        """(before, updated, seq), or None if there is no such content."""
+        return db.update_content_logged(content_id, update_data)
+
+
+    def delete(content_id: int) -> Optional[Tuple[SchoolContent, int]]:
+        """(the deleted row, seq), or None if there is no such content."""
+        return db.delete_content_logged(content_id)
+
+
+
+class AsyncSchoolContentRepo:
+    """Awaitable SchoolContentRepo; each call runs on the bounded DB executor."""
+
+    async def search(text: str, content_type: Optional[str] = None,
+                     class_name: Optional[str] = None, limit: int = 20, raw: bool = False) -> List[SchoolContent]:
+        return await async_db.run(SchoolContentRepo.search, text, content_type, class_name, limit, raw)
+
+
+    async def get_by_id(content_id: int) -> Optional[SchoolContent]:
+        return await async_db.run(SchoolContentRepo.get_by_id, content_id)
+
+
+class TeacherRepo:
+
+    def create(teacher: TeacherProfile) -> TeacherProfile:
+        db.insert_teacher(teacher)
+        return teacher
+
+
+    def get_all() -> List[TeacherProfile]:
+        return db.get_all_teachers()
+
+
+    def get_by_id(teacher_id: str) -> Optional[TeacherProfile]:
+        return db.get_teacher_by_id(teacher_id)
+
+
+    def get_department_analytics() -> List[dict]:
+        return db.get_department_analytics()
+
+
+class ContentChangeRepo:
+
+    def get_since(since: int, limit: int) -> List[dict]:
+        return db.get_changes(since, limit)
+
+
+    def latest_seq() -> int:
+        return db.latest_change_seq()
+
+class MetaRepo:
+
+    def data_version() -> int:
+        return db.get_data_version()
+
+
+class AttachmentRepo:
+
+    def record(sha256: str, size: int, media_type: str, filename: str) -> bool:
+        return db.insert_attachment(sha256, size, media_type, filename)
+
+
+    def get(sha256: str) -> Optional[dict]:
+        return db.get_attachment(sha256)
 
 
-    def delete(content_id: int) -> bool:
-        return db.delete_content(content_id)
+    def missing(hashes: List[str]) -> List[str]:
+        return db.missing_attachments(hashes)
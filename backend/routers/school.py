@@ -1,10 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import hashlib
+import json
+import tempfile
+from datetime import date
+from urllib.parse import urlencode
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List, Optional
 from models.data_model import SchoolContent, TeacherProfile
-from services import school_service
-from agent.agent import root_agent
+from services import school_service, bulk_io
+from services.multipart_upload import UploadError, receive_files
+from agent.cache import tool_cache
+from agent.intents import IntentReply, intent_stats
+from agent.chat_cache import CHAT_CACHE, chat_cache
+from agent.shaping import tool_output_stats
 from pydantic import BaseModel
-from core.sqlite_db import db
+from core.sqlite_db import db, async_db
+from core.response_cache import ResponseCache
+from core.tenancy import current_tenant
+from core.shards import shard_manager
+from core.attachments import AttachmentTooLarge, attachment_store
 
 class ChatRequest(BaseModel):
     message: str
@@ -15,57 +32,424 @@ class ChatResponse(BaseModel):
 
 router = APIRouter()
 
+def get_chat_agent():
+    """The agent behind the chat endpoints, behind the intent fast path; imported on first use and overridable in tests."""
+    from agent.agent import chat_agent
+    return chat_agent
+
+def get_chat_cache():
+    """The chat response cache, None when CHAT_CACHE is off; overridable in tests."""
+    return chat_cache if CHAT_CACHE else None
+
+async def _chat_cache_call(cache, func, *args):
+    # The disk tier blocks on SQLite; memory lookups don't need a thread
+    return await run_in_threadpool(func, *args) if cache.persistent else func(*args)
+
+async def _chat_cache_lookup(cache, agent, message: str, request: Request):
+    """Look a chat message up in the response cache.
+
+    Returns (text, headers, store): the cached answer or None, the X-Cache
+    headers to send, and a coroutine function that caches a fresh answer
+    (None if it must not be stored). A request with Cache-Control: no-cache
+    skips the lookup; no-store skips the cache altogether.
+    """
+    if cache is None:
+        return None, {}, None
+    directives = {directive.strip().lower() for directive in request.headers.get("cache-control", "").split(",")}
+    if "no-store" in directives:
+        cache.bypass()
+        return None, {"X-Cache": "BYPASS"}, None
+    key = cache.key(message, agent)
+    # Uncached: data_version() may lag another worker's write by its refresh
+    # interval, which would serve that worker's pre-write answer here
+    version = await async_db.run(school_service.read_data_version)
+    headers = {"X-Cache": "MISS"}
+    if "no-cache" in directives:
+        cache.bypass()
+        headers = {"X-Cache": "BYPASS"}
+    else:
+        cached = await _chat_cache_call(cache, cache.get, key, version)
+        if cached:
+            text, age = cached
+            return text, {"X-Cache": "HIT", "Age": str(int(age))}, None
+
+    async def store(text: str):
+        # An answer that raced a write, including one it made itself, is already stale
+        if text and await async_db.run(school_service.read_data_version) == version:
+            await _chat_cache_call(cache, cache.put, key, version, text)
+    return None, headers, store
+
+def _sse(event: str, data, event_id=None) -> str:
+    """Format one Server-Sent Events message."""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return message + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _chunk_events(chunk):
+    """Split one agent chunk into (event, data) pairs: tool calls, tool results and text."""
+    if isinstance(chunk, IntentReply):
+        # Answered by the intent fast path: one direct tool call, no model
+        yield "tool_call", {"name": chunk.tool, "args": chunk.args}
+        yield "tool_result", {"name": chunk.tool}
+        yield "chunk", {"text": chunk.text}
+    elif hasattr(chunk, "get_function_calls"):
+        # google.adk Event
+        for call in chunk.get_function_calls() or []:
+            yield "tool_call", {"name": call.name, "args": call.args}
+        for result in chunk.get_function_responses() or []:
+            yield "tool_result", {"name": result.name}
+        parts = chunk.content.parts if chunk.content and chunk.content.parts else []
+        text = "".join(part.text for part in parts if getattr(part, "text", None))
+        if text:
+            yield "chunk", {"text": text}
+    elif hasattr(chunk, "text"):
+        yield "chunk", {"text": chunk.text}
+    else:
+        yield "chunk", {"text": str(chunk)}
+
+response_cache = ResponseCache()
+
+def _json_body(data) -> bytes:
+    """Serialize like FastAPI's JSONResponse."""
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode()
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+async def _versioned_response(request: Request, build, dated: bool = False) -> Response:
+    """Serve a read route keyed on the data version, and on today's date if dated.
+
+    Answers 304 when If-None-Match carries the current ETag, otherwise serves
+    the cached body for this route and query, calling build() (a coroutine
+    function returning (body, headers)) only when nothing is cached for the
+    current version. The version is read from the database on every request,
+    so writes from other worker processes change the tag at once. It is read
+    before building, so a concurrent write can only make the tag stale, never
+    the body. Pass dated=True when the body depends on today's date, so
+    neither the cache nor the ETag outlives the day it was built on.
+    """
+    version = await async_db.run(school_service.read_data_version)
+    key = f"{current_tenant.get() or ''}:{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+    if dated:
+        key += "@" + date.today().isoformat()
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    cache_headers = {"ETag": f'"v{version}-{digest}"', "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
+    cached = response_cache.get(key, version)
+    if cached is None:
+        cached = response_cache.put(key, version, *await build())
+    body, headers = cached
+    return Response(body, media_type="application/json", headers={**headers, **cache_headers})
+
+MAX_PAGE_SIZE = 1000
+MAX_CHANGES_PAGE = 500
+MAX_SEARCH_RESULTS = 200
+MAX_IMPORT_BATCH = 10000
+# Import bodies larger than this are spooled to a temp file instead of memory
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+CHANGE_POLL_SECONDS = 1.0
+KEEPALIVE_SECONDS = 15.0
+
 @router.post("/", response_model=SchoolContent)
-def create_content(content: SchoolContent):
-    return school_service.create_content(content)
+async def create_content(content: SchoolContent):
+    try:
+        return await school_service.acreate_content(content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[SchoolContent])
-def get_all_contents():
-    return school_service.get_all_contents()
+async def get_all_contents(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    sort: str = "content_id",
+    order: str = "asc",
+    fields: Optional[str] = None,
+):
+    """List content. Without paging parameters the full list is returned.
+
+    With limit/after/fields the list is paged by keyset on sort
+    (content_id or date_uploaded); the cursor for the next page is sent in
+    the X-Next-Cursor header. fields is a comma-separated projection: each
+    item then has only those SchoolContent keys. Responses carry an ETag and
+    are cached until the next write.
+    """
+    async def build():
+        if limit is None and after is None and fields is None:
+            # Already-serialized JSON from SQLite; skips per-row models and re-encoding
+            return await school_service.aget_all_contents_json(), {}
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        try:
+            items, next_cursor = await school_service.aget_contents_page(
+                limit or MAX_PAGE_SIZE, after, sort, order, field_list
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _json_body(items), {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+    return await _versioned_response(request, build)
+
+@router.post("/bulk")
+async def bulk_import(
+    request: Request,
+    format: Optional[str] = None,
+    batch_size: int = Query(500, ge=1, le=MAX_IMPORT_BATCH),
+):
+    """Import an NDJSON or CSV stream of contents, batch_size rows per transaction.
+
+    The format comes from ?format= or the Content-Type (text/csv, otherwise
+    NDJSON). Invalid rows, including lines that are not UTF-8, are skipped and
+    reported with their line number.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in bulk_io.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            # Past max_size this is a disk write, which must not block the event loop
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+        return await async_db.run(
+            school_service.import_contents, bulk_io.parse_records(spool, fmt), batch_size
+        )
+    finally:
+        spool.close()
+
+@router.get("/export")
+def export_contents():
+    """Stream every content row as NDJSON."""
+    return StreamingResponse(
+        school_service.export_contents(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="school_content.ndjson"'},
+    )
+
+@router.post("/attachments")
+async def upload_attachments(request: Request):
+    """Upload files as multipart/form-data into the content-addressed attachment store.
+
+    The body is streamed to disk and hashed as it arrives, so memory use does
+    not grow with file size; identical files are stored once. Put a returned
+    ref ("sha256:<hex>") in a content's attachment_urls to attach the file.
+    Uploading bytes this school already has keeps the first upload's filename
+    and media_type; the response shows those, with already_recorded true.
+    """
+    try:
+        files = await receive_files(request.stream(), request.headers.get("content-type", ""), attachment_store)
+    except AttachmentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await async_db.run(school_service.record_attachments, files)
+
+@router.get("/attachments/stats")
+def get_attachment_stats():
+    """Blobs stored and uploads deduplicated by this process."""
+    return attachment_store.stats()
+
+@router.api_route("/attachments/{sha256}", methods=["GET", "HEAD"])
+async def download_attachment(sha256: str):
+    """Download an attachment by hash, with Range support; the file is sent from disk, never loaded whole."""
+    attachment = await async_db.run(school_service.get_attachment, sha256)
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return FileResponse(
+        attachment["path"],
+        media_type=attachment["media_type"],
+        filename=attachment["filename"],
+        # The URL names the exact bytes, so they never change
+        headers={"ETag": f'"{attachment["sha256"]}"', "Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+@router.get("/search")
+async def search_contents(
+    q: str,
+    content_type: Optional[str] = None,
+    class_name: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """Ranked keyword search over titles and descriptions ("phrase" and prefix* supported)."""
+    return await school_service.asearch_contents(q, content_type, class_name, limit)
+
+@router.get("/changes")
+def get_changes(since: int = Query(0, ge=0), limit: int = Query(MAX_CHANGES_PAGE, ge=1, le=MAX_CHANGES_PAGE)):
+    """Incremental inserts, updates and deletes after change seq `since`.
+
+    When the log no longer reaches back to `since`, the response has
+    "reset": true and no changes: reload all content, then continue from
+    last_seq.
+    """
+    changes = school_service.get_changes(since, limit)
+    if school_service.changes_pruned(since, changes):
+        return {"changes": [], "last_seq": school_service.read_latest_change_seq(), "reset": True}
+    last_seq = changes[-1]["seq"] if changes else since
+    return {"changes": changes, "last_seq": last_seq, "reset": False}
+
+@router.get("/changes/stream")
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """Server-Sent Events stream of content changes.
+
+    Starts after `since` (or the Last-Event-ID header on reconnect); without
+    either, only changes made after connecting are sent. The change log is
+    only queried when the latest seq moves, so idle streams cost no reads.
+    If changes after `since` were pruned from the log, a "reset" event tells
+    the client to reload all content; the stream continues after it.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        last = since if since is not None else await run_in_threadpool(school_service.latest_change_seq)
+        idle = 0.0
+        while not await request.is_disconnected():
+            if await run_in_threadpool(school_service.latest_change_seq) > last:
+                changes = await run_in_threadpool(school_service.get_changes, last, MAX_CHANGES_PAGE)
+                if school_service.changes_pruned(last, changes):
+                    last = await run_in_threadpool(school_service.read_latest_change_seq)
+                    yield _sse("reset", {"last_seq": last}, last)
+                    continue
+                for change in changes:
+                    last = change["seq"]
+                    yield _sse(change["op"], change, last)
+                idle = 0.0
+                continue
+            if idle >= KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(CHANGE_POLL_SECONDS)
+            idle += CHANGE_POLL_SECONDS
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/teachers", response_model=List[TeacherProfile])
-def get_all_teachers():
-    return db.get_all_teachers()
+async def get_all_teachers(request: Request):
+    async def build():
+        return _json_body(await async_db.run(school_service.get_all_teachers)), {}
+
+    return await _versioned_response(request, build)
 
 @router.get("/teachers/{teacher_id}", response_model=TeacherProfile)
 def get_teacher(teacher_id: str):
-    teacher = db.get_teacher_by_id(teacher_id)
+    teacher = school_service.get_teacher_by_id(teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     return teacher
 
 @router.get("/analytics/departments")
-def get_department_analytics():
-    return db.get_department_analytics()
+async def get_department_analytics(request: Request):
+    async def build():
+        return _json_body(await async_db.run(school_service.get_department_analytics)), {}
+
+    return await _versioned_response(request, build)
+
+@router.get("/analytics/bundle")
+async def get_analytics_bundle(
+    request: Request,
+    top_subjects: int = Query(6, ge=1, le=100),
+    top_teachers: int = Query(5, ge=1, le=100),
+    days: Optional[int] = Query(None, ge=1, le=3660),
+):
+    """Every analytics chart series in one response, computed server-side."""
+    async def build():
+        bundle = await async_db.run(school_service.get_analytics_bundle, top_subjects, top_teachers, days)
+        return _json_body(bundle), {}
+
+    # The days window counts back from today
+    return await _versioned_response(request, build, dated=days is not None)
+
+@router.get("/analytics/rollups")
+def get_rollups():
+    """Precomputed content counts per department, teacher, subject, content_type and day."""
+    return school_service.get_rollups()
+
+@router.get("/analytics/rollups/{dimension}")
+def get_rollup(dimension: str):
+    try:
+        return school_service.get_rollups(dimension)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/admin/shards")
+def list_shards():
+    """Per-school database files, with the shard cache's open/evicted counters."""
+    return {"shards": school_service.list_shards(), "cache": shard_manager.stats()}
+
+@router.post("/admin/shards/{tenant:path}", status_code=201)
+def create_shard(tenant: str):
+    """Add the database for a school ("school") or a school year ("school/2024-25");
+    requests naming a school without one get a 404."""
+    try:
+        return school_service.create_shard(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/analytics/departments")
+def get_department_analytics_by_school():
+    """Department analytics across every school shard, with a per-school breakdown."""
+    return school_service.get_department_analytics_by_school()
+
+@router.get("/db/stats")
+def get_db_stats():
+    return db.pool_stats()
+
+@router.get("/agent/cache")
+def get_tool_cache_stats():
+    """Hit/miss counters of the agent tool-result cache."""
+    return tool_cache.stats()
+
+@router.get("/agent/chat-cache")
+def get_chat_cache_stats():
+    """Hit/miss counters and size of the chat response cache."""
+    return {**chat_cache.stats(), "enabled": CHAT_CACHE}
+
+@router.get("/agent/tool-output")
+def get_tool_output_stats():
+    """Bytes and estimated tokens of list tool results, as full rows and as the summaries the model got."""
+    return tool_output_stats.stats()
+
+@router.get("/agent/intents")
+def get_intent_stats():
+    """How many chat messages the intent fast path answered, by intent, and how many went to the model."""
+    return intent_stats.stats()
+
+@router.get("/http/cache")
+def get_response_cache_stats():
+    """Hit/miss counters of the ETag response cache, plus the current data version."""
+    return {**response_cache.stats(), "data_version": school_service.read_data_version()}
 
 @router.get("/{content_id}", response_model=SchoolContent)
-def get_content(content_id: int):
-    content = school_service.get_content_by_id(content_id)
+async def get_content(content_id: int):
+    content = await school_service.aget_content_by_id(content_id)
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     return content
 
 @router.put("/{content_id}", response_model=SchoolContent)
-def update_content(content_id: int, update_data: dict):
-    updated = school_service.update_content(content_id, update_data)
+async def update_content(content_id: int, update_data: dict):
+    try:
+        updated = await school_service.aupdate_content(content_id, update_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Content not found")
     return updated
 
 @router.delete("/{content_id}")
-def delete_content(content_id: int):
-    deleted = school_service.delete_content(content_id)
+async def delete_content(content_id: int):
+    deleted = await school_service.adelete_content(content_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Content not found")
     return {"message": "Content deleted successfully"}
 
 @router.post("/teachers", response_model=TeacherProfile)
 def create_teacher(teacher: TeacherProfile):
-    db.execute(
-        "INSERT INTO teacher_profile (teacher_id, name, subject_specialization, department) VALUES (?, ?, ?, ?)",
-        (teacher.teacher_id, teacher.name, teacher.subject_specialization, teacher.department)
-    )
-    return teacher
+    return school_service.create_teacher(teacher)
 
 @router.get("/dashboard/stats")
 async def get_dashboard_stats():
@@ -86,19 +470,62 @@ async def get_dashboard_stats():
     }
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_agent(request: ChatRequest):
-    """Conversational endpoint for Digi School operations"""
+async def chat_with_agent(request: ChatRequest, http_request: Request, response: Response,
+                          agent=Depends(get_chat_agent), cache=Depends(get_chat_cache)):
+    """Conversational endpoint for Digi School operations
+
+    Repeated questions are answered from the chat response cache until the
+    school's content changes; X-Cache says whether this answer was a HIT.
+    """
     try:
+        cached, headers, store = await _chat_cache_lookup(cache, agent, request.message, http_request)
+        response.headers.update(headers)
+        if cached is not None:
+            return ChatResponse(response=cached, data=None)
+
         response_text = ""
-        async for chunk in root_agent.run_live(request.message):
-            if hasattr(chunk, 'text'):
-                response_text += chunk.text
-            else:
-                response_text += str(chunk)
-        
+        async for chunk in agent.run_live(request.message):
+            for event, data in _chunk_events(chunk):
+                if event == "chunk":
+                    response_text += data["text"]
+        if store:
+            await store(response_text)
+
         return ChatResponse(
             response=response_text if response_text else "I'm here to help with school operations!",
             data=None
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+
+@router.post("/chat/stream")
+async def stream_chat_with_agent(request: ChatRequest, http_request: Request,
+                                 agent=Depends(get_chat_agent), cache=Depends(get_chat_cache)):
+    """Conversational endpoint that streams the reply as Server-Sent Events.
+
+    Emits `chunk` events with text as the model produces it, `tool_call` and
+    `tool_result` progress events, then a final `done` (or `error`) event.
+    A cached answer is sent as one `chunk`; X-Cache says which it was.
+    """
+    cached, headers, store = await _chat_cache_lookup(cache, agent, request.message, http_request)
+
+    async def events():
+        if cached is not None:
+            yield _sse("chunk", {"text": cached})
+            yield _sse("done", {})
+            return
+        try:
+            text = []
+            async for chunk in agent.run_live(request.message):
+                for event, data in _chunk_events(chunk):
+                    if event == "chunk":
+                        text.append(data["text"])
+                    yield _sse(event, data)
+            if store:
+                await store("".join(text))
+            yield _sse("done", {})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Agent error: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **headers})
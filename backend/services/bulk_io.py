@@ -0,0 +1,100 @@
+import csv
+import json
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+FORMATS = ("ndjson", "csv")
+
+# CSV cells hold attachment_urls as a JSON array or as a ';'-separated list
+CSV_LIST_SEPARATOR = ";"
+
+
+def _decode(lines: Iterable[bytes], bad: List[int]) -> Iterator[str]:
+    """Decode each line as UTF-8 on its own, so one bad line can't fail the rest.
+
+    Lines that are not valid UTF-8 are decoded with replacement characters
+    and their numbers appended to bad for the parser to report.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            bad.append(line_number)
+            yield line.decode("utf-8", errors="replace")
+
+
+def _encoding_error(bad: Optional[List[int]]) -> Optional[ValueError]:
+    if not bad:
+        return None
+    error = ValueError(f"Not valid UTF-8 (line {', '.join(map(str, bad))})")
+    bad.clear()
+    return error
+
+
+def parse_ndjson(lines: Iterable[str], bad: Optional[List[int]] = None) -> Iterator[Tuple[int, object]]:
+    """Yield (line_number, record) per non-blank line; unparseable lines yield the error instead."""
+    for line_number, line in enumerate(lines, start=1):
+        error = _encoding_error(bad)
+        if error:
+            yield line_number, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError("Expected a JSON object")
+            continue
+        yield line_number, record
+
+
+def parse_csv(lines: Iterable[str], bad: Optional[List[int]] = None) -> Iterator[Tuple[int, object]]:
+    """Yield (line_number, record) per CSV row; the header row names the SchoolContent fields.
+
+    Rows the csv module rejects, such as a cell over its field size limit,
+    yield the error and parsing carries on with the next line.
+    """
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            _encoding_error(bad)
+            # DictReader only updates its own line_num after a good row
+            yield reader.reader.line_num, ValueError(f"Invalid CSV: {e}")
+            continue
+        error = _encoding_error(bad)
+        if error:
+            yield reader.line_num, error
+            continue
+        # Empty cells fall back to the model defaults
+        record = {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+        urls = record.get("attachment_urls")
+        if urls:
+            try:
+                record["attachment_urls"] = (
+                    json.loads(urls) if urls.lstrip().startswith("[")
+                    else [url.strip() for url in urls.split(CSV_LIST_SEPARATOR) if url.strip()]
+                )
+            except ValueError as e:
+                yield reader.line_num, ValueError(f"Invalid attachment_urls: {e}")
+                continue
+        yield reader.line_num, record
+
+
+def parse_records(lines: Iterable[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Parse an NDJSON or CSV stream of content records from its raw lines.
+
+    Each line is decoded as UTF-8 separately; a line that is not becomes an
+    error for its row instead of failing the whole stream.
+    """
+    bad = []
+    if fmt == "csv":
+        return parse_csv(_decode(lines, bad), bad)
+    if fmt == "ndjson":
+        return parse_ndjson(_decode(lines, bad), bad)
+    raise ValueError(f"Unsupported format: {fmt}")
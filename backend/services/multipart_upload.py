@@ -0,0 +1,120 @@
+from typing import AsyncIterator, List
+from fastapi.concurrency import run_in_threadpool
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from core.attachments import AttachmentStore
+
+
+class UploadError(ValueError):
+    pass
+
+
+class _FileParts:
+    """Applies parser events to blob writers: one writer per file part, plain form fields are skipped."""
+
+    def __init__(self, store: AttachmentStore):
+        self.store = store
+        self.files: List[dict] = []
+        self._writer = None
+        self._part = None
+
+    def apply(self, events: list):
+        for event, value in events:
+            if event == "begin":
+                self._part = value
+                self._writer = self.store.open_writer() if value is not None else None
+            elif event == "data" and self._writer:
+                self._writer.write(value)
+            elif event == "end" and self._writer:
+                writer, self._writer = self._writer, None
+                sha256, size, deduplicated = writer.commit()
+                self.files.append({**self._part, "sha256": sha256, "size": size, "deduplicated": deduplicated})
+
+    @property
+    def incomplete(self) -> bool:
+        return self._writer is not None
+
+    def abort(self):
+        if self._writer:
+            self._writer.abort()
+            self._writer = None
+
+
+async def receive_files(stream: AsyncIterator[bytes], content_type: str, store: AttachmentStore) -> List[dict]:
+    """Stream the file parts of a multipart/form-data body into the attachment store.
+
+    The body is parsed as it arrives; each network chunk's file data is
+    hashed and written on a worker thread before the next chunk is read, so
+    memory stays bounded by the chunk size whatever the file size. Returns
+    one dict per file part: filename, media_type, sha256, size, deduplicated.
+    """
+    kind, options = parse_options_header(content_type)
+    if kind != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("Expected a multipart/form-data body")
+
+    events = []
+    header = {"field": b"", "value": b""}
+    headers = {}
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers[header["field"].lower()] = header["value"]
+        header["field"] = header["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        if filename is None:
+            events.append(("begin", None))
+            return
+        events.append(("begin", {
+            "filename": filename.decode("utf-8", "replace"),
+            "media_type": headers.get(b"content-type", b"application/octet-stream").decode("latin-1"),
+        }))
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    parts = _FileParts(store)
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            if events:
+                batch, events[:] = list(events), []
+                await run_in_threadpool(parts.apply, batch)
+        parser.finalize()
+        if events:
+            await run_in_threadpool(parts.apply, list(events))
+    except MultipartParseError as e:
+        parts.abort()
+        raise UploadError(f"Malformed multipart body: {e}")
+    except BaseException:
+        parts.abort()
+        raise
+    if parts.incomplete:
+        parts.abort()
+        raise UploadError("Multipart body ended inside a file part")
+    if not parts.files:
+        raise UploadError("No file parts in the upload")
+    return parts.files
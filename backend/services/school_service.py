@@ -1,25 +1,415 @@
-from typing import List, Optional
-from models.data_model import SchoolContent
-from repos.school_repo import SchoolContentRepo
-from fastapi.encoders import jsonable_encoder
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+from models.data_model import SchoolContent, TeacherProfile
+from repos.school_repo import (
+    SchoolContentRepo, AsyncSchoolContentRepo, ContentChangeRepo, TeacherRepo, MetaRepo, AttachmentRepo,
+)
+from core.rollups import ROLLUP_DIMENSIONS
+from core.attachments import attachment_store, attachment_ref, ref_hash
+from core.sqlite_db import async_db
+from core.sqlite_db import CONTENT_FIELDS, PAGE_KEYS
+from core.tenancy import current_tenant, tenant_key
+from core.shards import shard_manager
+
+# How long a cached latest change seq may be trusted before re-reading it, so
+# writes made by other worker processes still reach this process's streams.
+CHANGE_SEQ_REFRESH_SECONDS = 1.0
+
+# One {"value", "checked"} entry per tenant (None: the shared database)
+_change_seq_lock = threading.Lock()
+_change_seq = {}
+
+# Callables run once per content write or bulk insert as listener(changes), where
+# changes is a list of (op, content_id, before, after) tuples
+_change_listeners = []
+
+logger = logging.getLogger(__name__)
+
+
+def _tenant_entry(cache: dict) -> dict:
+    """The current tenant's entry in a per-tenant cache; call with the cache's lock held."""
+    return cache.setdefault(current_tenant.get(), {"value": None, "checked": 0.0})
+
+
+def add_change_listener(listener):
+    """Register a callback for content writes, e.g. to invalidate caches."""
+    _change_listeners.append(listener)
+
+
+def _notify_changes(changes: List[tuple], seq: int):
+    with _change_seq_lock:
+        entry = _tenant_entry(_change_seq)
+        entry["value"] = max(entry["value"] or 0, seq)
+    for listener in _change_listeners:
+        try:
+            listener(changes)
+        except Exception:
+            # The write is already committed; a failing listener must not turn it into an error
+            logger.exception("Content change listener %r failed", listener)
+
+
+def _notify_change(op: str, content_id: int, content: Optional[SchoolContent],
+                   before: Optional[SchoolContent], seq: int):
+    _notify_changes([(op, content_id, before, content)], seq)
+
+
+def _notify_inserts(contents: List[SchoolContent], seq: int):
+    _notify_changes([("insert", content.content_id, None, content) for content in contents], seq)
+
+
+def latest_change_seq() -> int:
+    """Latest change log seq; re-read from the DB at most once per refresh interval."""
+    with _change_seq_lock:
+        entry = _tenant_entry(_change_seq)
+        now = time.monotonic()
+        if entry["value"] is None or now - entry["checked"] > CHANGE_SEQ_REFRESH_SECONDS:
+            entry["value"] = ContentChangeRepo.latest_seq()
+            entry["checked"] = now
+        return entry["value"]
+
+
+def read_data_version() -> int:
+    """The data version straight from the database, including writes other processes made just now."""
+    return MetaRepo.data_version()
+
+
+def read_latest_change_seq() -> int:
+    """The latest change log seq straight from the database."""
+    return ContentChangeRepo.latest_seq()
+
+
+def get_changes(since: int = 0, limit: int = 500) -> List[dict]:
+    return ContentChangeRepo.get_since(since, limit)
+
+
+def changes_pruned(since: int, changes: List[dict]) -> bool:
+    """Whether changes after since were pruned from the log, so the client must reload everything."""
+    return bool(changes) and changes[0]["seq"] > since + 1
+
+
+def _check_attachment_refs(urls: Optional[List[str]]) -> Optional[List[str]]:
+    """Normalize "sha256:<hex>" references and make sure each names a blob uploaded to this tenant.
+
+    Plain URLs pass through unchanged. Raises ValueError for a malformed or unknown reference.
+    """
+    if not urls:
+        return urls
+    normalized, hashes = [], []
+    for url in urls:
+        sha256 = ref_hash(url)
+        if sha256:
+            hashes.append(sha256)
+        normalized.append(attachment_ref(sha256) if sha256 else url)
+    missing = AttachmentRepo.missing(hashes) if hashes else []
+    if missing:
+        raise ValueError(f"Unknown attachment: {attachment_ref(missing[0])}")
+    return normalized
+
 
 def create_content(content: SchoolContent) -> SchoolContent:
-    return SchoolContentRepo.create(content)
+    content.attachment_urls = _check_attachment_refs(content.attachment_urls)
+    created, seq = SchoolContentRepo.create(content)
+    _notify_change("insert", created.content_id, created, None, seq)
+    return created
+
+
+def create_contents(contents: List[SchoolContent]) -> List[SchoolContent]:
+    """Insert a batch of contents in one transaction."""
+    if not contents:
+        return []
+    created, seq = SchoolContentRepo.create_many(contents)
+    _notify_inserts(created, seq)
+    return created
+
+
+def import_contents(records: Iterable[Tuple[int, object]], batch_size: int = 500) -> dict:
+    """Validate (row_number, record) pairs and insert the valid ones in batches.
+
+    A record is a dict of SchoolContent fields, or the exception raised while
+    parsing that row. Invalid rows are reported and skipped; they never abort
+    the batches around them.
+    """
+    inserted, errors, batch = 0, [], []
+    for row_number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            record = {key: value for key, value in record.items() if key != "content_id"}
+            content = SchoolContent(**record)
+            content.attachment_urls = _check_attachment_refs(content.attachment_urls)
+            batch.append(content)
+        except (ValueError, TypeError) as e:
+            errors.append({"row": row_number, "error": str(e)})
+        if len(batch) >= batch_size:
+            inserted += len(create_contents(batch))
+            batch = []
+    inserted += len(create_contents(batch))
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+
+def export_contents(batch_size: int = 1000) -> Iterator[str]:
+    """Yield every content row as an NDJSON line, reading by keyset page."""
+    after = None
+    while True:
+        rows = SchoolContentRepo.get_page(batch_size, after)
+        for row in rows:
+            yield json.dumps(row) + "\n"
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]["content_id"],)
+
+
+def get_all_contents() -> List[dict]:
+    # Stored rows are already valid; decode them directly instead of via SchoolContent
+    return SchoolContentRepo.get_all(raw=True)
+
+
+def get_all_contents_json() -> bytes:
+    """The full content list, serialized by SQLite, for responses that only pass it through."""
+    return SchoolContentRepo.get_all_json()
+
+
+def _encode_cursor(row: dict, sort: str) -> str:
+    key = [row[column] for column in PAGE_KEYS[sort]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != len(PAGE_KEYS[sort]):
+        raise ValueError("Cursor does not match sort order")
+    return tuple(key)
+
+
+def get_contents_page(limit: int, after: Optional[str] = None, sort: str = "content_id",
+                      order: str = "asc", fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[str]]:
+    """Return one page of contents and the cursor for the next page (None on the last page).
+
+    Raises ValueError for an unknown sort, order or field, or a malformed cursor.
+    """
+    if sort not in PAGE_KEYS:
+        raise ValueError(f"Unknown sort field: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown order: {order}")
+    unknown = [field for field in fields or [] if field not in CONTENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    # Fetch one extra row to learn whether another page follows
+    rows = SchoolContentRepo.get_page(
+        limit + 1, _decode_cursor(after, sort) if after else None, sort, order == "desc", fields
+    )
+    next_cursor = _encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+    rows = rows[:limit]
+    if fields:
+        rows = [{field: row[field] for field in fields} for row in rows]
+    return rows, next_cursor
+
 
+def find_contents(content_type: Optional[str] = None, date_from=None, date_to=None,
+                  class_name: Optional[str] = None, subject: Optional[str] = None,
+                  teacher_id: Optional[str] = None, keyword: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[dict]:
+    contents = SchoolContentRepo.find(
+        content_type=content_type, date_from=date_from, date_to=date_to,
+        class_name=class_name, subject=subject, teacher_id=teacher_id,
+        keyword=keyword, limit=limit, raw=True,
+    )
+    return contents
 
-def get_all_contents() -> List[SchoolContent]:
-    contents = SchoolContentRepo.get_all()
-    response = jsonable_encoder(contents)
-    return response
+
+def search_contents(text: str, content_type: Optional[str] = None,
+                    class_name: Optional[str] = None, limit: int = 20, prefix: bool = False) -> List[dict]:
+    """Ranked full-text search; supports "exact phrases" and prefix* terms, or prefix=True for every word."""
+    return SchoolContentRepo.search(text, content_type, class_name, limit, raw=True, prefix=prefix)
+
+
+def count_contents_by_type() -> dict:
+    return SchoolContentRepo.count_by_type()
+
+
+def get_rollups(dimension: Optional[str] = None) -> dict:
+    """Precomputed content counts for one dimension, or for all of them.
+
+    Raises ValueError for an unknown dimension.
+    """
+    if dimension is None:
+        return SchoolContentRepo.get_rollups()
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension: {dimension}")
+    return SchoolContentRepo.get_rollup(dimension)
+
+
+def get_analytics_bundle(top_subjects: int = 6, top_teachers: int = 5, days: Optional[int] = None) -> dict:
+    """Chart-ready series for the analytics page: parallel labels/counts arrays per chart.
+
+    The size depends on the number of groups, not of content rows; days
+    limits the upload trend to the most recent days.
+    """
+    since = (date.today() - timedelta(days=days - 1)).isoformat() if days else None
+    bundle = SchoolContentRepo.get_analytics_bundle(top_subjects, top_teachers, since)
+    series = {
+        name: {"labels": [label or "Unspecified" for label, _ in rows], "counts": [count for _, count in rows]}
+        for name, rows in bundle.items() if name != "teachers"
+    }
+    teachers = bundle["teachers"]
+    series["teachers"] = {
+        "ids": [teacher_id for teacher_id, _, _ in teachers],
+        "labels": [name for _, name, _ in teachers],
+        "counts": [count for _, _, count in teachers],
+    }
+    return series
+
+
+def rebuild_rollups() -> dict:
+    SchoolContentRepo.rebuild_rollups()
+    return SchoolContentRepo.get_rollups()
+
+
+def create_teacher(teacher: TeacherProfile) -> TeacherProfile:
+    created = TeacherRepo.create(teacher)
+    return created
+
+
+def get_all_teachers() -> List[TeacherProfile]:
+    return TeacherRepo.get_all()
+
+
+def get_teacher_by_id(teacher_id: str) -> Optional[TeacherProfile]:
+    return TeacherRepo.get_by_id(teacher_id)
+
+
+def get_department_analytics() -> List[dict]:
+    return TeacherRepo.get_department_analytics()
+
+
+def get_department_analytics_by_school() -> dict:
+    """Department analytics of every school shard, read in parallel, plus their totals."""
+    schools = shard_manager.fan_out(get_department_analytics)
+    totals = {}
+    for rows in schools.values():
+        for row in rows:
+            total = totals.setdefault(row["department"], {**row, "total_uploads": 0, "notes_count": 0})
+            total["total_uploads"] += row["total_uploads"]
+            total["notes_count"] += row["notes_count"]
+    return {"departments": sorted(totals.values(), key=lambda row: row["department"]), "schools": schools}
+
+
+def list_shards() -> List[dict]:
+    """Every shard on disk with its size, and whether it is currently open."""
+    open_keys = set(shard_manager.stats()["open"])
+    return [
+        {"tenant": key, "file": shard_manager.path(key), "bytes": os.path.getsize(shard_manager.path(key)),
+         "open": key in open_keys}
+        for key in shard_manager.keys()
+    ]
+
+
+def create_shard(tenant: str) -> dict:
+    """Add a school ("school") or school year ("school/2024-25") shard; a no-op if it exists.
+
+    Raises ValueError for keys that are not a valid school id and year.
+    """
+    key = tenant_key(*tenant.split("/", 1))
+    created = not shard_manager.exists(key)
+    shard_manager.create(key)
+    return {"tenant": key, "file": shard_manager.path(key), "created": created}
 
 
 def get_content_by_id(content_id: int) -> Optional[SchoolContent]:
     return SchoolContentRepo.get_by_id(content_id)
 
 
+def get_contents_by_ids(content_ids: List[int]) -> List[dict]:
+    return SchoolContentRepo.get_by_ids(content_ids, raw=True)
+
+
 def update_content(content_id: int, update_data: dict) -> Optional[SchoolContent]:
-    return SchoolContentRepo.update(content_id, update_data)
+    if update_data.get("attachment_urls"):
+        update_data = {**update_data, "attachment_urls": _check_attachment_refs(update_data["attachment_urls"])}
+    result = SchoolContentRepo.update(content_id, update_data)
+    if not result:
+        return None
+    before, updated, seq = result
+    _notify_change("update", content_id, updated, before, seq)
+    return updated
 
 
 def delete_content(content_id: int) -> bool:
-    return SchoolContentRepo.delete(content_id)
+    result = SchoolContentRepo.delete(content_id)
+    if not result:
+        return False
+    before, seq = result
+    _notify_change("delete", content_id, None, before, seq)
+    return True
+
+
+def record_attachments(files: List[dict]) -> List[dict]:
+    """Record blobs just written to the attachment store against the current tenant.
+
+    Returns each file with the reference to put in attachment_urls and its download URL.
+    A blob this tenant already recorded keeps its first filename and
+    media_type: those are what the file reports, with already_recorded set.
+    """
+    described = []
+    for file in files:
+        recorded = AttachmentRepo.record(file["sha256"], file["size"], file["media_type"], file["filename"])
+        if not recorded:
+            stored = AttachmentRepo.get(file["sha256"])
+            file = {**file, "filename": stored["filename"], "media_type": stored["media_type"]}
+        described.append({
+            **file,
+            "already_recorded": not recorded,
+            "ref": attachment_ref(file["sha256"]),
+            "url": f"/schools/attachments/{file['sha256']}",
+        })
+    return described
+
+
+def get_attachment(sha256: str) -> Optional[dict]:
+    """An attachment of the current tenant with the path of its blob, or None if unknown here."""
+    attachment = AttachmentRepo.get(sha256.lower())
+    if not attachment or not attachment_store.exists(attachment["sha256"]):
+        return None
+    return {**attachment, "path": attachment_store.path(attachment["sha256"])}
+
+
+# ----------------- Async variants (bounded DB executor, never block the event loop) -----------------
+
+async def acreate_content(content: SchoolContent) -> SchoolContent:
+    return await async_db.run(create_content, content)
+
+
+async def aget_all_contents_json() -> bytes:
+    return await async_db.run(get_all_contents_json)
+
+
+async def aget_contents_page(limit: int, after: Optional[str] = None, sort: str = "content_id",
+                             order: str = "asc", fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[str]]:
+    return await async_db.run(get_contents_page, limit, after, sort, order, fields)
+
+
+async def asearch_contents(text: str, content_type: Optional[str] = None,
+                           class_name: Optional[str] = None, limit: int = 20) -> List[dict]:
+    return await AsyncSchoolContentRepo.search(text, content_type, class_name, limit, raw=True)
+
+
+async def aget_content_by_id(content_id: int) -> Optional[SchoolContent]:
+    return await AsyncSchoolContentRepo.get_by_id(content_id)
+
+
+async def aupdate_content(content_id: int, update_data: dict) -> Optional[SchoolContent]:
+    return await async_db.run(update_content, content_id, update_data)
+
+
+async def adelete_content(content_id: int) -> bool:
+    return await async_db.run(delete_content, content_id)
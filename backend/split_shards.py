@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Split a single digischool.db into one database per school (and optionally
+per academic year), for use with the X-School-Id tenant header.
+
+    python split_shards.py --map teacher_schools.csv
+    python split_shards.py --map teacher_schools.csv --by-year --default-school main
+
+The map is a CSV with teacher_id,school_id columns. Content is assigned to
+its teacher's school; teachers missing from the map go to --default-school,
+or are skipped and reported if none is given. Content ids are kept, and
+each shard's rollups and search index are built as the rows are copied.
+The attachments rows of the blobs a shard's content references are copied
+with it, so its sha256: refs keep resolving.
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from datetime import date
+from core.attachments import ref_hash
+from core.sqlite_db import CONTENT_FIELDS
+from core.shards import ShardManager, SHARD_DIR
+from core.tenancy import tenant_key
+
+COPY_BATCH = 5000
+INSERT_WITH_ID_SQL = """
+    INSERT INTO school_content (
+        content_id, teacher_id, class_name, subject,
+        date_uploaded, content_type, content_type_norm, title, description, attachment_urls
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def academic_year(day: str, start_month: int) -> str:
+    """'2024-11-05' -> '2024-25' for a year starting in April (start_month=4)."""
+    uploaded = date.fromisoformat(day)
+    start = uploaded.year if uploaded.month >= start_month else uploaded.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def attachment_hashes(attachment_urls: str) -> set:
+    """Blob hashes a row's attachment_urls reference through "sha256:<hex>"."""
+    hashes = set()
+    for url in json.loads(attachment_urls) if attachment_urls else []:
+        try:
+            sha256 = ref_hash(url)
+        except ValueError:
+            continue
+        if sha256:
+            hashes.add(sha256)
+    return hashes
+
+
+def copy_attachments(source: sqlite3.Connection, shard, hashes: set) -> int:
+    """Copy the source's attachments rows for hashes into a shard. Returns how many it had."""
+    hashes, rows = sorted(hashes), []
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        rows.extend(tuple(row) for row in source.execute(
+            "SELECT sha256, size, media_type, filename, uploaded_at FROM attachments "
+            f"WHERE sha256 IN ({', '.join('?' * len(chunk))})", chunk
+        ))
+    with shard.connect() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO attachments (sha256, size, media_type, filename, uploaded_at) "
+            "VALUES (?, ?, ?, ?, ?)", rows
+        )
+    return len(rows)
+
+
+def load_map(path: str) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["teacher_id"].strip(): row["school_id"].strip() for row in csv.DictReader(f)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--map", required=True, help="CSV with teacher_id,school_id columns")
+    parser.add_argument("--source", default="digischool.db", help="database to split (default digischool.db)")
+    parser.add_argument("--out", default=SHARD_DIR, help=f"shard directory (default {SHARD_DIR})")
+    parser.add_argument("--default-school", help="school for teachers missing from the map")
+    parser.add_argument("--by-year", action="store_true", help="one shard per school and academic year")
+    parser.add_argument("--year-start-month", type=int, default=4, choices=range(1, 13),
+                        help="month the academic year starts in (default 4, April)")
+    args = parser.parse_args()
+
+    schools = load_map(args.map)
+    for school in {*schools.values(), args.default_school} - {None}:
+        tenant_key(school)  # fail early on ids that can't be file names
+    manager = ShardManager(args.out, max_open=1000)
+
+    source = sqlite3.connect(f"file:{args.source}?mode=ro", uri=True)
+    source.row_factory = sqlite3.Row
+    teachers_by_school = defaultdict(list)
+    for row in source.execute("SELECT teacher_id, name, subject_specialization, department FROM teacher_profile"):
+        school = schools.get(row["teacher_id"], args.default_school)
+        if school:
+            teachers_by_school[school].append(tuple(row))
+
+    pending = defaultdict(list)
+    attachments = defaultdict(set)
+    copied, skipped = Counter(), Counter()
+
+    def flush(key):
+        shard = manager.create(key)
+        if key not in copied:
+            if shard.fetch_one("SELECT 1 FROM school_content LIMIT 1"):
+                raise SystemExit(f"❌ Shard {manager.path(key)} already has content; refusing to append")
+            school = key.split("/")[0]
+            with shard.connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO teacher_profile (teacher_id, name, subject_specialization, department) "
+                    "VALUES (?, ?, ?, ?)", teachers_by_school[school]
+                )
+        with shard.connect() as conn:
+            conn.executemany(INSERT_WITH_ID_SQL, pending[key])
+        copied[key] += len(pending.pop(key))
+
+    for row in source.execute(f"SELECT {', '.join(CONTENT_FIELDS)} FROM school_content ORDER BY content_id"):
+        school = schools.get(row["teacher_id"], args.default_school)
+        if not school:
+            skipped[row["teacher_id"]] += 1
+            continue
+        key = tenant_key(school, academic_year(row["date_uploaded"], args.year_start_month) if args.by_year else None)
+        pending[key].append((
+            row["content_id"], row["teacher_id"], row["class_name"], row["subject"], row["date_uploaded"],
+            row["content_type"], row["content_type"].strip().lower(), row["title"], row["description"],
+            row["attachment_urls"],
+        ))
+        attachments[key] |= attachment_hashes(row["attachment_urls"])
+        if len(pending[key]) >= COPY_BATCH:
+            flush(key)
+    for key in list(pending):
+        flush(key)
+    attached = {key: copy_attachments(source, manager.get(key), hashes)
+                for key, hashes in attachments.items() if hashes}
+    source.close()
+
+    for key in sorted(copied):
+        manager.get(key).rebuild_rollups()
+        print(f"✅ {key}: {copied[key]} rows, {attached.get(key, 0)} attachments -> {manager.path(key)}")
+    manager.close()
+    if skipped:
+        print(f"❌ Skipped {sum(skipped.values())} rows from unmapped teachers: "
+              f"{', '.join(f'{teacher} ({count})' for teacher, count in skipped.most_common())}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
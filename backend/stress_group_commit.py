@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Hammer content writes from many threads and compare writes/sec with and
+without group commit (one writer thread committing queued writes together).
+
+Each write is what creating a content item costs: the row insert, the
+rollup update and the change-log entry, committed as one unit.
+
+    python stress_group_commit.py --threads 32 --writes 200 --interval-ms 1 --batch 256
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from core.sqlite_db import SQLiteDB
+from models.data_model import SchoolContent
+
+
+def create(db: SQLiteDB, i: int) -> int:
+    content = SchoolContent(
+        teacher_id="t101", class_name=f"Class {i % 12 + 1}", subject="Maths",
+        date_uploaded=date(2024, 11, i % 28 + 1), content_type="homework", title=f"Stress {i}",
+    )
+    content.content_id, _ = db.insert_content_logged(content)
+    return content.content_id
+
+
+def run(group_commit: bool, threads: int, writes: int, interval: float, batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDB(os.path.join(tmp, "stress.db"), group_commit=group_commit,
+                      flush_interval=interval, max_batch=batch)
+        ids, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(n):
+            barrier.wait()
+            for i in range(writes):
+                try:
+                    content_id = create(db, n * writes + i)
+                    with lock:
+                        ids.append(content_id)
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stored = db.fetch_one("SELECT COUNT(*) AS n FROM school_content")["n"]
+        rollup = db.get_rollup("teacher").get("t101", 0)
+        stats = db.pool_stats().get("group_commit")
+        db.close()
+
+    return {
+        "mode": "group commit" if group_commit else "per-write commit",
+        "writes": len(ids),
+        "errors": errors,
+        "seconds": elapsed,
+        "writes_per_sec": len(ids) / elapsed if elapsed else 0.0,
+        # Every caller must get its own id, and every acknowledged write must be stored and counted
+        "consistent": len(set(ids)) == len(ids) == stored == rollup,
+        "group_commit": stats,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=100, help="writes per thread")
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="group-commit flush interval")
+    parser.add_argument("--batch", type=int, default=256, help="group-commit max batch size")
+    args = parser.parse_args()
+
+    results = [run(mode, args.threads, args.writes, args.interval_ms / 1000, args.batch) for mode in (False, True)]
+
+    print(f"{args.threads} threads x {args.writes} writes "
+          f"(batch window {args.interval_ms:g} ms, at most {args.batch} writes per commit)\n")
+    for result in results:
+        line = f"{result['mode']:<18} {result['writes']:>7} writes  {result['seconds']:7.2f}s  " \
+               f"{result['writes_per_sec']:9.0f} writes/sec"
+        if result["group_commit"]:
+            line += f"  (avg batch {result['group_commit']['avg_batch']}, {result['group_commit']['batches']} commits)"
+        print(line)
+    baseline, grouped = results
+    if baseline["writes_per_sec"]:
+        print(f"\nSpeed-up: {grouped['writes_per_sec'] / baseline['writes_per_sec']:.2f}x")
+
+    failed = [result["mode"] for result in results if result["errors"] or not result["consistent"]]
+    if failed:
+        for result in results:
+            for error in result["errors"][:5]:
+                print(f"   {result['mode']}: {error}")
+        print(f"\n❌ Lost or failed writes: {', '.join(failed)}")
+        return 1
+    print("✅ Every write committed exactly once in both modes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
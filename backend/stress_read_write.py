@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Run long analytics reads and content writes side by side, with and without
+split reads (read-only reader pool plus one writer connection), and report
+latencies and connection waits per pool.
+
+Every writer reads its row back right after creating it, so the run also
+fails if a read ever misses the caller's own write.
+
+    python stress_read_write.py --rows 20000 --readers 8 --writers 8 --seconds 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from benchmarks.datasets import populate
+from core import metrics
+from core.sqlite_db import SQLiteDB
+from models.data_model import SchoolContent
+
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run(split_reads: bool, rows: int, readers: int, writers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # Enough connections for every thread, so the comparison is about locking, not pool size
+        db = SQLiteDB(os.path.join(tmp, "stress.db"), pool_size=readers + writers, split_reads=split_reads)
+        populate(db, rows)
+        read_times, write_times, missed, errors = [], [], [], []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                db.get_department_analytics()
+                db.get_all_contents_json()
+                with lock:
+                    read_times.append(time.perf_counter() - start)
+
+        def writer(n):
+            i = 0
+            while not stop.is_set():
+                content = SchoolContent(
+                    teacher_id="t101", class_name="Class 1", subject="Maths", date_uploaded=date(2024, 11, 1),
+                    content_type="homework", title=f"Stress {n}-{i}",
+                )
+                start = time.perf_counter()
+                try:
+                    content_id, _ = db.insert_content_logged(content)
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                # Read-your-writes: the caller's own row must be visible straight away
+                if db.get_content_by_id(content_id) is None:
+                    with lock:
+                        missed.append(content_id)
+                with lock:
+                    write_times.append(elapsed)
+                i += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stats = db.pool_stats()
+        db.close()
+
+    return {
+        "mode": "split reads" if split_reads else "shared pool",
+        "reads": len(read_times),
+        "read_p50_ms": statistics.median(read_times) * 1000 if read_times else 0.0,
+        "writes": len(write_times),
+        "writes_per_sec": len(write_times) / seconds,
+        "write_p50_ms": statistics.median(write_times) * 1000 if write_times else 0.0,
+        "write_p99_ms": percentile(write_times, 0.99) * 1000,
+        "missed": missed,
+        "errors": errors,
+        "pools": {name: stats[name] for name in ("writer", "readers") if name in stats},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="content rows to seed")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads")
+    parser.add_argument("--writers", type=int, default=4, help="writer threads")
+    parser.add_argument("--seconds", type=float, default=3.0, help="how long each mode runs")
+    args = parser.parse_args()
+
+    results = [run(split, args.rows, args.readers, args.writers, args.seconds) for split in (False, True)]
+
+    print(f"{args.rows} rows, {args.readers} readers, {args.writers} writers, {args.seconds:g}s per mode\n")
+    for result in results:
+        print(f"{result['mode']:<12} reads {result['reads']:>6} (p50 {result['read_p50_ms']:7.1f} ms)   "
+              f"writes {result['writes']:>6} ({result['writes_per_sec']:7.0f}/s, "
+              f"p50 {result['write_p50_ms']:6.2f} ms, p99 {result['write_p99_ms']:7.2f} ms)")
+        for name, pool in result["pools"].items():
+            print(f"    {name:<8} {pool['size']} conn  waited {pool['waited_checkouts']:>6}/{pool['checkouts']:<7} "
+                  f"avg wait {pool['avg_wait_ms']:.3f} ms  max wait {pool['max_wait_ms']:.1f} ms")
+
+    print("\nPool waits as exported at /metrics:")
+    for line in metrics.registry.render().splitlines():
+        if line.startswith(("digischool_db_pool_waits_total", "digischool_db_pool_wait_seconds_count")):
+            print(f"    {line}")
+
+    failed = [result["mode"] for result in results if result["missed"] or result["errors"]]
+    if failed:
+        for result in results:
+            for error in result["errors"][:5]:
+                print(f"   {result['mode']}: {error}")
+            if result["missed"]:
+                print(f"   {result['mode']}: {len(result['missed'])} writes not visible to their own read-back")
+        print(f"\n❌ Failed: {', '.join(failed)}")
+        return 1
+    print("\n✅ Every write was visible to its own read-back in both modes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
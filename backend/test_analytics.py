@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the analytics bundle: every series agrees with the rollups served by
+the separate analytics endpoints, and a days window moves with the date
+even when no write bumps the data version. One school shard lives in a
+temporary directory; "today" is pinned per test
+"""
+
+from datetime import date, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import shards
+from core.shards import ShardManager
+from core.tenancy import TenantMiddleware
+from models.data_model import SchoolContent
+from routers import school
+from services import school_service
+
+ALPHA = {"X-School-Id": "alpha"}
+TODAY = date(2024, 11, 10)
+ROWS = [
+    ("t101", "Maths", "homework", 1), ("t101", "Maths", "notes", 3), ("t102", "Science", "homework", 3),
+    ("t102", "English", "announcement", 8), ("t103", "Maths", "homework", 9), ("t101", "History", "notes", 10),
+]
+
+
+class Today:
+    """Stands in for datetime.date in the modules that ask for today; set .value to move the clock."""
+    value = TODAY
+
+    @classmethod
+    def today(cls):
+        return cls.value
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    manager = ShardManager(str(tmp_path / "shards"), pool_size=1)
+    manager.create("alpha").insert_contents_logged([
+        SchoolContent(teacher_id=teacher, class_name="Class 1", subject=subject, content_type=content_type,
+                      date_uploaded=TODAY - timedelta(days=10 - day), title=f"{subject} {day}")
+        for teacher, subject, content_type, day in ROWS
+    ])
+    monkeypatch.setattr(shards, "shard_manager", manager)
+    monkeypatch.setattr(Today, "value", TODAY)
+    monkeypatch.setattr(school_service, "date", Today)
+    monkeypatch.setattr(school, "date", Today)
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    yield TestClient(TenantMiddleware(app, known=manager.exists))
+    manager.close()
+
+
+def get(client, path, **params):
+    response = client.get(path, params=params, headers=ALPHA)
+    assert response.status_code == 200
+    return response.json()
+
+
+def pairs(series: dict) -> dict:
+    return dict(zip(series["labels"], series["counts"]))
+
+
+def test_bundle_matches_the_rollup_endpoints(client):
+    bundle = get(client, "/schools/analytics/bundle", top_subjects=100, top_teachers=100)
+    assert pairs(bundle["content_types"]) == get(client, "/schools/analytics/rollups/content_type")
+    assert pairs(bundle["subjects"]) == get(client, "/schools/analytics/rollups/subject")
+    assert pairs(bundle["upload_trend"]) == get(client, "/schools/analytics/rollups/day")
+    assert dict(zip(bundle["teachers"]["ids"], bundle["teachers"]["counts"])) == \
+        get(client, "/schools/analytics/rollups/teacher")
+    assert bundle["subjects"]["labels"][0] == "Maths"
+
+    top = get(client, "/schools/analytics/bundle", top_subjects=2, top_teachers=1)
+    assert top["subjects"]["labels"] == bundle["subjects"]["labels"][:2]
+    assert top["teachers"]["ids"] == bundle["teachers"]["ids"][:1]
+
+
+def test_days_window_follows_the_date(client):
+    days = get(client, "/schools/analytics/rollups/day")
+    window = get(client, "/schools/analytics/bundle", days=3)["upload_trend"]
+    assert window["labels"] == [day for day in sorted(days) if day >= "2024-11-08"]
+
+    first = client.get("/schools/analytics/bundle", params={"days": 3}, headers=ALPHA)
+    Today.value = TODAY + timedelta(days=1)
+    # Same data version, but a new day: the old tag is no longer current and the window moves
+    moved = client.get("/schools/analytics/bundle", params={"days": 3},
+                       headers={**ALPHA, "If-None-Match": first.headers["etag"]})
+    assert moved.status_code == 200 and moved.headers["etag"] != first.headers["etag"]
+    assert moved.json()["upload_trend"]["labels"] == [day for day in sorted(days) if day >= "2024-11-09"]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test attachment upload and download: identical uploads are stored once,
+Range requests get a 206, an upload over the size limit gets a 413 and
+leaves no temp file, a school can't download another school's blob, and
+content can't reference a blob that was never uploaded. Two school shards
+and the blob store live in a temporary directory
+"""
+
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import shards
+from core.attachments import AttachmentStore
+from core.shards import ShardManager
+from core.tenancy import TenantMiddleware
+from routers import school
+from services import school_service
+
+ALPHA = {"X-School-Id": "alpha"}
+BETA = {"X-School-Id": "beta"}
+MAX_BYTES = 1024
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = AttachmentStore(str(tmp_path / "attachments"), max_bytes=MAX_BYTES)
+    monkeypatch.setattr(school, "attachment_store", store)
+    monkeypatch.setattr(school_service, "attachment_store", store)
+    return store
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, store):
+    manager = ShardManager(str(tmp_path / "shards"), pool_size=1)
+    for key in ("alpha", "beta"):
+        manager.create(key)
+    monkeypatch.setattr(shards, "shard_manager", manager)
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    yield TestClient(TenantMiddleware(app, known=manager.exists))
+    manager.close()
+
+
+def upload(client, data: bytes, filename: str = "notes.txt", media_type: str = "text/plain",
+           headers: dict = ALPHA):
+    return client.post("/schools/attachments", files={"file": (filename, data, media_type)}, headers=headers)
+
+
+def test_upload_and_dedupe(client, store):
+    first = upload(client, b"chapter one")
+    assert first.status_code == 200
+    [stored] = first.json()
+    assert stored["ref"] == "sha256:" + stored["sha256"]
+    assert not stored["deduplicated"] and not stored["already_recorded"]
+
+    [again] = upload(client, b"chapter one", filename="copy.md", media_type="text/markdown").json()
+    assert again["sha256"] == stored["sha256"] and again["deduplicated"]
+    # The school already had this blob, so it keeps the first upload's name and type
+    assert again["already_recorded"]
+    assert (again["filename"], again["media_type"]) == ("notes.txt", "text/plain")
+    assert store.stats()["stored"] == 1 and store.stats()["deduplicated"] == 1
+
+    response = client.get(stored["url"], headers=ALPHA)
+    assert response.status_code == 200 and response.content == b"chapter one"
+
+
+def test_range_request_gets_partial_content(client):
+    [stored] = upload(client, b"0123456789").json()
+    response = client.get(stored["url"], headers={**ALPHA, "Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+
+
+def test_oversized_upload_is_rejected_and_cleaned_up(client, store):
+    response = upload(client, b"x" * (MAX_BYTES + 1))
+    assert response.status_code == 413
+    assert os.listdir(store.tmp_dir()) == []
+    assert store.stats()["stored"] == 0
+
+
+def test_other_school_cannot_download(client):
+    [stored] = upload(client, b"alpha only").json()
+    assert client.get(stored["url"], headers=BETA).status_code == 404
+    assert client.get(stored["url"], headers=ALPHA).status_code == 200
+
+
+def test_content_cannot_reference_a_missing_blob(client):
+    content = {"teacher_id": "t101", "class_name": "Class 1", "content_type": "notes", "title": "Notes"}
+    missing = "sha256:" + "0" * 64
+    response = client.post("/schools/", json={**content, "attachment_urls": [missing]}, headers=ALPHA)
+    assert response.status_code == 400
+    assert "Unknown attachment" in response.json()["detail"]
+
+    [stored] = upload(client, b"real notes").json()
+    response = client.post("/schools/", json={**content, "attachment_urls": [stored["ref"]]}, headers=ALPHA)
+    assert response.status_code == 200
+    assert response.json()["attachment_urls"] == [stored["ref"]]
+    # Uploaded to alpha, so beta can't reference it
+    response = client.post("/schools/", json={**content, "attachment_urls": [stored["ref"]]}, headers=BETA)
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test bulk import parsing: a line that is not UTF-8 or a CSV cell over the
+field size limit becomes an error for its row while the rows around it
+still parse, and POST /schools/bulk reports them instead of failing with a
+400. import_contents is replaced by a recorder, so no database is used
+"""
+
+import csv
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import school
+from services import school_service
+from services.bulk_io import parse_records
+
+CSV_BODY = (
+    b"teacher_id,class_name,content_type,title\r\n"
+    b"t101,Class 1,homework,First\r\n"
+    b"t101,Class 1,homework,Caf\xe9\r\n"
+    + "t101,Class 2,notes,Thé\r\n".encode()
+)
+
+
+def lines(body: bytes) -> list:
+    return body.splitlines(keepends=True)
+
+
+def summary(records) -> list:
+    return [(number, str(record) if isinstance(record, Exception) else record["title"])
+            for number, record in records]
+
+
+def test_bad_utf8_line_is_a_row_error():
+    assert summary(parse_records(lines(CSV_BODY), "csv")) == [
+        (2, "First"), (3, "Not valid UTF-8 (line 3)"), (4, "Thé"),
+    ]
+    body = b'{"title": "A"}\n{"title": "\xff"}\n\n{"title": "B"}\n'
+    assert summary(parse_records(lines(body), "ndjson")) == [
+        (1, "A"), (2, "Not valid UTF-8 (line 2)"), (4, "B"),
+    ]
+
+
+def test_oversized_csv_field_is_a_row_error():
+    huge = "x" * (csv.field_size_limit() + 1)
+    body = f"teacher_id,title\nt101,Before\nt101,{huge}\nt101,After\n".encode()
+    records = summary(parse_records(lines(body), "csv"))
+    assert [number for number, _ in records] == [2, 3, 4]
+    assert records[0][1] == "Before" and records[2][1] == "After"
+    assert records[1][1].startswith("Invalid CSV: field larger than field limit")
+
+
+@pytest.fixture
+def imported(monkeypatch):
+    batches = []
+
+    def import_contents(records, batch_size):
+        rows = list(records)
+        batches.append(rows)
+        errors = [{"row": number, "error": str(record)} for number, record in rows if isinstance(record, Exception)]
+        return {"inserted": len(rows) - len(errors), "failed": len(errors), "errors": errors}
+
+    monkeypatch.setattr(school_service, "import_contents", import_contents)
+    return batches
+
+
+def test_bulk_endpoint_reports_bad_lines(imported):
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    response = TestClient(app).post("/schools/bulk?format=csv", content=CSV_BODY)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2, "failed": 1,
+                               "errors": [{"row": 3, "error": "Not valid UTF-8 (line 3)"}]}
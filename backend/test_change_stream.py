@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the change feed stream: open /schools/changes/stream?since=0 and read
+its first event, and check that a client whose changes were pruned from
+the log is told to reload, by /schools/changes and by the stream. The
+change log is a local fake, so no database is used.
+The app is driven over ASGI directly, since the stream never ends on its
+own and TestClient waits for the whole body
+"""
+
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import school
+from services import school_service
+
+CHANGE = {"seq": 1, "op": "insert", "content_id": 5, "changed_at": "2024-11-05T09:00:00", "payload": None}
+
+
+@pytest.fixture
+def change_log(monkeypatch):
+    monkeypatch.setattr(school_service, "latest_change_seq", lambda: CHANGE["seq"])
+    monkeypatch.setattr(school_service, "get_changes",
+                        lambda since, limit: [CHANGE] if since < CHANGE["seq"] else [])
+
+
+async def first_event(path: str, query: str) -> tuple:
+    """Run a GET until the first SSE event arrives, then disconnect. Returns (status, headers, event)."""
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    start, body, done = {}, b"", asyncio.Event()
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            body += message.get("body", b"")
+            if b"\n\n" in body:
+                done.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "headers": [], "client": ("test", 1), "server": ("test", 80), "root_path": ""}
+    await asyncio.wait_for(app(scope, receive, send), timeout=10)
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start["status"], headers, body.split(b"\n\n")[0].decode()
+
+
+def test_stream_sends_first_change(change_log):
+    status, headers, event = asyncio.run(first_event("/schools/changes/stream", "since=0"))
+
+    assert status == 200
+    assert headers["content-type"].startswith("text/event-stream")
+    fields = dict(line.split(": ", 1) for line in event.splitlines())
+    assert fields["id"] == "1"
+    assert fields["event"] == "insert"
+    assert json.loads(fields["data"]) == CHANGE
+
+
+def test_pruned_changes_ask_for_a_reload(monkeypatch):
+    # The log only reaches back to seq 5: a client at seq 1 missed 2-4
+    monkeypatch.setattr(school_service, "latest_change_seq", lambda: 9)
+    monkeypatch.setattr(school_service, "read_latest_change_seq", lambda: 9)
+    monkeypatch.setattr(school_service, "get_changes",
+                        lambda since, limit: [{**CHANGE, "seq": seq} for seq in range(max(since + 1, 5), 10)])
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    client = TestClient(app)
+
+    assert client.get("/schools/changes?since=1").json() == {"changes": [], "last_seq": 9, "reset": True}
+    current = client.get("/schools/changes?since=4").json()
+    assert [change["seq"] for change in current["changes"]] == [5, 6, 7, 8, 9] and not current["reset"]
+
+    _, _, event = asyncio.run(first_event("/schools/changes/stream", "since=1"))
+    fields = dict(line.split(": ", 1) for line in event.splitlines())
+    assert (fields["event"], fields["id"], json.loads(fields["data"])) == ("reset", "9", {"last_seq": 9})
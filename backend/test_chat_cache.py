@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the chat response cache: repeated questions are served from it, a
+data-version bump or a different agent misses, and the disk tier survives
+a fresh cache and keeps answers still in use when it is pruned. The agent is a local fake and the data version a counter,
+so no database or model is used
+"""
+
+import os
+import tempfile
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import school
+from services import school_service
+from agent import chat_cache
+from agent.chat_cache import ChatCache
+
+
+class FakeAgent:
+    """Stands in for root_agent: numbers its answers so a cached one is recognisable."""
+
+    def __init__(self, instruction="Be helpful."):
+        self.instruction = instruction
+        self.messages = []
+
+    async def run_live(self, message):
+        self.messages.append(message)
+        yield SimpleNamespace(text=f"answer {len(self.messages)}")
+
+
+@pytest.fixture
+def version(monkeypatch):
+    current = [1]
+    monkeypatch.setattr(school_service, "read_data_version", lambda: current[0])
+    return current
+
+
+def make_client(agent, cache) -> TestClient:
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    app.dependency_overrides[school.get_chat_agent] = lambda: agent
+    app.dependency_overrides[school.get_chat_cache] = lambda: cache
+    return TestClient(app)
+
+
+def ask(client, message, **headers):
+    response = client.post("/schools/chat", json={"message": message}, headers=headers)
+    return response.json()["response"], response.headers.get("x-cache")
+
+
+def test_repeated_question_is_served_from_cache(version):
+    agent = FakeAgent()
+    client = make_client(agent, ChatCache())
+
+    assert ask(client, "What homework is due today?") == ("answer 1", "MISS")
+    assert ask(client, "what homework is due today") == ("answer 1", "HIT")
+    assert ask(client, "What homework is due today?", **{"Cache-Control": "no-cache"}) == ("answer 2", "BYPASS")
+    assert agent.messages == ["What homework is due today?"] * 2
+
+
+def test_content_write_invalidates(version):
+    agent = FakeAgent()
+    client = make_client(agent, ChatCache())
+
+    ask(client, "show this week's announcements")
+    version[0] += 1
+    assert ask(client, "show this week's announcements") == ("answer 2", "MISS")
+    assert ask(client, "show this week's announcements") == ("answer 2", "HIT")
+
+
+def test_agent_configuration_is_part_of_the_key(version):
+    cache = ChatCache()
+    ask(make_client(FakeAgent("Be helpful."), cache), "hello")
+    assert ask(make_client(FakeAgent("Be brief."), cache), "hello") == ("answer 1", "MISS")
+    assert ask(make_client(FakeAgent("Be helpful."), cache), "hello") == ("answer 1", "HIT")
+
+
+def test_stream_replays_cached_answer(version):
+    client = make_client(FakeAgent(), ChatCache())
+    first = client.post("/schools/chat/stream", json={"message": "summary"})
+    second = client.post("/schools/chat/stream", json={"message": "Summary!"})
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.text == first.text
+
+
+def test_memory_is_bounded():
+    cache = ChatCache(max_entries=2, max_bytes=10)
+    for key in ("a", "b", "c"):
+        cache.put(key, 1, "1234")
+    assert cache.get("a", 1) is None
+    assert cache.get("c", 1)[0] == "1234"
+    cache.put("d", 1, "12345678")
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 8
+
+
+def test_disk_tier_survives_a_fresh_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat_cache.db")
+        first = ChatCache(path=path)
+        first.put("key", 7, "cached answer")
+        first.close()
+
+        second = ChatCache(path=path)
+        assert second.get("key", 8) is None
+        assert second.get("key", 7) is None  # the stale row was dropped on the version-8 lookup
+        second.put("key", 8, "newer answer")
+        third = ChatCache(path=path)
+        assert third.get("key", 8)[0] == "newer answer"
+        assert second.stats()["disk"]["entries"] == 1
+        second.close()
+        third.close()
+
+
+def test_memory_hits_keep_the_disk_copy_from_being_pruned(monkeypatch):
+    monkeypatch.setattr(chat_cache, "_PRUNE_EVERY", 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat_cache.db")
+        cache = ChatCache(path=path, max_disk_entries=2)
+        cache.put("hot", 1, "asked often")
+        cache.put("cold", 1, "asked once")
+        assert cache.get("hot", 1)[0] == "asked often"  # served from memory
+        cache.put("new", 1, "just asked")
+
+        fresh = ChatCache(path=path)
+        assert fresh.get("hot", 1)[0] == "asked often"
+        assert fresh.get("cold", 1) is None
+        cache.close()
+        fresh.close()
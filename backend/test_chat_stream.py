@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the streaming chat endpoint against a local fake agent that yields scripted chunks
+"""
+
+import json
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import school
+
+
+class FakeAgent:
+    """Stands in for root_agent: replays a fixed script of chunks from run_live."""
+
+    def __init__(self, chunks, fail_with=None):
+        self.chunks = chunks
+        self.fail_with = fail_with
+
+    async def run_live(self, message):
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail_with:
+            raise self.fail_with
+
+
+def make_client(agent) -> TestClient:
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    app.dependency_overrides[school.get_chat_agent] = lambda: agent
+    # No response cache: every message must reach the agent under test
+    app.dependency_overrides[school.get_chat_cache] = lambda: None
+    return TestClient(app)
+
+
+def read_events(response) -> list:
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_yields_chunks_in_order():
+    client = make_client(FakeAgent([SimpleNamespace(text="Here is "), SimpleNamespace(text="your homework.")]))
+    response = client.post("/schools/chat/stream", json={"message": "show homework"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert read_events(response) == [
+        ("chunk", {"text": "Here is "}),
+        ("chunk", {"text": "your homework."}),
+        ("done", {}),
+    ]
+
+
+def test_stream_reports_tool_progress():
+    call = SimpleNamespace(name="get_todays_homework", args={})
+    tool_event = SimpleNamespace(
+        get_function_calls=lambda: [call],
+        get_function_responses=lambda: [],
+        content=SimpleNamespace(parts=[SimpleNamespace(text=None)]),
+    )
+    result_event = SimpleNamespace(
+        get_function_calls=lambda: [],
+        get_function_responses=lambda: [SimpleNamespace(name="get_todays_homework")],
+        content=SimpleNamespace(parts=[SimpleNamespace(text="No homework today.")]),
+    )
+    client = make_client(FakeAgent([tool_event, result_event]))
+    events = read_events(client.post("/schools/chat/stream", json={"message": "today's homework?"}))
+
+    assert [event for event, _ in events] == ["tool_call", "tool_result", "chunk", "done"]
+    assert events[0][1] == {"name": "get_todays_homework", "args": {}}
+
+
+def test_stream_ends_with_error_event():
+    client = make_client(FakeAgent([SimpleNamespace(text="partial")], fail_with=RuntimeError("model down")))
+    events = read_events(client.post("/schools/chat/stream", json={"message": "hi"}))
+
+    assert events[-1] == ("error", {"detail": "Agent error: model down"})
+
+
+def test_buffered_chat_uses_same_agent():
+    client = make_client(FakeAgent([SimpleNamespace(text="Hello"), SimpleNamespace(text=" teacher")]))
+    response = client.post("/schools/chat", json={"message": "hi"})
+
+    assert response.json() == {"response": "Hello teacher", "data": None}
+
+
+if __name__ == "__main__":
+    test_stream_yields_chunks_in_order()
+    test_stream_reports_tool_progress()
+    test_stream_ends_with_error_event()
+    test_buffered_chat_uses_same_agent()
+    print("✅ All streaming chat tests passed!")
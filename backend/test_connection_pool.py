@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite connection pools: analyze() drops the idle readers but the
+pool keeps handing out and reusing connections afterwards, while a closed
+pool closes connections as they come back. Runs on temporary databases
+"""
+
+import pytest
+from core.sqlite_db import ConnectionPool, SQLiteDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDB(str(tmp_path / "pool.db"), pool_size=2, seed_sample_data=False)
+    yield database
+    database.close()
+
+
+def test_reads_reuse_connections_after_analyze(db):
+    db.fetch_all("SELECT 1")
+    assert db.readers.stats()["open_connections"] == 1
+    db.analyze()
+    assert db.readers.stats()["open_connections"] == 0
+
+    with db.readers.connection() as first:
+        pass
+    with db.readers.connection() as second:
+        assert second is first
+    db.fetch_all("SELECT 1")
+    assert db.readers.stats()["open_connections"] == 1
+
+
+def test_release_after_close_closes_the_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "closed.db"), size=2)
+    kept = pool.acquire()
+    pool.release(pool.acquire())
+    pool.close()
+    assert pool.stats()["open_connections"] == 1
+
+    pool.release(kept)
+    assert pool.stats()["open_connections"] == 0
+    with pytest.raises(Exception):
+        kept.execute("SELECT 1")
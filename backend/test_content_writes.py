@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test that a content write commits its row, its rollup deltas and its change
+log entry together: each write leaves rollups matching a full rebuild and
+one change per row, a write whose change log entry fails leaves no row and
+no rollup behind, and a reader never sees one data version with two
+different rollups. The change log keeps only its newest entries. Runs on
+temporary databases, with and without group commit
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+import pytest
+from core.sqlite_db import SQLiteDB
+from models.data_model import SchoolContent
+
+
+@pytest.fixture(params=[True, False], ids=["group-commit", "direct"])
+def db(request):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = SQLiteDB(os.path.join(tmp, "writes.db"), group_commit=request.param)
+        yield database
+        database.close()
+
+
+def content(title: str, subject: str = "Maths") -> SchoolContent:
+    return SchoolContent(teacher_id="t101", class_name="Class 1", subject=subject,
+                         date_uploaded=date(2024, 11, 5), content_type="homework", title=title)
+
+
+def rebuilt(db: SQLiteDB) -> dict:
+    rollups = db.get_rollups()
+    db.rebuild_rollups()
+    assert db.get_rollups() == rollups
+    return rollups
+
+
+def test_writes_keep_rollups_and_change_log_in_step(db):
+    content_id, seq = db.insert_content_logged(content("One"))
+    ids, last_seq = db.insert_contents_logged([content(f"Bulk {i}") for i in range(3)])
+    assert last_seq == seq + 3
+    before, updated, update_seq = db.update_content_logged(content_id, {"subject": "Science"})
+    assert (before.subject, updated.subject, update_seq) == ("Maths", "Science", last_seq + 1)
+    deleted, delete_seq = db.delete_content_logged(ids[0])
+    assert deleted.title == "Bulk 0" and delete_seq == update_seq + 1
+
+    rollups = rebuilt(db)
+    assert rollups["subject"] == {"Maths": 2, "Science": 1}
+    assert [(change["op"], change["content_id"]) for change in db.get_changes()] == [
+        ("insert", content_id), *[("insert", i) for i in ids], ("update", content_id), ("delete", ids[0]),
+    ]
+    assert db.get_changes()[3]["payload"]["title"] == "Bulk 2"
+
+
+def test_missing_rows_write_nothing(db):
+    assert db.update_content_logged(999, {"title": "Nope"}) is None
+    assert db.delete_content_logged(999) is None
+    assert db.get_changes() == []
+
+
+def test_failed_change_log_rolls_back_the_row(db):
+    content_id, _ = db.insert_content_logged(content("Kept"))
+    with db.connect() as conn:
+        conn.execute("ALTER TABLE content_changes RENAME TO content_changes_moved")
+    with pytest.raises(sqlite3.OperationalError):
+        db.insert_content_logged(content("Lost"))
+    with pytest.raises(sqlite3.OperationalError):
+        db.update_content_logged(content_id, {"subject": "Science"})
+
+    assert [row["title"] for row in db.fetch_all("SELECT title FROM school_content")] == ["Kept"]
+    assert rebuilt(db)["subject"] == {"Maths": 1}
+
+
+def test_data_version_moves_with_the_rollups(db):
+    seen, mismatched, stop = {}, [], threading.Event()
+
+    def read():
+        while not stop.is_set():
+            with db.read_connection() as conn:
+                conn.execute("BEGIN")
+                version = conn.execute("SELECT value FROM app_meta WHERE key = 'data_version'").fetchone()[0]
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(count), 0) FROM content_rollups WHERE dimension = 'teacher'"
+                ).fetchone()[0]
+                conn.commit()
+            if seen.setdefault(version, total) != total:
+                mismatched.append(version)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        ids = [db.insert_content_logged(content(f"Row {i}"))[0] for i in range(40)]
+        for content_id in ids[::2]:
+            db.delete_content_logged(content_id)
+        version = db.get_data_version()
+        db.rebuild_rollups()
+        assert db.get_data_version() == version + 1
+    finally:
+        stop.set()
+        reader.join()
+    assert len(seen) > 1 and mismatched == []
+
+
+def test_change_log_keeps_the_newest_entries(db):
+    db.change_log_retain = 3
+    first, _ = db.insert_content_logged(content("One"))
+    ids, seq = db.insert_contents_logged([content(f"Bulk {i}") for i in range(3)])
+    assert [change["seq"] for change in db.get_changes()] == [seq - 2, seq - 1, seq]
+    db.delete_content_logged(first)
+    assert [change["content_id"] for change in db.get_changes()] == [ids[1], ids[2], first]
+
+    # A lower limit is applied when the database is next opened
+    reopened = SQLiteDB(db.db_path, group_commit=False, change_log_retain=1)
+    try:
+        assert [change["op"] for change in reopened.get_changes()] == ["delete"]
+    finally:
+        reopened.close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test natural-language date ranges against a fixed "today", and that the
+range reaches SQL as a BETWEEN on date_uploaded
+"""
+
+from datetime import date
+from agent.dates import parse_date_range
+from agent.utils import parse_natural_date
+from core.sqlite_db import SQLiteDB
+
+TODAY = date(2024, 11, 7)  # a Thursday
+
+CASES = [
+    ("today", (date(2024, 11, 7), date(2024, 11, 7))),
+    ("Yesterday", (date(2024, 11, 6), date(2024, 11, 6))),
+    ("November 5th", (date(2024, 11, 5), date(2024, 11, 5))),
+    ("on Nov 5", (date(2024, 11, 5), date(2024, 11, 5))),
+    ("Dec 1st", (date(2023, 12, 1), date(2023, 12, 1))),
+    ("5 November 2023", (date(2023, 11, 5), date(2023, 11, 5))),
+    ("2024-10-31", (date(2024, 10, 31), date(2024, 10, 31))),
+    ("Monday", (date(2024, 11, 4), date(2024, 11, 4))),
+    ("last Friday", (date(2024, 11, 1), date(2024, 11, 1))),
+    ("this week", (date(2024, 11, 4), date(2024, 11, 10))),
+    ("last week", (date(2024, 10, 28), date(2024, 11, 3))),
+    ("past week", (date(2024, 11, 1), date(2024, 11, 7))),
+    ("this month", (date(2024, 11, 1), date(2024, 11, 30))),
+    ("last month", (date(2024, 10, 1), date(2024, 10, 31))),
+    ("in October", (date(2024, 10, 1), date(2024, 10, 31))),
+    ("last 3 days", (date(2024, 11, 5), date(2024, 11, 7))),
+    ("2 days ago", (date(2024, 11, 5), date(2024, 11, 5))),
+    ("since Monday", (date(2024, 11, 4), date(2024, 11, 7))),
+    ("between Nov 1 and Nov 10", (date(2024, 11, 1), date(2024, 11, 10))),
+    ("from Oct 28 to Nov 1", (date(2024, 10, 28), date(2024, 11, 1))),
+    ("between Dec 20 and Jan 5", (date(2023, 12, 20), date(2024, 1, 5))),
+    ("before Nov 1", (date.min, date(2024, 10, 31))),
+    ("Feb 30", None),
+    ("next friday", None),
+    ("class 10", None),
+]
+
+
+def test_phrases_parse_to_ranges():
+    mismatches = [(text, parse_date_range(text, TODAY)) for text, expected in CASES
+                  if parse_date_range(text, TODAY) != expected]
+    assert mismatches == []
+
+
+def test_parse_natural_date_keeps_its_contract():
+    today = date.today().isoformat()
+    assert parse_natural_date("2024-11-05") == "2024-11-05"
+    assert parse_natural_date("today") == today
+    assert parse_natural_date("last week") == parse_date_range("last week")[0].isoformat()
+    assert parse_natural_date("no date here") == today
+
+
+def test_range_is_pushed_into_sql():
+    db = SQLiteDB(":memory:")
+    where, params = db._content_filters("homework", *parse_date_range("between Nov 1 and Nov 10", TODAY))
+    assert where == " WHERE content_type_norm = ? AND date_uploaded BETWEEN ? AND ?"
+    assert params == ["homework", "2024-11-01", "2024-11-10"]
+    db.close()
+
+
+if __name__ == "__main__":
+    test_phrases_parse_to_ranges()
+    test_parse_natural_date_keeps_its_contract()
+    test_range_is_pushed_into_sql()
+    print("✅ All date range tests passed!")
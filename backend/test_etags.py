@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the ETags on read routes: a repeat request with the current tag gets a
+304, and a write made through another connection to the same database, as
+another worker process would make it, changes the tag on the very next
+request. One school shard lives in a temporary directory
+"""
+
+from datetime import date
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import shards
+from core.shards import ShardManager
+from core.sqlite_db import SQLiteDB
+from core.tenancy import TenantMiddleware
+from models.data_model import SchoolContent
+from routers import school
+
+ALPHA = {"X-School-Id": "alpha"}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = ShardManager(str(tmp_path / "shards"), pool_size=1)
+    manager.create("alpha")
+    monkeypatch.setattr(shards, "shard_manager", manager)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def client(manager):
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    return TestClient(TenantMiddleware(app, known=manager.exists))
+
+
+def test_matching_tag_gets_not_modified(client):
+    first = client.get("/schools/", headers=ALPHA)
+    assert first.status_code == 200
+    again = client.get("/schools/", headers={**ALPHA, "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_write_from_another_process_changes_the_tag_at_once(client, manager):
+    first = client.get("/schools/", headers=ALPHA)
+    assert first.json() == []
+
+    other = SQLiteDB(manager.path("alpha"), pool_size=1, seed_sample_data=False)
+    try:
+        other.insert_content_logged(SchoolContent(
+            teacher_id="t101", class_name="Class 1", subject="Maths", date_uploaded=date(2024, 11, 5),
+            content_type="homework", title="Fractions"))
+    finally:
+        other.close()
+
+    response = client.get("/schools/", headers={**ALPHA, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.headers["etag"] != first.headers["etag"]
+    assert [item["title"] for item in response.json()] == ["Fractions"]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the group-commit writer around close(): submits racing a close either
+commit or fail with WriterClosed (never hang), and a SQLiteDB whose writer
+was closed under it, as on shard eviction, still commits writes in their
+own transaction. Runs on temporary databases
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core.group_commit import GroupCommitWriter, WriterClosed
+from core.sqlite_db import ConnectionPool, SQLiteDB
+
+INSERT = "INSERT INTO t (n) VALUES (?)"
+
+
+@pytest.fixture
+def pool():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "writer.db"), size=1)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (n INTEGER)")
+        yield pool
+        pool.close()
+
+
+def test_submit_after_close_raises(pool):
+    writer = GroupCommitWriter(pool.connection)
+    assert writer.write(lambda conn: conn.execute(INSERT, (1,)).rowcount) == 1
+    writer.close()
+    writer.close()
+    with pytest.raises(WriterClosed):
+        writer.submit(lambda conn: conn.execute(INSERT, (2,)))
+
+
+def test_close_racing_submits_never_hangs(pool):
+    writer = GroupCommitWriter(pool.connection, flush_interval=0.001)
+    start = threading.Barrier(9)
+    committed, closed = [], []
+
+    def submit(n):
+        start.wait()
+        for i in range(50):
+            try:
+                writer.write(lambda conn: conn.execute(INSERT, (n * 100 + i,)))
+                committed.append(n * 100 + i)
+            except WriterClosed:
+                closed.append(n * 100 + i)
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(submit, n) for n in range(8)]
+        start.wait()
+        writer.close()
+        for future in futures:
+            future.result(timeout=10)
+
+    assert len(committed) + len(closed) == 400
+    with pool.connection() as conn:
+        assert sorted(row[0] for row in conn.execute("SELECT n FROM t")) == sorted(committed)
+
+
+def test_writes_fall_back_once_the_writer_is_closed():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDB(os.path.join(tmp, "evicted.db"), seed_sample_data=False, group_commit=True)
+        db.execute("CREATE TABLE t (n INTEGER)")
+        db.close()
+        assert db.execute(INSERT, (1,)) == 1
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM t")["n"] == 1
+        assert db.pool.stats()["open_connections"] == 0
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the chat intent fast path against a corpus of teacher phrasings, offline:
+tools and the fallback agent are local fakes, so no database or model is used
+"""
+
+import json
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import school
+from agent.intents import IntentRouter, match_intent, intent_stats
+from agent.shaping import shape_rows
+
+# (message, expected intent or None for the model, expected tool arguments)
+CORPUS = [
+    ("today's homework?", "todays_homework", ()),
+    ("Show me today's homework", "todays_homework", ()),
+    ("What homework is there today?", "todays_homework", ()),
+    ("any homework for today", "todays_homework", ()),
+    ("Homework due today please", "todays_homework", ()),
+    ("Show all homework given on November 5th", "homework_by_date", ("november 5th",)),
+    ("homework for Nov 5", "homework_by_date", ("nov 5",)),
+    ("homework on 2024-11-05", "homework_by_date", ("2024-11-05",)),
+    ("Dec 1st homework", "homework_by_date", ("dec 1st",)),
+    ("homework from yesterday", "homework_by_date", ("from yesterday",)),
+    ("Show homework given since Monday", "homework_by_date", ("since monday",)),
+    ("last week's homework", "homework_by_date", ("last week",)),
+    ("homework between Nov 1 and Nov 10", "homework_by_date", ("between nov 1 and nov 10",)),
+    ("What announcements were made this week?", "announcements_this_week", ()),
+    ("this week’s announcements", "announcements_this_week", ()),
+    ("Show announcements posted this week", "announcements_this_week", ()),
+    ("show notes", "content_by_type", ("notes",)),
+    ("List all announcements", "content_by_type", ("announcement",)),
+    ("homework", "content_by_type", ("homework",)),
+    ("Can you show me all the notes?", "content_by_type", ("notes",)),
+    ("Give me a summary", "content_summary", ()),
+    ("content summary please", "content_summary", ()),
+    ("How many items do we have?", "content_summary", ()),
+    # Anything with more to it than the fast path handles goes to the model
+    ("hi", None, ()),
+    ("Update the title of today's Maths homework", None, ()),
+    ("Show maths homework for today", None, ()),
+    ("Upload new notes for Class 10 English", None, ()),
+    ("Remove the old announcement about the annual day", None, ()),
+    ("homework next friday", None, ()),
+    ("show homework and announcements", None, ()),
+    ("notes for class 10", None, ()),
+    ("summary of last month's homework", None, ()),
+]
+
+
+class FakeAgent:
+    """Stands in for root_agent and records what reached it."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def run_live(self, message):
+        self.messages.append(message)
+        yield SimpleNamespace(text="from the model")
+
+
+def fake_tools(calls: list) -> dict:
+    rows = [{"title": "Algebra worksheet", "class_name": "Class 10", "subject": "Maths", "date_uploaded": "2024-11-05"}]
+    # List tools reach the fast path shaped, as they reach the model
+    results = {
+        "get_todays_homework": shape_rows("get_todays_homework", []),
+        "get_homework_by_natural_date": shape_rows("get_homework_by_natural_date", rows),
+        "get_announcements_by_week": shape_rows("get_announcements_by_week", rows),
+        "search_content_by_type": shape_rows("search_content_by_type", rows * 12),
+        "get_content_summary": {"total_content": 3, "homework_count": 1, "announcement_count": 1, "notes_count": 1},
+    }
+
+    def tool(name):
+        async def call(*args):
+            calls.append((name, args))
+            return results[name]
+        return call
+    return {name: tool(name) for name in results}
+
+
+def make_client(agent, calls) -> TestClient:
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    router = IntentRouter(agent, tools=fake_tools(calls))
+    app.dependency_overrides[school.get_chat_agent] = lambda: router
+    # No response cache: every message must reach the agent under test
+    app.dependency_overrides[school.get_chat_cache] = lambda: None
+    return TestClient(app)
+
+
+def test_corpus_matches_expected_intents():
+    mismatches = []
+    for message, intent, args in CORPUS:
+        matched = match_intent(message)
+        got = (matched[0].name, matched[1]) if matched else (None, ())
+        if got != (intent, args):
+            mismatches.append((message, got))
+    assert mismatches == []
+
+
+def test_fast_path_answers_without_the_model():
+    agent, calls = FakeAgent(), []
+    client = make_client(agent, calls)
+    response = client.post("/schools/chat", json={"message": "Show all homework given on November 5th"})
+
+    assert response.json()["response"] == (
+        "Here is the homework for november 5th (1 item):\n- Algebra worksheet (Class 10, Maths) — 2024-11-05"
+    )
+    assert calls == [("get_homework_by_natural_date", ("november 5th",))]
+    assert agent.messages == []
+
+
+def test_fast_path_replies_are_templated():
+    client = make_client(FakeAgent(), [])
+    ask = lambda message: client.post("/schools/chat", json={"message": message}).json()["response"]
+
+    assert ask("today's homework") == "There is no homework for today."
+    assert ask("summary") == "You have 3 items in total: 1 homework, 1 announcement and 1 notes."
+    listed = ask("show notes").splitlines()
+    assert listed[0] == "Here is all the notes content (12 items):"
+    assert listed[-1] == "...and 2 more."
+
+
+def test_stream_reports_fast_path_tool_call():
+    client = make_client(FakeAgent(), [])
+    body = client.post("/schools/chat/stream", json={"message": "list announcements"}).text
+    events = [(block.splitlines()[0][len("event: "):], json.loads(block.splitlines()[1][len("data: "):]))
+              for block in body.strip().split("\n\n")]
+
+    assert [event for event, _ in events] == ["tool_call", "tool_result", "chunk", "done"]
+    assert events[0][1] == {"name": "search_content_by_type", "args": {"content_type": "announcement"}}
+
+
+def test_unmatched_message_falls_through_and_is_counted():
+    agent = FakeAgent()
+    client = make_client(agent, [])
+    before = intent_stats.stats()
+    response = client.post("/schools/chat", json={"message": "Upload new notes for Class 10 English"})
+    after = client.get("/schools/agent/intents").json()
+
+    assert response.json()["response"] == "from the model"
+    assert agent.messages == ["Upload new notes for Class 10 English"]
+    assert after["fallthrough"] == before["fallthrough"] + 1
+    assert after["hits"] == before["hits"]
+
+
+if __name__ == "__main__":
+    test_corpus_matches_expected_intents()
+    test_fast_path_answers_without_the_model()
+    test_fast_path_replies_are_templated()
+    test_stream_reports_fast_path_tool_call()
+    test_unmatched_message_falls_through_and_is_counted()
+    print("✅ All intent fast-path tests passed!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the request latency metrics: requests to /schools/{content_id} are
+labelled with the route template in the /metrics output, never with the
+raw path, and unknown paths share one "unmatched" label. Content lookups
+are a local fake, so no database is used
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from core import metrics
+from routers import school
+from services import school_service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def aget_content_by_id(content_id):
+        return None
+
+    monkeypatch.setattr(school_service, "aget_content_by_id", aget_content_by_id)
+    app = FastAPI()
+    app.middleware("http")(metrics.metrics_middleware)
+    app.include_router(school.router, prefix="/schools")
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def get_metrics():
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+    return TestClient(app)
+
+
+def request_counts(text: str) -> dict:
+    """(method, route, status) labels -> request count, from the latency histogram's _count lines."""
+    counts = {}
+    for line in text.splitlines():
+        if line.startswith("digischool_http_request_duration_seconds_count{"):
+            labels, count = line[line.index("{") + 1:].rsplit("} ", 1)
+            pairs = dict(pair.split("=", 1) for pair in labels.split(","))
+            counts[tuple(pairs[name].strip('"') for name in ("method", "route", "status"))] = int(count)
+    return counts
+
+
+def test_route_template_is_the_label(client):
+    before = request_counts(client.get("/metrics").text)
+    for content_id in (31337, 31338, 31339):
+        assert client.get(f"/schools/{content_id}").status_code == 404
+    assert client.get("/no/such/path/31337").status_code == 404
+
+    text = client.get("/metrics").text
+    counts = request_counts(text)
+    key = ("GET", "/schools/{content_id}", "404")
+    assert counts[key] - before.get(key, 0) == 3
+    assert counts[("GET", "unmatched", "404")] - before.get(("GET", "unmatched", "404"), 0) == 1
+    assert "3133" not in text
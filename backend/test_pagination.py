@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of GET /schools/: cursors round-trip, walking the
+X-Next-Cursor pages returns every row once in sort order (even with a write
+between pages), the last page sends no cursor, and a malformed cursor gets
+a 400. One school shard lives in a temporary directory
+"""
+
+from datetime import date
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import shards
+from core.shards import ShardManager
+from core.tenancy import TenantMiddleware
+from models.data_model import SchoolContent
+from routers import school
+from services import school_service
+
+ALPHA = {"X-School-Id": "alpha"}
+# Several rows share a day, so date_uploaded order relies on the content_id tie-break
+DAYS = [5, 3, 5, 1, 3, 5, 2, 4, 3, 1]
+
+
+def content(title: str, day: int) -> SchoolContent:
+    return SchoolContent(teacher_id="t101", class_name="Class 1", subject="Maths",
+                         date_uploaded=date(2024, 11, day), content_type="homework", title=title)
+
+
+@pytest.fixture
+def shard(tmp_path, monkeypatch):
+    manager = ShardManager(str(tmp_path / "shards"), pool_size=1)
+    shard = manager.create("alpha")
+    shard.insert_contents_logged([content(f"Item {i}", day) for i, day in enumerate(DAYS)])
+    monkeypatch.setattr(shards, "shard_manager", manager)
+    yield shard
+    manager.close()
+
+
+@pytest.fixture
+def client(shard):
+    app = FastAPI()
+    app.include_router(school.router, prefix="/schools")
+    return TestClient(TenantMiddleware(app, known=shards.shard_manager.exists))
+
+
+def walk(client, between_pages=None, **params) -> list:
+    """Follow X-Next-Cursor from the first page to the last; returns every (id, date) pair seen."""
+    seen, after = [], None
+    while True:
+        query = {**params, **({"after": after} if after else {})}
+        response = client.get("/schools/", params=query, headers=ALPHA)
+        assert response.status_code == 200
+        seen.extend((item["content_id"], item["date_uploaded"]) for item in response.json())
+        after = response.headers.get("x-next-cursor")
+        if after is None:
+            return seen
+        if between_pages:
+            between_pages()
+            between_pages = None
+
+
+def test_cursor_round_trip():
+    row = {"content_id": 42, "date_uploaded": "2024-11-05"}
+    for sort in ("content_id", "date_uploaded"):
+        cursor = school_service._encode_cursor(row, sort)
+        assert "=" not in cursor
+        keys = tuple(row[column] for column in school_service.PAGE_KEYS[sort])
+        assert school_service._decode_cursor(cursor, sort) == keys
+    # A content_id cursor has one key, so it can't be reused for date_uploaded order
+    with pytest.raises(ValueError):
+        school_service._decode_cursor(school_service._encode_cursor(row, "content_id"), "date_uploaded")
+
+
+@pytest.mark.parametrize("sort,order", [("content_id", "asc"), ("content_id", "desc"),
+                                        ("date_uploaded", "asc"), ("date_uploaded", "desc")])
+def test_pages_cover_every_row_once_in_order(client, sort, order):
+    seen = walk(client, limit=3, sort=sort, order=order)
+    key = (lambda pair: pair[0]) if sort == "content_id" else (lambda pair: (pair[1], pair[0]))
+    assert seen == sorted(seen, key=key, reverse=order == "desc")
+    assert sorted(pair[0] for pair in seen) == list(range(1, len(DAYS) + 1))
+
+
+def test_write_between_pages_does_not_shift_them(client, shard):
+    # A row sorting before the current page must not push an already-seen row onto the next page
+    seen = walk(client, between_pages=lambda: shard.insert_content_logged(content("Late", 30)),
+                limit=4, sort="date_uploaded", order="desc")
+    ids = [pair[0] for pair in seen]
+    assert len(ids) == len(set(ids))
+    assert sorted(ids) == list(range(1, len(DAYS) + 1))
+
+
+def test_last_page_has_no_cursor(client):
+    first = client.get("/schools/", params={"limit": len(DAYS) - 1}, headers=ALPHA)
+    assert "x-next-cursor" in first.headers
+    last = client.get("/schools/", params={"limit": len(DAYS) - 1, "after": first.headers["x-next-cursor"]},
+                      headers=ALPHA)
+    assert len(last.json()) == 1 and "x-next-cursor" not in last.headers
+    exact = client.get("/schools/", params={"limit": len(DAYS)}, headers=ALPHA)
+    assert len(exact.json()) == len(DAYS) and "x-next-cursor" not in exact.headers
+
+
+@pytest.mark.parametrize("after", ["!!not-a-cursor!!", "bm90IGpzb24", school_service._encode_cursor(
+    {"content_id": 1, "date_uploaded": "2024-11-01"}, "date_uploaded")])
+def test_bad_cursor_is_a_400(client, after):
+    response = client.get("/schools/", params={"limit": 3, "after": after}, headers=ALPHA)
+    assert response.status_code == 400
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the per-school shards: distinct tenant keys never share a file, only
+existing shards are opened, a shard that is slow to open holds up no other
+school and is opened once however many requests ask for it, and unknown
+schools get a 404 from the tenant middleware. Shards are created in a
+temporary directory
+"""
+
+import itertools
+import os
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import shards
+from core.shards import ShardManager, UnknownTenant, shard_file, shard_key
+from core.tenancy import TenantMiddleware, current_tenant, tenant_key
+
+SCHOOLS = ["alpha", "alpha__2024", "alpha_2024", "alpha-2024", "2024", "a_", "a__b", "A"]
+YEARS = [None, "2024", "2024-25", "2025"]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ShardManager(str(tmp_path / "shards"), max_open=2, pool_size=1)
+    yield manager
+    manager.close()
+
+
+def test_distinct_keys_never_share_a_file():
+    keys = {tenant_key(school, year) for school, year in itertools.product(SCHOOLS, YEARS)}
+    files = {}
+    for key in keys:
+        name = shard_file(key)
+        assert name not in files, f"{key!r} and {files.get(name)!r} share {name}"
+        files[name] = key
+        assert shard_key(name) == key
+
+
+def test_keys_round_trip_through_the_directory(manager):
+    keys = ["alpha", "alpha/2024", "alpha__2024", "beta/2024-25"]
+    for key in keys:
+        manager.create(key)
+    assert manager.keys() == sorted(keys)
+    assert len({manager.path(key) for key in keys}) == len(keys)
+
+
+def test_get_only_opens_existing_shards(manager):
+    with pytest.raises(UnknownTenant):
+        manager.get("ghost")
+    assert not os.path.exists(manager.path("ghost"))
+    assert manager.keys() == []
+
+    created = manager.create("alpha")
+    assert manager.get("alpha") is created
+    assert manager.exists("alpha") and not manager.exists("ghost")
+
+
+def test_unknown_school_is_rejected_by_the_middleware(manager):
+    manager.create("alpha")
+    app = FastAPI()
+
+    @app.get("/tenant")
+    def tenant():
+        return {"tenant": current_tenant.get()}
+
+    client = TestClient(TenantMiddleware(app, known=manager.exists))
+    assert client.get("/tenant", headers={"X-School-Id": "alpha"}).json() == {"tenant": "alpha"}
+    assert client.get("/tenant").json() == {"tenant": None}
+    response = client.get("/tenant", headers={"X-School-Id": "ghost"})
+    assert response.status_code == 404
+    assert not manager.exists("ghost")
+
+
+def test_slow_open_blocks_only_its_own_shard(manager, monkeypatch):
+    for key in ("alpha", "beta"):
+        manager.create(key)
+    manager.close()
+    started, release, opened = threading.Event(), threading.Event(), []
+    real = shards.SQLiteDB
+
+    def open_shard(path, **kwargs):
+        opened.append(path)
+        if path == manager.path("alpha"):
+            started.set()
+            release.wait(10)
+        return real(path, **kwargs)
+
+    monkeypatch.setattr(shards, "SQLiteDB", open_shard)
+    results = {}
+
+    def get(name, key):
+        results[name] = manager.get(key)
+
+    slow = [threading.Thread(target=get, args=(name, "alpha")) for name in ("first", "second")]
+    slow[0].start()
+    assert started.wait(10)
+    slow[1].start()
+    other = threading.Thread(target=get, args=("beta", "beta"))
+    other.start()
+    other.join(10)
+    # beta opened while alpha was still stuck opening
+    assert not other.is_alive() and "first" not in results
+
+    release.set()
+    for thread in slow:
+        thread.join(10)
+    assert results["first"] is results["second"] is manager.get("alpha")
+    assert opened.count(manager.path("alpha")) == 1
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test that content writes invalidate the agent tool cache: a repeated tool
+call is a hit until a write of its content type, after which it misses and
+sees the new row, and a bulk import notifies the change listeners once per
+batch rather than once per row. One school shard lives in a temporary
+directory
+"""
+
+from datetime import date
+import pytest
+from agent import cache, tools
+from agent.cache import ToolCache
+from core import shards
+from core.shards import ShardManager
+from core.tenancy import tenant_scope
+from models.data_model import SchoolContent
+from services import school_service
+
+DAY = "2024-11-05"
+
+
+def content(title: str, content_type: str = "homework") -> SchoolContent:
+    return SchoolContent(teacher_id="t101", class_name="Class 1", subject="Maths",
+                         date_uploaded=date.fromisoformat(DAY), content_type=content_type, title=title)
+
+
+@pytest.fixture
+def tool_cache(tmp_path, monkeypatch):
+    manager = ShardManager(str(tmp_path / "shards"), pool_size=1)
+    manager.create("alpha")
+    monkeypatch.setattr(shards, "shard_manager", manager)
+    tool_cache = ToolCache()
+    monkeypatch.setattr(cache, "tool_cache", tool_cache)
+    monkeypatch.setattr(school_service, "_change_listeners", [tool_cache.on_content_change])
+    with tenant_scope("alpha"):
+        yield tool_cache
+    manager.close()
+
+
+def homework_titles() -> list:
+    return [row["title"] for row in tools.get_homework_by_date(DAY)]
+
+
+def misses(tool_cache) -> int:
+    return tool_cache.stats()["tools"]["get_homework_by_date"]["misses"]
+
+
+def test_write_invalidates_cached_tool_result(tool_cache):
+    school_service.create_content(content("Fractions"))
+    assert homework_titles() == ["Fractions"]
+    assert homework_titles() == ["Fractions"]
+    assert misses(tool_cache) == 1
+
+    # Another content type leaves the homework result cached
+    school_service.create_content(content("Sports day", "announcement"))
+    homework_titles()
+    assert misses(tool_cache) == 1
+
+    school_service.create_content(content("Decimals"))
+    assert homework_titles() == ["Fractions", "Decimals"]
+    assert misses(tool_cache) == 2
+
+
+def test_bulk_import_notifies_once_per_batch(tool_cache, monkeypatch):
+    notified = []
+    monkeypatch.setattr(school_service, "_change_listeners", [tool_cache.on_content_change, notified.append])
+    homework_titles()
+
+    records = [(row, content(f"Import {row}").model_dump()) for row in range(1, 6)]
+    assert school_service.import_contents(records, batch_size=2)["inserted"] == 5
+    assert [len(changes) for changes in notified] == [2, 2, 1]
+    assert len(homework_titles()) == 5
+    assert misses(tool_cache) == 2
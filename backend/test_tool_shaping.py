@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the list tool result shaping: capped summary pages, continuation
+handles and the size accounting, with a local fake tool instead of the database
+"""
+
+from agent.shaping import shaped_tool, get_more_results, tool_output_stats, MAX_TOOL_ROWS
+
+ROWS = [
+    {"content_id": i, "teacher_id": "t101", "class_name": "Class 10", "subject": "Maths",
+     "date_uploaded": "2024-11-05", "content_type": "notes", "title": f"Notes {i}",
+     "description": "A long description " * 10, "attachment_urls": ["https://example.com/a.pdf"] if i % 2 else []}
+    for i in range(1, MAX_TOOL_ROWS * 2 + 6)
+]
+
+
+def list_shaping_test_notes(class_name: str, limit: int = None) -> list:
+    """Get notes for a class"""
+    return ROWS[:limit] if limit else ROWS
+
+
+shaped = shaped_tool(list_shaping_test_notes)
+
+
+def test_page_is_capped_and_projected():
+    page = shaped("Class 10")
+
+    assert page["total"] == len(ROWS)
+    assert len(page["items"]) == MAX_TOOL_ROWS
+    assert page["items"][0] == {"content_id": 1, "content_type": "notes", "title": "Notes 1", "class_name": "Class 10",
+                                "subject": "Maths", "date_uploaded": "2024-11-05", "attachments": 1}
+    assert shaped.__name__ == "list_shaping_test_notes"
+    assert shaped.__doc__ == "Get notes for a class"
+
+
+def test_handles_walk_every_row_once():
+    seen, page = [], shaped("Class 10")
+    while True:
+        seen += [item["content_id"] for item in page["items"]]
+        if "next" not in page:
+            break
+        page = get_more_results(page["next"])
+    assert seen == [row["content_id"] for row in ROWS]
+    assert "next" not in shaped("Class 10", limit=5)
+
+
+def test_invalid_handle_is_reported():
+    assert get_more_results("not-a-handle")["success"] is False
+
+
+def test_savings_are_measured():
+    before = tool_output_stats.stats()["tools"].get("list_shaping_test_notes", {"calls": 0, "full_bytes": 0})
+    shaped("Class 10")
+    after = tool_output_stats.stats()["tools"]["list_shaping_test_notes"]
+
+    assert after["calls"] == before["calls"] + 1
+    assert after["full_bytes"] > before["full_bytes"]
+    assert after["shaped_bytes"] < after["full_bytes"]
+    assert after["saved_pct"] > 50
+
+
+if __name__ == "__main__":
+    test_page_is_capped_and_projected()
+    test_handles_walk_every_row_once()
+    test_invalid_handle_is_reported()
+    test_savings_are_measured()
+    print("✅ All tool shaping tests passed!")
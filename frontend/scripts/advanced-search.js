@@ -245,8 +245,8 @@ class AdvancedSearch {
 
     async loadContent() {
         try {
-            const response = await fetch('http://localhost:8082/schools/');
-            this.allContent = await response.json();
+            // Paged and without attachment_urls, which search never uses
+            this.allContent = await ApiService.fetchAllContent();
             this.filteredContent = [...this.allContent];
             this.populateFilterOptions();
             this.updateResultsCount();
@@ -315,7 +315,7 @@ class AdvancedSearch {
         });
     }
 
-    performSearch(query) {
+    async performSearch(query) {
         if (!query.trim()) {
             this.filteredContent = [...this.allContent];
             this.updateDisplay();
@@ -325,15 +325,17 @@ class AdvancedSearch {
         // Add to search history
         this.addToSearchHistory(query);
 
-        const searchTerms = query.toLowerCase().split(' ');
-        this.filteredContent = this.allContent.filter(item => {
-            const searchableText = `
-                ${item.title} ${item.description} ${item.subject} 
-                ${item.class_name} ${item.teacher_id} ${item.content_type}
-            `.toLowerCase();
-
-            return searchTerms.every(term => searchableText.includes(term));
-        });
+        // Ranked full-text search on the server; the last word is matched as a
+        // prefix so results follow the user while they are still typing
+        const ftsQuery = /[\s"*]$/.test(query) ? query : `${query}*`;
+        try {
+            const params = new URLSearchParams({ q: ftsQuery, limit: 200 });
+            const response = await fetch(`http://localhost:8082/schools/search?${params}`);
+            this.filteredContent = await response.json();
+        } catch (error) {
+            console.error('Search error:', error);
+            this.filteredContent = [];
+        }
 
         this.updateDisplay();
         this.showSuggestions(query);
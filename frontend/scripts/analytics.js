@@ -25,15 +25,13 @@ class AdvancedAnalytics {
 
     async fetchAnalyticsData() {
         try {
-            const [content, teachers, departments] = await Promise.all([
-                fetch('http://localhost:8082/schools/').then(r => r.json()),
-                fetch('http://localhost:8082/schools/teachers').then(r => r.json()),
-                fetch('http://localhost:8082/schools/analytics/departments').then(r => r.json())
-            ]);
-            return { content, teachers, departments };
+            // Every chart series comes sorted and trimmed from one server-side request
+            const response = await fetch('http://localhost:8082/schools/analytics/bundle');
+            return await response.json();
         } catch (error) {
             console.error('Analytics data fetch error:', error);
-            return { content: [], teachers: [], departments: [] };
+            const empty = { labels: [], counts: [] };
+            return { content_types: empty, subjects: empty, teachers: { ...empty, ids: [] }, upload_trend: empty };
         }
     }
 
@@ -41,17 +39,14 @@ class AdvancedAnalytics {
         const ctx = document.getElementById('contentTypeChart');
         if (!ctx) return;
 
-        const contentTypes = {};
-        data.content.forEach(item => {
-            contentTypes[item.content_type] = (contentTypes[item.content_type] || 0) + 1;
-        });
+        const contentTypes = data.content_types;
 
         this.charts.contentType = new Chart(ctx, {
             type: 'doughnut',
             data: {
-                labels: Object.keys(contentTypes),
+                labels: contentTypes.labels,
                 datasets: [{
-                    data: Object.values(contentTypes),
+                    data: contentTypes.counts,
                     backgroundColor: [
                         '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF'
                     ],
@@ -73,22 +68,15 @@ class AdvancedAnalytics {
         const ctx = document.getElementById('subjectChart');
         if (!ctx) return;
 
-        const subjects = {};
-        data.content.forEach(item => {
-            subjects[item.subject] = (subjects[item.subject] || 0) + 1;
-        });
-
-        const sortedSubjects = Object.entries(subjects)
-            .sort(([,a], [,b]) => b - a)
-            .slice(0, 6);
+        const subjects = data.subjects;
 
         this.charts.subject = new Chart(ctx, {
             type: 'bar',
             data: {
-                labels: sortedSubjects.map(([subject]) => subject),
+                labels: subjects.labels,
                 datasets: [{
                     label: 'Content Count',
-                    data: sortedSubjects.map(([,count]) => count),
+                    data: subjects.counts,
                     backgroundColor: 'rgba(54, 162, 235, 0.8)',
                     borderColor: 'rgba(54, 162, 235, 1)',
                     borderWidth: 2
@@ -110,22 +98,15 @@ class AdvancedAnalytics {
         const ctx = document.getElementById('teacherChart');
         if (!ctx) return;
 
-        const teacherCounts = {};
-        data.content.forEach(item => {
-            teacherCounts[item.teacher_id] = (teacherCounts[item.teacher_id] || 0) + 1;
-        });
-
-        const topTeachers = Object.entries(teacherCounts)
-            .sort(([,a], [,b]) => b - a)
-            .slice(0, 5);
+        const topTeachers = data.teachers;
 
         this.charts.teacher = new Chart(ctx, {
             type: 'horizontalBar',
             data: {
-                labels: topTeachers.map(([teacher]) => teacher),
+                labels: topTeachers.labels,
                 datasets: [{
                     label: 'Uploads',
-                    data: topTeachers.map(([,count]) => count),
+                    data: topTeachers.counts,
                     backgroundColor: 'rgba(255, 99, 132, 0.8)',
                     borderColor: 'rgba(255, 99, 132, 1)',
                     borderWidth: 2
@@ -147,20 +128,15 @@ class AdvancedAnalytics {
         const ctx = document.getElementById('trendsChart');
         if (!ctx) return;
 
-        const dateCounts = {};
-        data.content.forEach(item => {
-            dateCounts[item.date_uploaded] = (dateCounts[item.date_uploaded] || 0) + 1;
-        });
-
-        const sortedDates = Object.entries(dateCounts).sort();
+        const trend = data.upload_trend;
 
         this.charts.trends = new Chart(ctx, {
             type: 'line',
             data: {
-                labels: sortedDates.map(([date]) => date),
+                labels: trend.labels,
                 datasets: [{
                     label: 'Daily Uploads',
-                    data: sortedDates.map(([,count]) => count),
+                    data: trend.counts,
                     borderColor: 'rgba(75, 192, 192, 1)',
                     backgroundColor: 'rgba(75, 192, 192, 0.2)',
                     tension: 0.4,
@@ -99,6 +99,44 @@ function setSending(isSending) {
   input.disabled = isSending;
 }
 
+// Stream the agent's reply from /schools/chat/stream, rendering text as it arrives
+async function streamAgentReply(text) {
+  const el = appendMessage({ parts: [{ text: "…" }] }, "model");
+  let reply = "";
+  let tools = [];
+  let currentEvent = "chunk";
+
+  const render = () => {
+    const progress = tools.length ? `<div class="tool-progress"><i class="fas fa-cog fa-spin"></i> ${tools.join(", ")}</div>` : "";
+    el.innerHTML = progress + (reply ? marked.parse(reply) : "");
+    messagesEl.scrollTop = messagesEl.scrollHeight;
+  };
+
+  await ApiService.postWithStream("/schools/chat/stream", { message: text }, (chunk) => {
+    // ApiService passes "event:" lines through as plain strings and parses "data:" lines
+    if (typeof chunk === "string" && chunk.startsWith("event:")) {
+      currentEvent = chunk.slice(6).trim();
+      return;
+    }
+    if (currentEvent === "chunk") {
+      reply += chunk.text;
+    } else if (currentEvent === "tool_call") {
+      tools.push(chunk.name);
+    } else if (currentEvent === "tool_result") {
+      tools = tools.filter(name => name !== chunk.name);
+    } else if (currentEvent === "error") {
+      reply += `\n\n${chunk.detail}`;
+    } else if (currentEvent === "done") {
+      tools = [];
+    }
+    render();
+  });
+
+  if (!reply) {
+    el.innerHTML = marked.parse("I'm here to help with school operations!");
+  }
+}
+
 async function sendMessage(text, attachedFile = null) {
   if (!text) return;
 
@@ -106,7 +144,8 @@ async function sendMessage(text, attachedFile = null) {
   appendMessage({ parts: [{ text }] }, "user");
 
   try {
-    const allContent = await fetch('http://localhost:8082/schools/').then(r => r.json());
+    // Revalidated with one conditional request; only refetched after a write
+    const allContent = await ApiService.fetchAllContent();
     const query = text.toLowerCase();
     let response = "I'm your Digi School Agent. How can I help you?";
     
@@ -657,26 +696,15 @@ async function sendMessage(text, attachedFile = null) {
           ${formatContentCards(filteredContent)}
         `;
       } else {
-        const requestedType = query.includes('homework') ? 'homework' : 
-                             query.includes('notes') ? 'notes' : 
-                             query.includes('announcement') ? 'announcements' : 'content';
-        
-        response = `
-          <div class="no-results">
-            <div style="margin-bottom: 1rem;">I couldn't find any ${requestedType}</div>
-            <div style="font-size: 0.9rem; color: #6B7280;">
-              Try asking:<br>
-              • "show homework"<br>
-              • "show notes on November 5th"<br>
-              • "show B.E assignments"<br><br>
-              Or I can help you add new content!
-            </div>
-          </div>
-        `;
+        // Nothing matched locally: hand the question to the agent and stream its answer
+        response = null;
+        await streamAgentReply(text);
       }
     }
 
-    appendMessage({ parts: [{ text: response }] }, "model");
+    if (response) {
+      appendMessage({ parts: [{ text: response }] }, "model");
+    }
   } catch (err) {
     appendMessage({ parts: [{ text: formatError(`Error: ${err.message}`) }] }, "model");
   } finally {
@@ -69,7 +69,7 @@ function renderContents(contents = []) {
           ${c.description ? `<p><strong>Description:</strong> ${escapeHtml(c.description)}</p>` : ""}
           ${
             c.attachment_urls && c.attachment_urls.length
-              ? `<p><strong>Attachments:</strong> ${c.attachment_urls.map(url => `<a href="${escapeAttr(url)}" target="_blank">${escapeHtml(url)}</a>`).join(", ")}</p>`
+              ? `<p><strong>Attachments:</strong> ${c.attachment_urls.map(url => `<a href="${escapeAttr(attachmentHref(url))}" target="_blank">${escapeHtml(url)}</a>`).join(", ")}</p>`
               : ""
           }
           <p><strong>Uploaded:</strong> ${escapeHtml(c.date_uploaded)}</p>
@@ -236,6 +236,13 @@ confirmDeleteBtn.addEventListener("click", async () => {
 // ===============================
 // UTILITY FUNCTIONS
 // ===============================
+// "sha256:<hash>" references point at files in the backend's attachment store
+function attachmentHref(url) {
+  return url.toLowerCase().startsWith("sha256:")
+    ? `http://localhost:8082/schools/attachments/${url.slice("sha256:".length)}`
+    : url;
+}
+
 function escapeHtml(str = "") {
   return String(str)
     .replaceAll("&", "&amp;")
@@ -211,25 +211,23 @@ class NotificationSystem {
     }
 
     startRealTimeMonitoring() {
-        // Monitor for new content
-        setInterval(async () => {
-            try {
-                const response = await fetch('http://localhost:8082/schools/');
-                const content = await response.json();
-                
-                // Check for new uploads (simplified check)
-                if (content.length > this.lastContentCount) {
-                    this.show(
-                        'New Content Added!',
-                        `${content.length - (this.lastContentCount || 0)} new items uploaded`,
-                        'info'
-                    );
-                }
-                this.lastContentCount = content.length;
-            } catch (error) {
-                // Silent fail for demo
-            }
-        }, 30000); // Check every 30 seconds
+        // Subscribe to the change feed instead of polling the content list.
+        // EventSource reconnects on its own and resumes from the last event id.
+        const changes = new EventSource('http://localhost:8082/schools/changes/stream');
+        changes.addEventListener('insert', (event) => {
+            const change = JSON.parse(event.data);
+            const content = change.payload || {};
+            this.show(
+                'New Content Added!',
+                `${content.content_type || 'Content'}: ${content.title || `#${change.content_id}`}`,
+                'info'
+            );
+        });
+        changes.addEventListener('delete', (event) => {
+            const change = JSON.parse(event.data);
+            this.show('Content Removed', `Item #${change.content_id} was deleted`, 'warning');
+        });
+        this.changeStream = changes;
 
         // System status notifications
         this.monitorSystemHealth();
@@ -239,7 +237,7 @@ class NotificationSystem {
         setInterval(async () => {
             try {
                 const start = Date.now();
-                await fetch('http://localhost:8082/schools/');
+                await fetch('http://localhost:8082/schools/?limit=1&fields=content_id');
                 const responseTime = Date.now() - start;
                 
                 if (responseTime > 2000) {
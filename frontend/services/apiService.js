@@ -14,6 +14,12 @@ const API_CONFIG = {
   
   // Build full URL
 const buildURL = (endpoint) => `${API_CONFIG.baseURL}${endpoint}`;
+
+  // Content list fields the pages use; attachment_urls is left out
+const CONTENT_LIST_FIELDS = "content_id,teacher_id,class_name,subject,date_uploaded,content_type,title,description";
+
+  // fields -> { etag, items } of the last full content list
+const contentListCache = new Map();
   
   // Handle API responses
 const handleResponse = async (response) => {
@@ -88,6 +94,32 @@ return response.json();
       }
     }
   
+    // ---------- CONTENT LIST ----------
+    // Every content row, paged through /schools/ by X-Next-Cursor. The list
+    // is kept and revalidated with the first page's ETag: the backend's ETag
+    // changes on every write, so a 304 means no page changed and the whole
+    // list is reused after one small request.
+    static async fetchAllContent(fields = CONTENT_LIST_FIELDS, pageSize = 1000) {
+      const cached = contentListCache.get(fields);
+      const items = [];
+      let etag = null;
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: pageSize, fields });
+        if (cursor) params.set("after", cursor);
+        const headers = { ...API_CONFIG.headers };
+        if (!cursor && cached) headers["If-None-Match"] = cached.etag;
+        const response = await fetch(`${buildURL("/schools/")}?${params}`, { method: "GET", headers });
+        if (response.status === 304) return cached.items;
+        const page = await handleResponse(response);
+        if (!cursor) etag = response.headers.get("ETag");
+        items.push(...page);
+        cursor = response.headers.get("X-Next-Cursor");
+      } while (cursor);
+      if (etag) contentListCache.set(fields, { etag, items });
+      return items;
+    }
+
     // ---------- HEADER MANAGEMENT ----------
     static setHeader(key, value) {
       API_CONFIG.headers[key] = value;